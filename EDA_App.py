@@ -1,6 +1,12 @@
 import streamlit as st
 import pandas as pd
-from pygwalker.api.streamlit import StreamlitRenderer, init_streamlit_comm
+from pygwalker.api.streamlit import init_streamlit_comm
+from eda_cache import fingerprint, upload_cache, upload_key
+from eda_explore import release_session_renderer, session_renderer
+from eda_ingest import SAMPLE_ROWS, read_upload
+from eda_parallel import profile_upload
+from eda_profile import row_indexes
+from paged_table import page_caption, page_slice, paged_table
 
 # Adjust the width of the Streamlit page
 st.set_page_config(
@@ -16,42 +22,91 @@ st.title("EDA Tool for Data Analytics 📊")
 st.write("---")
 # Sidebar for file upload
 uploaded_file = st.sidebar.file_uploader("Upload a CSV file", type="csv")
+compact_dtypes = st.sidebar.checkbox("Compact dtypes", value=True,
+                                     help="Store repeated strings as categories and downcast integers to save memory")
+approximate_stats = st.sidebar.checkbox("Approximate statistics", value=False,
+                                        help="Estimate distinct counts, percentiles and top values with fixed-size sketches "
+                                             "(HyperLogLog, KLL, count-min) to bound memory on large uploads")
+
+# Run compute(progress) behind a progress bar that is removed once it finishes
+def with_progress(text, compute):
+    progress = st.progress(0.0, text=text)
+    try:
+        return compute(lambda fraction, text: progress.progress(fraction, text=text))
+    finally:
+        progress.empty()
+
+# Hash each upload once per session; widget reruns reuse the digest
+def upload_fingerprint(uploaded_file):
+    digests = st.session_state.setdefault("upload_digests", {})
+    if uploaded_file.file_id not in digests:
+        digests[uploaded_file.file_id] = fingerprint(uploaded_file)
+    return digests[uploaded_file.file_id]
+
+# Row positions behind a drill-down: recorded by the exact profile, else found with
+# one scan of the column (approximate profiles keep no per-row state)
+def drilldown_rows(upload, profile, column, kind):
+    positions = getattr(profile.column(column), kind)
+    if positions is None:
+        null_rows, duplicate_rows = row_indexes(upload.column(column))
+        positions = null_rows if kind == "null_rows" else duplicate_rows
+    return positions
+
+# Show one page of the rows at the given positions; only that page is loaded and sent
+def show_rows_page(upload, positions, widget_key):
+    rows = page_slice(len(positions), key=widget_key)
+    st.dataframe(upload.take(positions[rows]))
+    page_caption(rows, len(positions))
 
 # Function to perform EDA
-def perform_eda(dataframe):
+def perform_eda(upload, key, approximate=False):
+    # Every table below comes from one profiling pass over the columns, spread over a
+    # process pool and cached with the upload; a spilled upload is loaded from disk one
+    # column at a time, or one chunk at a time when sketching
+    profile = upload_cache.profile(key, "approximate" if approximate else "exact", lambda: with_progress(
+        "Profiling columns...", lambda report: profile_upload(upload, approximate, progress=report)))
+    errors = profile.error_bounds()
+
     st.markdown("***Dataset Shape:***")
-    st.write(dataframe.shape)
+    st.write(profile.shape)
     st.divider()
     st.markdown("***First 5 Rows:***")
-    st.write(dataframe.head())
+    st.write(upload.head)
     st.markdown("***Last 5 Rows:***")
-    st.write(dataframe.tail())
+    st.write(upload.tail)
     st.divider()
 
     # Display columns and their data types
-    column_types = pd.DataFrame(dataframe.dtypes, columns=["Data Type"])
-    column_types.index.name = "Column"
+    column_types = profile.dtypes()
     st.markdown("***Dataset Columns and Data Types:***")
-    st.table(column_types)
+    paged_table(column_types, key="column_types", table=True)
     st.divider()
 
     # Display summary statistics
     st.markdown("***Summary Statistics***")
-    st.write(dataframe.describe(include='all'))
+    st.write(profile.describe())
+    if profile.approximate:
+        st.caption("Approximate statistics: error bounds per column. Counts, means, std, min and max are exact.")
+        paged_table(pd.DataFrame({"Unique ± (95%)": errors["distinct"].round().astype(int),
+                                  "Top freq ± (99%)": errors["freq"].round().astype(int),
+                                  "Percentiles ± rank (99%)": errors["percentile"].map("{:.1%}".format)}),
+                    key="error_bounds", table=True)
     
     st.divider()
-    unique_values = dataframe.nunique()
+    unique_values = profile.unique_counts()
     unique_values_df = pd.DataFrame({"Columns": unique_values.index, "Count of Unique Values": unique_values.values})
+    if profile.approximate:
+        unique_values_df["± (95%)"] = errors["distinct"].round().astype(int).values
     unique_values_df.index += 1
     # unique_values_df = pd.DataFrame(dataframe.nunique(), columns=["Count of Unique Values"])
     st.markdown("***Unique Value Count***")
-    st.table(unique_values_df)
+    paged_table(unique_values_df, key="unique_values", table=True)
     # st.write("Unique Values in Each Column:", dataframe.nunique())
     
 
     # Get columns with missing values
-    null_columns = dataframe.columns[dataframe.isnull().any()].tolist()
-    null_counts = dataframe.isnull().sum()
+    null_counts = profile.null_counts()
+    null_columns = null_counts.index[null_counts > 0].tolist()
 
     if null_columns:
         st.divider()
@@ -59,51 +114,59 @@ def perform_eda(dataframe):
         null_columns_df = pd.DataFrame({"Columns with Null": null_columns, "Number of Nulls": [null_counts[col] for col in null_columns]})
         null_columns_df = null_columns_df.reset_index(drop=True, inplace=False)
         null_columns_df.index += 1
-        st.table(null_columns_df)
+        paged_table(null_columns_df, key="null_columns", table=True)
         
         # Selectbox for choosing column to view Nulls
         selected_column = st.selectbox("Select a column to view Nulls:", null_columns)
         
         # Display Nulls for the selected column
-        null_rows = dataframe[dataframe[selected_column].isnull()]
+        null_rows = drilldown_rows(upload, profile, selected_column, "null_rows")
         st.write(f"Rows with Nulls in '{selected_column}':")
-        st.dataframe(null_rows)
+        show_rows_page(upload, null_rows, widget_key=f"null_rows_page-{selected_column}")
     else:
         st.write("No missing values found in the dataset.")
 
     st.divider()
 
     # Identify columns with duplicates
-    duplicates_info = {col: dataframe.duplicated(subset=[col]).sum() for col in dataframe.columns if dataframe.duplicated(subset=[col]).sum() > 0}
+    duplicate_counts = profile.duplicate_counts()
+    duplicates_info = duplicate_counts[duplicate_counts > 0].to_dict()
     
     if duplicates_info:
         st.write("Columns With Duplicates:")
-        st.table(pd.DataFrame.from_dict(duplicates_info, orient='index', columns=['Count of Duplicates']))
+        duplicates_df = pd.DataFrame.from_dict(duplicates_info, orient='index', columns=['Count of Duplicates'])
+        if profile.approximate:
+            duplicates_df["± (95%)"] = errors["duplicates"].reindex(duplicates_df.index).round().astype(int)
+        paged_table(duplicates_df, key="duplicate_columns", table=True)
         
         # Selection for detailed duplicate view
         column_to_view = st.selectbox("Select a column to view duplicates:", options=list(duplicates_info.keys()))
         
         # Display duplicates for the selected column
-        duplicates = dataframe[dataframe.duplicated(subset=[column_to_view], keep=False)].sort_values(by=[column_to_view])
+        duplicates = drilldown_rows(upload, profile, column_to_view, "duplicate_rows")
         st.write(f"Duplicates in '{column_to_view}':")
-        st.dataframe(duplicates)
+        show_rows_page(upload, duplicates, widget_key=f"duplicate_rows_page-{column_to_view}")
     else:
         st.write("No columns with duplicates found.")
 
-# Function to initialize PygWalker with uploaded DataFrame
-@st.cache_resource
-def get_pyg_renderer(dataframe) -> "StreamlitRenderer":
-    return StreamlitRenderer(dataframe, spec="./gw_config.json", spec_io_mode="rw")
-
 if uploaded_file is not None:
-    dataframe = pd.read_csv(uploaded_file)
+    # Parse the upload in chunks, once per distinct file content; large uploads are
+    # spilled to Parquet instead of RAM
+    key = upload_key(upload_fingerprint(uploaded_file), compact_dtypes)
+    upload = upload_cache.upload(key, lambda: with_progress("Reading upload...", lambda report: read_upload(
+        uploaded_file, name=uploaded_file.name, compact=compact_dtypes, progress=report)))
 
     # Display EDA
-    perform_eda(dataframe)
+    perform_eda(upload, key, approximate=approximate_stats)
     
     # Initialize and render PygWalker exploration interface
-    renderer = get_pyg_renderer(dataframe)
+    # (one renderer per upload, looked up by its key; a spilled upload is only sampled when it is created)
+    if upload.spilled:
+        st.info(f"This upload was too large to keep in memory, so PygWalker explores about {SAMPLE_ROWS:,} evenly spaced rows of {upload.rows:,}.")
+    renderer = session_renderer(key, upload.sample)
     renderer.render_explore()
 else:
+    # The session's previous file (if any) no longer needs a PygWalker renderer
+    release_session_renderer()
     # If no file is uploaded, prompt the user to upload a CSV file
     st.header(":point_left: Please upload a CSV file to get started")
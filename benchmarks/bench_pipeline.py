@@ -0,0 +1,306 @@
+"""Wall time and peak memory per stage of the dashboard pipeline on synthetic SRR sheets.
+
+Writes a synthetic "Response and Survey Form" export (benchmarks/synthetic.py)
+at each size and runs the compute path of srr_a.py and srr_m.py headlessly,
+through the same srr_* functions the scripts call, one stage at a time:
+
+* per snapshot: load_data (CSV parse), duration_parsing, normalize (which
+  includes duration_parsing), snapshot_save and snapshot_load (the Arrow file a
+  restarted process starts from), filter_index (bitmask engine and aggregate cube)
+* per view rerun: filter_chain, aggregations, pivots, chart_specs,
+  serialization (the Arrow / JSON payloads Streamlit sends to the browser)
+
+Wall time is the best of --repeat untraced runs. Peak memory is the peak
+traced allocation above the stage's starting point, from one extra run under
+tracemalloc. Per-rerun stages run with cold caches, as for the first session
+after a refresh. Results go to stdout (or --output) as JSON.
+
+Usage: python benchmarks/bench_pipeline.py [--rows 10000 100000 1000000] [--repeat 3] [--output results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import altair as alt
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.io
+from streamlit import type_util
+from streamlit.elements import vega_charts
+
+from synthetic import write_sheet
+from srr_cube import AggregateCube
+from srr_data import CsvSheet, DURATION_COLUMNS, duration_columns, format_hms, normalize, parse_duration
+from srr_filters import FilterEngine
+from srr_persist import SnapshotFiles
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VIEWS = ['srr_a', 'srr_m']
+MEANS = {
+    'TimeTo: On It Sec': ('TimeTo: On It Sec', 'mean'),
+    'TimeTo: Attended Sec': ('TimeTo: Attended Sec', 'mean'),
+}
+MONTH_ORDER = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September',
+               'October', 'November', 'December']
+TABLE_COLUMNS = ['Case #', 'Service', 'Inquiry', 'Requestor', 'Creation Timestamp', 'SME (On It)', 'On It Time',
+                 'Attendee', 'Attended Timestamp', 'Message Link', 'Status', 'Case Reason', 'TimeTo: On It (Raw)',
+                 'TimeTo: Attended (Raw)', 'Month', 'Day', 'Weekend?', 'Date Created', 'Working Hours?']
+
+
+class Recorder:
+    """Collects per-stage wall time, or per-stage peak memory under tracemalloc."""
+
+    def __init__(self, trace=False):
+        self.trace = trace
+        self.results = {}
+
+    @contextmanager
+    def stage(self, name):
+        if self.trace:
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - started
+        if self.trace:
+            self.results[name] = tracemalloc.get_traced_memory()[1] - start_memory
+        else:
+            self.results[name] = elapsed
+
+
+def vega_spec(chart):
+    # What st.altair_chart sends: the spec, with datasets as Arrow IPC
+    spec = vega_charts._convert_altair_to_vega_lite_spec(chart)
+    datasets = spec.pop('datasets')
+    return json.dumps(spec), datasets
+
+
+def plotly_spec(fig):
+    return plotly.io.to_json(fig, validate=False)
+
+
+def arrow_bytes(df):
+    return type_util.data_frame_to_bytes(df)
+
+
+def run_snapshot(path, rec):
+    with rec.stage('load_data'):
+        raw = CsvSheet(path).read()
+    with rec.stage('duration_parsing'):
+        for col in DURATION_COLUMNS:
+            parse_duration(raw[col])
+    with rec.stage('normalize'):
+        frame = normalize(raw)
+    files = SnapshotFiles('bench', os.path.dirname(path))
+    with rec.stage('snapshot_save'):
+        files.save(1, frame, datetime.now(timezone.utc))
+    with rec.stage('snapshot_load'):
+        files.load_latest()
+    with rec.stage('filter_index'):
+        engine = FilterEngine(frame)
+        cube = AggregateCube(frame)
+    return frame, engine, cube
+
+
+def sidebar_chain(view, engine):
+    """The sidebar state benchmarked for each view: the two busiest services, weekday, working hours."""
+    rows = engine.everything()
+    services = rows.options('Service')
+    rows = rows.isin('Service', services[:2])
+    if view == 'srr_a':
+        rows.options('Month')
+    else:
+        created = rows.column('Date Created')
+        end = created.max()
+        rows = rows.between('Date Created', end - pd.Timedelta(days=90), end)
+    rows = rows.isin('Weekend?', ['No'])
+    rows = rows.isin('Working Hours?', ['Yes'])
+    rows.options('SME (On It)')
+    return rows
+
+
+def run_view(view, engine, cube, rec):
+    out = {}
+    with rec.stage('filter_chain'):
+        rows = sidebar_chain(view, engine)
+        df_filtered = rows.frame()
+        df_inqueue = df_filtered[df_filtered['Status'] == 'In Queue']
+        df_inprogress = df_filtered[df_filtered['Status'] == 'In Progress']
+
+    with rec.stage('aggregations'):
+        out['on_it'] = format_hms(df_filtered['TimeTo: On It'].dt.total_seconds().mean())
+        out['attended'] = format_hms(df_filtered['TimeTo: Attended'].dt.total_seconds().mean())
+        if view == 'srr_m':
+            out['survey'] = (df_filtered['Survey'].mean(), df_filtered['Survey'].count())
+        agg_month = cube.rollup(rows, 'Month', MEANS).reset_index()
+        agg_service = cube.rollup(rows, 'Service', MEANS).reset_index()
+        for agg in (agg_month, agg_service):
+            agg['TimeTo_On_It_Minutes'] = agg['TimeTo: On It Sec'] / 60
+            agg['TimeTo_Attended_Minutes'] = agg['TimeTo: Attended Sec'] / 60
+            agg['TimeTo_On_It_HH:MM:SS'] = format_hms(agg['TimeTo: On It Sec'], precision=60)
+            agg['TimeTo_Attended_HH:MM:SS'] = format_hms(agg['TimeTo: Attended Sec'], precision=60)
+        grouped_aggs = {
+            'Avg_On_It_Sec': ('TimeTo: On It Sec', 'mean'),
+            'Avg_Attended_Sec': ('TimeTo: Attended Sec', 'mean'),
+            'Number_of_Interactions': ('SME (On It)', 'count'),
+        }
+        if view == 'srr_a':
+            service_counts = cube.rollup(rows, 'Service', {'Count': ('Service', 'size')}).reset_index()
+            service_counts = service_counts.sort_values('Count', ascending=False, kind='stable')
+            chart4_data = cube.rollup(rows, ['SME', 'Service'], {'count': ('SME', 'size')}).reset_index()
+            sme_order = chart4_data.groupby('SME', observed=True)['count'].sum().sort_values(ascending=False).index
+        else:
+            service_counts = cube.rollup(rows, 'Service', {'Count': ('Service', 'size')}, dropna=False).reset_index()
+            sme_counts = cube.rollup(rows, 'SME (On It)', {'Count': ('SME (On It)', 'size')}, dropna=False).reset_index()
+            case_counts = cube.rollup(rows, 'Case Reason', {'Service': ('Service', 'count')}).reset_index()
+            case_counts = case_counts.sort_values(by='Service', ascending=True)
+            grouped_aggs['Avg_Survey'] = ('Survey', 'mean')
+        df_grouped = cube.rollup(rows, 'SME (On It)', grouped_aggs).reset_index()
+        df_grouped['Total_Avg_Sec'] = df_grouped['Avg_On_It_Sec'] + df_grouped['Avg_Attended_Sec']
+        df_sorted = df_grouped.sort_values(by=['Total_Avg_Sec', 'Number_of_Interactions'], ascending=[True, False])
+        duration_columns(df_sorted, {'Avg_On_It_Sec': 'Avg_On_It', 'Avg_Attended_Sec': 'Avg_Attended'})
+
+    with rec.stage('pivots'):
+        pivot_df = cube.rollup(rows, ['Requestor', 'Service'], {'count': ('Service', 'size')})['count'].unstack(fill_value=0)
+        pivot_df.reset_index(inplace=True)
+        agg_month_long = agg_month.melt(id_vars=['Month'], value_vars=['TimeTo_On_It_Minutes', 'TimeTo_Attended_Minutes'],
+                                        var_name='Category', value_name='Minutes')
+        agg_service_long = agg_service.melt(id_vars=['Service'], value_vars=['TimeTo_On_It_Minutes', 'TimeTo_Attended_Minutes'],
+                                            var_name='Category', value_name='Minutes')
+        if view == 'srr_a':
+            data_chart4 = chart4_data.pivot_table(index='SME', columns='Service', values='count', fill_value=0, observed=True).reset_index()
+            data_chart4['Total'] = data_chart4.sum(axis=1)
+            data_chart4 = data_chart4.sort_values('Total', ascending=False).reset_index(drop=True)
+
+    with rec.stage('chart_specs'):
+        specs = [
+            vega_spec(alt.Chart(agg_month_long).mark_bar().encode(
+                x=alt.X('Month', sort=MONTH_ORDER), y=alt.Y('Minutes', stack='zero'), color='Category',
+                tooltip=['Month', 'Category', 'Minutes'])),
+            vega_spec(alt.Chart(agg_service_long).mark_bar().encode(
+                x='Service', y=alt.Y('Minutes', stack='zero'), color='Category',
+                tooltip=['Service', 'Category', 'Minutes'])),
+        ]
+        if view == 'srr_a':
+            specs.append(plotly_spec(px.bar(service_counts, x='Service', y='Count', color='Service', text='Count')))
+            specs.append(plotly_spec(px.bar(chart4_data, x='count', y='SME', color='Service', orientation='h',
+                                            category_orders={'SME': list(sme_order)})))
+        else:
+            specs.append(vega_spec(alt.Chart(service_counts).mark_bar().encode(
+                x='Service:N', y='Count:Q', tooltip=['Service:N', 'Count:Q'])))
+            specs.append(vega_spec(alt.Chart(sme_counts).mark_bar().encode(
+                y=alt.Y('SME (On It):N', sort='-x'), x='Count:Q', tooltip=['SME (On It):N', 'Count:Q'])))
+            specs.append(plotly_spec(px.pie(case_counts, values='Service', names='Case Reason')))
+
+    with rec.stage('serialization'):
+        tables = [df_inqueue, df_inprogress, df_filtered[TABLE_COLUMNS], agg_month, agg_service, df_sorted]
+        if view == 'srr_a':
+            tables.append(data_chart4)
+        payload = sum(len(arrow_bytes(table)) for table in tables)
+        payload += len(pivot_df.to_json(orient='records'))  # AgGrid ships its rows as JSON
+        payload += len(agg_month.to_csv(index=False).encode('utf-8'))  # download button
+
+    out['rows'] = len(rows)
+    out['payload_bytes'] = payload
+    return out
+
+
+def run_once(path, trace=False):
+    shared = Recorder(trace)
+    if trace:
+        tracemalloc.start()
+    try:
+        frame, engine, cube = run_snapshot(path, shared)
+        views = {}
+        for view in VIEWS:
+            rec = Recorder(trace)
+            info = run_view(view, engine, cube, rec)
+            views[view] = (rec.results, info)
+    finally:
+        if trace:
+            tracemalloc.stop()
+    return shared.results, views, len(frame), len(cube.cells)
+
+
+def bench_size(rows, repeat, seed):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_sheet(os.path.join(tmp, 'sheet.csv'), rows, seed)
+        csv_bytes = os.path.getsize(path)
+        runs = [run_once(path) for _ in range(repeat)]
+        memory = run_once(path, trace=True)
+
+    def best(pick):
+        return {stage: round(min(pick(run)[stage] for run in runs), 6) for stage in pick(runs[0])}
+
+    result = {
+        'rows': rows,
+        'csv_bytes': csv_bytes,
+        'canonical_rows': runs[0][2],
+        'cube_cells': runs[0][3],
+        'snapshot': {
+            'wall_seconds': best(lambda run: run[0]),
+            'peak_bytes': memory[0],
+        },
+        'views': {},
+    }
+    for view in VIEWS:
+        result['views'][view] = {
+            'wall_seconds': best(lambda run: run[1][view][0]),
+            'peak_bytes': memory[1][view][0],
+            'filtered_rows': runs[0][1][view][1]['rows'],
+            'payload_bytes': runs[0][1][view][1]['payload_bytes'],
+        }
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the JSON here instead of stdout')
+    args = parser.parse_args()
+    # pandas 1.5 deprecation noise from the view code (e.g. DataFrame.sum over mixed columns)
+    warnings.simplefilter('ignore', FutureWarning)
+
+    results = {
+        'benchmark': 'pipeline',
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'sizes': [bench_size(rows, args.repeat, args.seed) for rows in args.rows],
+    }
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+"""Server threads, CPU and traffic for N open dashboard sessions, before and after the snapshot scheduler.
+
+Starts a real `streamlit run` server per refresh model, on a small app that reads
+one SnapshotStore (srr_store.py) backed by a synthetic sheet (benchmarks/synthetic.py),
+and connects N websocket sessions to it:
+
+* before: the script ends in the old countdown_timer loop, which pins a script
+  thread per session, sleeping one second and sending a sidebar delta per tick.
+* after: the script ends with srr_ui.countdown and srr_ui.watch_snapshot. Each
+  session's watch_snapshot fragment is rerun on the interval of the server's
+  auto_rerun message, as the browser does: just after the store's next publish.
+
+Once every session has rendered, the server process's threads and CPU time
+(sampled from /proc, so Linux only) and the messages the sessions receive are measured
+for --seconds. --refresh sets the store's fetch interval; with the default 120 s
+no snapshot is published during a 20 s window. Use e.g. --refresh 20 --seconds 60
+to measure the publishes, and the fragment and app reruns they cause, too.
+
+Usage: python benchmarks/bench_sessions.py [--sessions 50] [--seconds 20] [--rows 10000] [--refresh 120]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from tornado.websocket import websocket_connect
+
+from synthetic import write_sheet
+
+# Both apps read the same store; only the end of the script differs
+APP_HEADER = """
+import os
+import time
+import streamlit as st
+import srr_store
+from srr_data import CsvSheet
+srr_store.sheet_source = lambda source="csv": CsvSheet(os.environ["SRR_BENCH_SHEET"])
+store = srr_store.get_store("csv")
+store.interval = float(os.environ["SRR_BENCH_REFRESH"])
+snapshot = srr_store.current_snapshot("csv")
+st.write(f"{len(snapshot.frame)} cases, snapshot v{snapshot.version}")
+"""
+
+APPS = {
+    "before": APP_HEADER + """
+def countdown_timer(duration):
+    countdown_seconds = duration
+    sidebar_html = st.sidebar.empty()
+    sidebar_html.markdown("<p style='color:red;'>Time to refresh: 02:00</p>", unsafe_allow_html=True)
+    while countdown_seconds:
+        mins, secs = divmod(countdown_seconds, 60)
+        sidebar_html.markdown(f"<p style='color:red;'>Time to refresh: {mins:02d}:{secs:02d}</p>", unsafe_allow_html=True)
+        time.sleep(1)
+        countdown_seconds -= 1
+    sidebar_html.markdown("<p style='color:red;'>Refreshing...</p>", unsafe_allow_html=True)
+    st.rerun()
+
+countdown_timer(int(store.interval))
+""",
+    "after": APP_HEADER + """
+from srr_ui import countdown, watch_snapshot
+countdown("csv")
+watch_snapshot("csv", snapshot.version)
+""",
+}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def _proc_stats(pid):
+    """(threads, CPU seconds) of a process, from /proc."""
+    with open(f"/proc/{pid}/status") as f:
+        threads = next(int(line.split()[1]) for line in f if line.startswith("Threads:"))
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return threads, (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+class Server:
+    def __init__(self, app, workdir, sheet, refresh):
+        self.port = _free_port()
+        path = os.path.join(workdir, f"bench_{app}.py")
+        with open(path, "w") as f:
+            f.write(APPS[app])
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join([ROOT, os.environ.get("PYTHONPATH", "")]),
+               "SRR_BENCH_SHEET": sheet, "SRR_BENCH_REFRESH": str(refresh),
+               "SRR_SNAPSHOT_DIR": os.path.join(workdir, f"snapshots_{app}"),
+               "SRR_ARCHIVE_DIR": os.path.join(workdir, f"archive_{app}")}
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", path, "--server.port", str(self.port),
+             "--server.headless", "true", "--browser.gatherUsageStats", "false",
+             "--server.fileWatcherType", "none"],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def wait_ready(self, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                urllib.request.urlopen(f"http://localhost:{self.port}/_stcore/health", timeout=1)
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError("streamlit server did not start")
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait(10)
+
+
+class Session:
+    """One browser tab: runs the script, then reruns fragments as the frontend would."""
+
+    def __init__(self, port):
+        self.port = port
+        self.rendered = asyncio.Event()
+        self.messages = 0
+        self.bytes = 0
+        self.fragment_reruns = 0
+        self.page_script_hash = ""
+        self._timers = {}
+
+    async def run(self, stop):
+        ws = await websocket_connect(f"ws://localhost:{self.port}/_stcore/stream", max_message_size=2 ** 30)
+        await self._rerun(ws)
+        while not stop.is_set():
+            try:
+                data = await asyncio.wait_for(ws.read_message(), 1)
+            except asyncio.TimeoutError:
+                continue
+            if data is None:
+                break
+            self.messages += 1
+            self.bytes += len(data)
+            msg = ForwardMsg()
+            msg.ParseFromString(data)
+            kind = msg.WhichOneof("type")
+            if kind == "new_session":
+                self.page_script_hash = msg.new_session.page_script_hash
+            elif kind == "delta":
+                self.rendered.set()
+            elif kind == "auto_rerun" and msg.auto_rerun.fragment_id not in self._timers:
+                self._timers[msg.auto_rerun.fragment_id] = asyncio.create_task(
+                    self._auto_rerun(ws, msg.auto_rerun.fragment_id, msg.auto_rerun.interval, stop))
+        for timer in self._timers.values():
+            timer.cancel()
+        ws.close()
+
+    async def _rerun(self, ws, fragment_id=""):
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = self.page_script_hash
+        msg.rerun_script.fragment_id = fragment_id
+        await ws.write_message(msg.SerializeToString(), binary=True)
+
+    async def _auto_rerun(self, ws, fragment_id, interval, stop):
+        while not stop.is_set():
+            await asyncio.sleep(interval)
+            self.fragment_reruns += 1
+            await self._rerun(ws, fragment_id)
+
+
+async def _measure(server, sessions, seconds):
+    stop = asyncio.Event()
+    clients = [Session(server.port) for _ in range(sessions)]
+    idle_threads, _ = _proc_stats(server.process.pid)
+    tasks = [asyncio.create_task(client.run(stop)) for client in clients]
+    await asyncio.wait_for(asyncio.gather(*(client.rendered.wait() for client in clients)), 120)
+    await asyncio.sleep(2)  # let the first runs finish
+
+    messages = sum(client.messages for client in clients)
+    sent = sum(client.bytes for client in clients)
+    reruns = sum(client.fragment_reruns for client in clients)
+    threads, cpu = [], _proc_stats(server.process.pid)[1]
+    started = time.monotonic()
+    while time.monotonic() - started < seconds:
+        threads.append(_proc_stats(server.process.pid)[0])
+        await asyncio.sleep(0.5)
+    elapsed = time.monotonic() - started
+    result = {
+        "server_threads_mean": round(sum(threads) / len(threads), 1),
+        "server_threads_max": max(threads),  # fragment reruns run on short-lived script threads
+        "idle_server_threads": idle_threads,
+        "cpu_seconds": round(_proc_stats(server.process.pid)[1] - cpu, 3),
+        "messages_per_second": round((sum(client.messages for client in clients) - messages) / elapsed, 2),
+        "bytes_per_second": round((sum(client.bytes for client in clients) - sent) / elapsed),
+        "fragment_reruns": sum(client.fragment_reruns for client in clients) - reruns,
+    }
+    stop.set()
+    await asyncio.gather(*tasks)
+    return result
+
+
+def run(app, sessions, seconds, rows, refresh):
+    with tempfile.TemporaryDirectory() as workdir:
+        sheet = write_sheet(os.path.join(workdir, "sheet.csv"), rows)
+        server = Server(app, workdir, sheet, refresh)
+        try:
+            server.wait_ready()
+            return asyncio.run(_measure(server, sessions, seconds))
+        finally:
+            server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--refresh", type=float, default=120)
+    args = parser.parse_args()
+    results = {
+        "sessions": args.sessions,
+        "seconds": args.seconds,
+        "rows": args.rows,
+        "refresh": args.refresh,
+        "before": run("before", args.sessions, args.seconds, args.rows, args.refresh),
+        "after": run("after", args.sessions, args.seconds, args.rows, args.refresh),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Synthetic "Response and Survey Form" sheets for the benchmarks.
+
+make_sheet(rows) returns a raw sheet with the same 31 columns, column order and
+cell formats as the published CSV export: timestamps as text, durations as
+"HH:MM:SS" (with blanks and a few malformed cells), open cases at the tail.
+The last three columns are the unnamed helper columns at the end of the sheet.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from srr_data import format_hms
+
+SHEET_HEADER = [
+    'Case #', 'Service', 'Inquiry', 'Requestor', 'Creation Timestamp', 'In process (On It SME)',
+    'On It Time', 'Attendee', 'Attended Timestamp', 'Message Link', 'Message Link 0',
+    'Message Link 1', 'Message Link 2', 'Status', 'Case Reason', 'AFI', 'AFI Comment', 'Article#',
+    'TimeTo: On It', 'TimeTo: Attended', 'Month', 'Day', 'Weekend?', 'Date Created',
+    'Working Hours?', 'Hour_Created', 'Survey', 'SME', 'Unnamed: 28', 'Unnamed: 29', 'Unnamed: 30',
+]
+
+SERVICES = ['VCC', 'AMC', 'Network', 'WFO', 'CRM']
+SERVICE_WEIGHTS = [0.4, 0.2, 0.15, 0.15, 0.1]
+CASE_REASONS = ['How-to', 'Configuration', 'Bug', 'Access', 'Outage', 'Other']
+
+
+def make_sheet(rows, seed=0, requestors=400, smes=25, days=365):
+    """Raw sheet of `rows` cases created over the last `days` days, oldest first."""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2024-01-01')
+    created = start + pd.to_timedelta(np.sort(rng.integers(0, days * 86400, rows)), unit='s')
+    on_it = rng.exponential(900, rows).astype(np.int64)
+    attended = on_it + rng.exponential(3 * 3600, rows).astype(np.int64)
+    on_it_at = created + pd.to_timedelta(on_it, unit='s')
+    attended_at = created + pd.to_timedelta(attended, unit='s')
+
+    # The newest cases are still open; nobody has attended them yet.
+    status = np.full(rows, 'Closed', dtype=object)
+    open_tail = max(1, rows // 200)
+    status[-open_tail:] = rng.choice(['In Queue', 'In Progress'], open_tail)
+    closed = status == 'Closed'
+
+    sme_names = np.array([f'SME {i:02d}' for i in range(smes)], dtype=object)
+    on_it_sme = sme_names[rng.integers(0, smes, rows)]
+    on_it_sme[status == 'In Queue'] = None
+
+    on_it_text = format_hms(on_it).to_numpy()
+    attended_text = format_hms(attended).to_numpy()
+    on_it_text[status == 'In Queue'] = None
+    attended_text[~closed] = None
+    attended_text[rng.random(rows) < 0.002] = '#VALUE!'
+
+    hour = created.hour.to_numpy()
+    weekend = created.dayofweek.to_numpy() >= 5
+    survey = rng.choice([1.0, 2.0, 3.0, 4.0, 5.0], rows, p=[0.05, 0.05, 0.1, 0.3, 0.5])
+    survey[(rng.random(rows) < 0.4) | ~closed] = np.nan
+    links = pd.Series(np.arange(rows)).map('https://five9.slack.com/archives/C0/p{:016d}'.format)
+
+    sheet = pd.DataFrame({
+        'Case #': np.arange(1, rows + 1),
+        'Service': rng.choice(SERVICES, rows, p=SERVICE_WEIGHTS),
+        'Inquiry': rng.choice(['Customer asking about routing', 'Agent cannot log in', 'Report is empty',
+                               'Call recording missing', 'Dashboard not loading'], rows),
+        'Requestor': pd.Series(rng.zipf(1.3, rows) % requestors).map('requestor{:03d}@five9.com'.format),
+        'Creation Timestamp': created.strftime('%m/%d/%Y %H:%M:%S'),
+        'In process (On It SME)': on_it_sme,
+        'On It Time': np.where(status == 'In Queue', None, on_it_at.strftime('%m/%d/%Y %H:%M:%S')),
+        'Attendee': np.where(closed, on_it_sme, None),
+        'Attended Timestamp': np.where(closed, attended_at.strftime('%m/%d/%Y %H:%M:%S'), None),
+        'Message Link': links,
+        'Message Link 0': None,
+        'Message Link 1': None,
+        'Message Link 2': None,
+        'Status': status,
+        'Case Reason': np.where(closed, rng.choice(CASE_REASONS, rows), None),
+        'AFI': np.where(rng.random(rows) < 0.1, 'Yes', None),
+        'AFI Comment': None,
+        'Article#': np.where(rng.random(rows) < 0.05, 'KB0012345', None),
+        'TimeTo: On It': on_it_text,
+        'TimeTo: Attended': attended_text,
+        'Month': created.month_name(),
+        'Day': created.day_name(),
+        'Weekend?': np.where(weekend, 'Yes', 'No'),
+        'Date Created': created.strftime('%m/%d/%Y'),
+        'Working Hours?': np.where(~weekend & (hour >= 6) & (hour < 15), 'Yes', 'No'),
+        'Hour_Created': hour,
+        'Survey': survey,
+        'SME': np.where(closed, on_it_sme, None),
+        'Unnamed: 28': None,
+        'Unnamed: 29': None,
+        'Unnamed: 30': None,
+    })
+    return sheet[SHEET_HEADER]
+
+
+def write_sheet(path, rows, seed=0):
+    """Write make_sheet(rows) as a CSV export and return the path."""
+    make_sheet(rows, seed).to_csv(path, index=False)
+    return path
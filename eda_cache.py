@@ -0,0 +1,229 @@
+import contextlib
+import hashlib
+import logging
+import os
+import pickle
+import shutil
+import stat
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+
+from eda_ingest import Upload, make_spill_dir
+
+# Content-addressed cache for the EDA tool. Uploads are fingerprinted by the SHA-256
+# of their bytes; the parsed Upload and its profiles are kept in a byte-bounded LRU
+# in memory and written through to a byte-bounded LRU on disk, so widget reruns and
+# re-uploads of the same file skip parsing and profiling, even after a restart. The
+# disk cache is unpickled, so its directory must be private to this user: one that
+# others can write to is never read (see private_dir).
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.environ.get("EDA_CACHE_DIR", os.path.join(
+    tempfile.gettempdir(), f"eda_cache-{os.getuid()}" if hasattr(os, "getuid") else "eda_cache"))
+MEMORY_BYTES = int(os.environ.get("EDA_CACHE_MEMORY_BYTES", 2**30))
+DISK_BYTES = int(os.environ.get("EDA_CACHE_DISK_BYTES", 4 * 2**30))
+HASH_BLOCK = 2**20
+# Bump when Upload or Profile change shape or how they are computed, so older cache entries are not used
+CACHE_FORMAT = 3
+
+
+def fingerprint(file):
+    """SHA-256 hex digest of an uploaded file's bytes; the file is left at position 0."""
+    digest = hashlib.sha256()
+    if hasattr(file, "getbuffer"):
+        digest.update(file.getbuffer())
+    else:
+        file.seek(0)
+        for block in iter(lambda: file.read(HASH_BLOCK), b""):
+            digest.update(block)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+class SizedLRUCache:
+    """LRU of values with a byte size each, evicting the least recently used beyond max_bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key][0]
+
+    def put(self, key, value, nbytes):
+        with self._lock:
+            if key in self._items:
+                self.nbytes -= self._items.pop(key)[1]
+            if nbytes > self.max_bytes:
+                return
+            self._items[key] = (value, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                self.nbytes -= self._items.popitem(last=False)[1][1]
+
+
+def private_dir(path):
+    """path, created with mode 0o700 if missing, or a new temporary directory if it is not ours alone.
+
+    An existing path must be a real directory owned by this user and closed to group and
+    others; anything else (say, a directory another local user created first) could hold
+    planted pickles.
+    """
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        info = os.lstat(path)
+        if not stat.S_ISDIR(info.st_mode):
+            raise NotADirectoryError(path)
+        if hasattr(os, "getuid") and (info.st_uid != os.getuid() or info.st_mode & 0o077):
+            raise PermissionError(f"{path} is not private to this user")
+        return path
+    except OSError as error:
+        fallback = tempfile.mkdtemp(prefix="eda_cache-")
+        logger.warning("Not using %s as the upload cache (%s); caching in %s for this process only", path, error, fallback)
+        return fallback
+
+
+def _link(source, target):
+    """Hard-link source to target (copy across filesystems): either name can be removed on its own."""
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def _entry_bytes(path):
+    return sum(item.stat().st_size for item in os.scandir(path) if item.is_file())
+
+
+class UploadCache:
+    """Parsed uploads and their profiles, keyed by upload_key(), in memory and on disk."""
+
+    def __init__(self, directory=CACHE_DIR, memory_bytes=MEMORY_BYTES, disk_bytes=DISK_BYTES):
+        self.directory = private_dir(directory)
+        self.disk_bytes = disk_bytes
+        self.memory = SizedLRUCache(memory_bytes)
+        self._disk_lock = threading.Lock()
+
+    def upload(self, key, read):
+        """Upload for key from memory, then disk, else read() and cache it."""
+        upload = self.memory.get(("upload", key))
+        if upload is None:
+            upload = self._read_upload(key)
+            if upload is None:
+                upload = read()
+                self._write_upload(key, upload)
+            self.memory.put(("upload", key), upload, upload.memory_bytes())
+        return upload
+
+    def profile(self, key, mode, compute):
+        """Profile of the upload for key in the given mode ("exact" or "approximate"), else compute() and cache it."""
+        profile = self.memory.get(("profile", key, mode))
+        if profile is None:
+            path = os.path.join(self.directory, key, f"profile-{mode}.pkl")
+            profile = self._load(path)
+            if profile is None:
+                profile = compute()
+                self._dump(profile, path)
+            self.memory.put(("profile", key, mode), profile, profile.memory_bytes())
+        return profile
+
+    def _load(self, path):
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            logger.warning("Ignoring unreadable cache file %s", path)
+            return None
+        with contextlib.suppress(OSError):
+            os.utime(os.path.dirname(path))  # the entry's mtime orders disk eviction
+        return value
+
+    def _dump(self, value, path):
+        if not os.path.isdir(os.path.dirname(path)):
+            return  # the upload itself was not cached (or has been evicted)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except OSError:
+            logger.warning("Could not cache %s", path)
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+            return
+        self._trim_disk()
+
+    def _read_upload(self, key):
+        entry = os.path.join(self.directory, key)
+        state = self._load(os.path.join(entry, "upload.pkl"))
+        if state is None:
+            return None
+        parts, spill_dir = [], None
+        if state["parts"]:
+            # The new upload gets its own links to the parts, so evicting the entry cannot break it
+            spill_dir = make_spill_dir()
+            try:
+                for name, start, count in state["parts"]:
+                    _link(os.path.join(entry, name), os.path.join(spill_dir, name))
+                    parts.append((os.path.join(spill_dir, name), start, count))
+            except OSError:
+                shutil.rmtree(spill_dir, ignore_errors=True)
+                return None
+        return Upload(state["name"], state["size"], state["columns"], state["rows"], state["head"], state["tail"],
+                      frame=state["frame"], parts=parts, spill_dir=spill_dir, compact=state["compact"])
+
+    def _write_upload(self, key, upload):
+        entry = os.path.join(self.directory, key)
+        tmp = os.path.join(self.directory, f".{key}.{uuid.uuid4().hex}")
+        state = {"name": upload.name, "size": upload.size, "columns": upload.columns, "rows": upload.rows,
+                 "head": upload.head, "tail": upload.tail, "frame": upload.frame, "compact": upload.compact,
+                 "parts": [(os.path.basename(path), start, count) for path, start, count in upload.parts]}
+        try:
+            os.makedirs(tmp)
+            for path, _, _ in upload.parts:
+                _link(path, os.path.join(tmp, os.path.basename(path)))
+            with open(os.path.join(tmp, "upload.pkl"), "wb") as f:
+                pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, entry)
+        except OSError:
+            # Also the case when another session cached the same upload first
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not os.path.isdir(entry):
+                logger.warning("Could not cache upload %s in %s", key, self.directory)
+            return
+        self._trim_disk()
+
+    def _trim_disk(self):
+        """Remove the least recently used entries until the cache fits in disk_bytes."""
+        with self._disk_lock:
+            try:
+                entries = [item for item in os.scandir(self.directory) if item.is_dir() and not item.name.startswith(".")]
+                sized = sorted((item.stat().st_mtime, _entry_bytes(item.path), item.path) for item in entries)
+            except OSError:
+                return
+            total = sum(nbytes for _, nbytes, _ in sized)
+            for _, nbytes, path in sized:
+                if total <= self.disk_bytes:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= nbytes
+
+
+def upload_key(digest, compact):
+    """Cache key of an upload with the given fingerprint, parsed with or without compact dtypes."""
+    return f"{digest}-{'compact' if compact else 'plain'}-v{CACHE_FORMAT}"
+
+
+# One cache per process, shared by every session
+upload_cache = UploadCache()
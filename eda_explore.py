@@ -0,0 +1,122 @@
+import contextlib
+import os
+import threading
+from collections import OrderedDict
+
+from pygwalker.api.streamlit import StreamlitRenderer
+from pygwalker.communications.streamlit_comm import streamlit_comm_map
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# PygWalker renderers for the EDA tool, one per upload, looked up by the upload's cache
+# key (eda_cache.upload_key) instead of by hashing the whole frame on every rerun.
+# pygwalker registers each renderer's comm endpoint in a module-level map, which keeps
+# the renderer and its data alive for the life of the server, so the registry
+# unregisters renderers it drops: once no session shows them, and beyond the budget.
+
+MAX_RENDERERS = int(os.environ.get("EDA_MAX_RENDERERS", 8))
+RENDERER_BYTES = int(os.environ.get("EDA_RENDERER_BYTES", 2**30))
+GW_CONFIG = "./gw_config.json"
+
+
+def create_renderer(key, dataframe):
+    # The key doubles as pygwalker's gid, which it would otherwise get by hashing the data
+    return StreamlitRenderer(dataframe, gid=key, spec=GW_CONFIG, spec_io_mode="rw")
+
+
+def dispose_renderer(renderer):
+    """Unregister the renderer's comm endpoint and cached HTML so it and its data can be freed."""
+    streamlit_comm_map.pop(str(renderer.walker.gid), None)
+    html_cache = StreamlitRenderer._get_html_with_params_str_cache
+    with html_cache.cache_lock or contextlib.nullcontext():
+        for cache_key in [cache_key for cache_key in html_cache.cache if cache_key[0] is renderer]:
+            html_cache.cache.pop(cache_key, None)
+
+
+def _session_is_active(session_id):
+    # Outside a Streamlit server (tests, scripts) there is nothing to check against
+    return not runtime.exists() or runtime.get_instance().is_active_session(session_id)
+
+
+class RendererRegistry:
+    """Renderers by key, with the sessions showing each; bounded by count and by data bytes."""
+
+    def __init__(self, max_renderers=MAX_RENDERERS, max_bytes=RENDERER_BYTES, dispose=dispose_renderer,
+                 is_active=_session_is_active):
+        self.max_renderers = max_renderers
+        self.max_bytes = max_bytes
+        self.dispose = dispose
+        self.is_active = is_active
+        self._entries = OrderedDict()  # key -> [renderer, data bytes, ids of the sessions showing it]
+        self._lock = threading.Lock()
+
+    def acquire(self, key, session_id, create):
+        """Renderer for key, shown in session_id in place of whatever it showed before.
+
+        create() returns (renderer, data bytes) and is only called when key has no renderer yet.
+        """
+        with self._lock:
+            self._release(session_id, keep=key)
+            if key not in self._entries:
+                renderer, nbytes = create()
+                self._entries[key] = [renderer, nbytes, set()]
+            entry = self._entries[key]
+            entry[2].add(session_id)
+            self._entries.move_to_end(key)
+            self._trim(keep=key)
+            return entry[0]
+
+    def release(self, session_id):
+        """The session no longer shows a renderer (e.g. its file was removed)."""
+        with self._lock:
+            self._release(session_id)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _release(self, session_id, keep=None):
+        for key, entry in list(self._entries.items()):
+            if key == keep:
+                continue
+            entry[2] = {holder for holder in entry[2] if holder != session_id and self.is_active(holder)}
+            if not entry[2]:
+                self._drop(key)
+
+    def _trim(self, keep):
+        while len(self._entries) > self.max_renderers or sum(entry[1] for entry in self._entries.values()) > self.max_bytes:
+            victim = next((key for key in self._entries if key != keep), None)
+            if victim is None:
+                break
+            self._drop(victim)
+
+    def _drop(self, key):
+        renderer = self._entries.pop(key)[0]
+        self.dispose(renderer)
+
+
+# One registry per process, shared by every session
+renderers = RendererRegistry()
+
+
+def _session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else ""
+
+
+def session_renderer(key, load_frame):
+    """Renderer for the upload with this cache key, for the current session.
+
+    load_frame() gives the frame to explore and is only called when the renderer is created.
+    """
+    session_id = _session_id()
+
+    def create():
+        dataframe = load_frame()
+        return create_renderer(key, dataframe), int(dataframe.memory_usage(index=True, deep=True).sum())
+
+    return renderers.acquire(key, session_id, create)
+
+
+def release_session_renderer():
+    """Let go of the current session's renderer, disposing of it if no other session shows it."""
+    renderers.release(_session_id())
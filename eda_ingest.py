@@ -0,0 +1,304 @@
+import os
+import shutil
+import tempfile
+import uuid
+import weakref
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_integer_dtype, union_categoricals
+
+# Chunked CSV ingestion for the EDA tool (EDA_App.py). The upload is parsed CHUNK_ROWS
+# rows at a time; repetitive string columns become categoricals as each chunk arrives
+# and integer columns are downcast at the end. Uploads above SPILL_BYTES are written
+# to Parquet, one part per chunk, instead of being held in memory: the profiler then
+# loads one column at a time, so only a single column has to fit in RAM.
+
+CHUNK_ROWS = 200_000
+SPILL_BYTES = int(os.environ.get("EDA_SPILL_BYTES", 100 * 2**20))
+SPILL_DIR = os.environ.get("EDA_SPILL_DIR", os.path.join(tempfile.gettempdir(), "eda_spill"))
+# A string column is stored as a categorical when it has at most this many distinct values per non-null value
+CATEGORY_MAX_RATIO = 0.5
+# Columns are first screened on this many leading rows, so unique-ish text is not factorized in full
+CATEGORY_PROBE_ROWS = 10_000
+# Rows handed to PygWalker for a spilled upload, spread evenly over the file
+SAMPLE_ROWS = 100_000
+# Parquet row group size of spill parts: take() reads only the groups holding the rows it wants
+ROW_GROUP_ROWS = 16_384
+PREVIEW_ROWS = 5
+
+
+def make_spill_dir():
+    """A new, empty directory under SPILL_DIR for one upload's Parquet parts."""
+    path = os.path.join(SPILL_DIR, uuid.uuid4().hex)
+    os.makedirs(path)
+    return path
+
+
+def _file_size(file):
+    size = getattr(file, "size", None)
+    if size is None:
+        position = file.tell()
+        size = file.seek(0, os.SEEK_END)
+        file.seek(position)
+    return size
+
+
+def _factorize_repetitive(values):
+    """(codes, uniques) if the values repeat enough to be worth a categorical, else None."""
+    codes, uniques = pd.factorize(values)
+    if len(uniques) > CATEGORY_MAX_RATIO * max(1, (codes >= 0).sum()):
+        return None
+    return codes, uniques
+
+
+def _categorize(series):
+    """series as a categorical if its strings repeat enough, else unchanged."""
+    if series.dtype != object:
+        return series
+    if len(series) > CATEGORY_PROBE_ROWS and _factorize_repetitive(series.iloc[:CATEGORY_PROBE_ROWS]) is None:
+        return series
+    factorized = _factorize_repetitive(series)
+    if factorized is None:
+        return series
+    codes, uniques = factorized
+    return pd.Series(pd.Categorical.from_codes(codes, categories=uniques), index=series.index, name=series.name)
+
+
+def _compact_chunk(chunk):
+    # One new frame rather than column assignments, which re-split the object block each time
+    return pd.DataFrame({col: _categorize(chunk[col]) for col in chunk.columns}, index=chunk.index, columns=chunk.columns)
+
+
+def _combine(pieces, compact=True):
+    """One column from its per-chunk pieces, unifying dtypes as a whole-file read_csv would."""
+    categorical = [isinstance(piece.dtype, pd.CategoricalDtype) for piece in pieces]
+    if all(categorical):
+        try:
+            values = union_categoricals(pieces, sort_categories=True)
+        except TypeError:  # categories of mixed types cannot be sorted
+            values = union_categoricals(pieces)
+        series = pd.Series(values, name=pieces[0].name)
+    else:
+        if any(categorical):
+            pieces = [piece.astype(object) for piece in pieces]
+        series = pd.concat(pieces, ignore_index=True)
+    if not compact:
+        return series
+    if is_integer_dtype(series.dtype) and isinstance(series.dtype, np.dtype):
+        # Floats stay float64: pandas accumulates float32 statistics in float32
+        series = pd.to_numeric(series, downcast="integer")
+    return _categorize(series)
+
+
+class Upload:
+    """A parsed CSV upload, held in memory or spilled to Parquet parts on disk."""
+
+    def __init__(self, name, size, columns, rows, head, tail, frame=None, parts=None, spill_dir=None, compact=True):
+        self.name = name
+        self.size = size
+        self.columns = columns
+        self.rows = rows
+        self.head = head
+        self.tail = tail
+        self.frame = frame
+        self.parts = parts or []  # (path, first row, row count)
+        self.spill_dir = spill_dir
+        self.compact = compact
+        if spill_dir:
+            self._cleanup = weakref.finalize(self, shutil.rmtree, spill_dir, True)
+
+    @property
+    def spilled(self):
+        return self.frame is None
+
+    @property
+    def shape(self):
+        return (self.rows, len(self.columns))
+
+    def memory_bytes(self):
+        """Approximate RAM held by the upload: the frame, or just the previews once spilled."""
+        held = [self.head, self.tail] if self.spilled else [self.frame, self.head, self.tail]
+        return int(sum(frame.memory_usage(index=True, deep=True).sum() for frame in held))
+
+    def column(self, name):
+        """One full column; for a spilled upload, read from every part of the spill."""
+        if not self.spilled:
+            return self.frame[name]
+        import pyarrow.parquet as pq
+        pieces = [pq.read_table(path, columns=[name]).column(0).to_pandas() for path, _, _ in self.parts]
+        for piece in pieces:
+            piece.name = name
+        return _combine(pieces, self.compact)
+
+    def iter_columns(self):
+        for name in self.columns:
+            yield self.column(name)
+
+    def column_pieces(self, name):
+        """One column as a series of CHUNK_ROWS-sized pieces (spill parts for a spilled upload)."""
+        if not self.spilled:
+            column = self.frame[name]
+            for start in range(0, len(column), CHUNK_ROWS):
+                yield column.iloc[start:start + CHUNK_ROWS]
+            return
+        import pyarrow.parquet as pq
+        for path, _, _ in self.parts:
+            piece = pq.read_table(path, columns=[name]).column(0).to_pandas()
+            piece.name = name
+            yield piece
+
+    def iter_column_pieces(self):
+        for name in self.columns:
+            yield name, self.column_pieces(name)
+
+    def take(self, positions):
+        """Rows at the given positions, in order, with their row numbers as the index."""
+        positions = np.asarray(positions, dtype=np.int64)
+        if not self.spilled:
+            return self.frame.iloc[positions]
+        import pyarrow.parquet as pq
+        pieces, requested = [], []
+        for path, start, count in self.parts:
+            in_part = np.flatnonzero((positions >= start) & (positions < start + count))
+            hits = positions[in_part]
+            if hits.size:
+                requested.append(in_part)
+                part = pq.ParquetFile(path)
+                sizes = [part.metadata.row_group(i).num_rows for i in range(part.num_row_groups)]
+                group_starts = np.cumsum([0] + sizes[:-1])
+                hit_groups = np.searchsorted(group_starts, hits - start, side="right") - 1
+                groups = np.unique(hit_groups)
+                # Row offsets within the groups read, which are concatenated in order
+                read_starts = np.cumsum([0] + [sizes[g] for g in groups[:-1]])
+                offsets = read_starts[np.searchsorted(groups, hit_groups)] + (hits - start - group_starts[hit_groups])
+                piece = part.read_row_groups(groups.tolist()).to_pandas().iloc[offsets]
+                piece.index = hits
+                pieces.append(piece)
+        if not pieces:
+            return self.head.iloc[:0]
+        # Back from part order to the order asked for
+        return pd.concat(pieces).iloc[np.argsort(np.concatenate(requested), kind="stable")]
+
+    def rows_where(self, mask):
+        """Rows where the boolean Series mask (one value per row) is True."""
+        return self.take(np.flatnonzero(mask.to_numpy(dtype=bool, na_value=False)))
+
+    def sample(self, n=SAMPLE_ROWS):
+        """The whole frame, or n rows spread evenly over a spilled upload."""
+        if not self.spilled:
+            return self.frame
+        step = max(1, -(-self.rows // n))
+        return self.take(np.arange(0, self.rows, step))
+
+    def close(self):
+        if self.spill_dir:
+            self._cleanup()
+
+
+def _reread_as_text(file, columns, chunk_rows, compact, read_csv_kwargs):
+    """The given columns, chunk by chunk, read as text: what read_csv makes of the whole file
+    for a column with numbers in some chunks and text in others."""
+    file.seek(0)
+    kwargs = {**read_csv_kwargs, "usecols": columns, "dtype": {col: str for col in columns}}
+    for chunk in pd.read_csv(file, chunksize=chunk_rows, **kwargs):
+        yield _compact_chunk(chunk) if compact else chunk
+
+
+def _write_part(chunk, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    try:
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Mixed-type object columns (e.g. numbers and text) are stored as text
+        chunk = chunk.copy()
+        for col in chunk.columns:
+            try:
+                pa.array(chunk[col], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                values = chunk[col].astype(object)
+                chunk[col] = values.where(values.isna(), values.astype(str))
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+    pq.write_table(table, path, row_group_size=ROW_GROUP_ROWS)
+
+
+def read_upload(file, name=None, compact=True, chunk_rows=CHUNK_ROWS, spill_bytes=SPILL_BYTES, progress=None,
+                **read_csv_kwargs):
+    """Parse a CSV upload chunk by chunk into an Upload.
+
+    With compact=True, repetitive string columns become categoricals and integer
+    columns are downcast. Uploads larger than spill_bytes go to Parquet parts under
+    SPILL_DIR, removed when the Upload is closed or garbage collected.
+    progress(fraction, text) is called after every chunk.
+    """
+    size = _file_size(file)
+    spill = size > spill_bytes
+    spill_dir = None
+    if spill:
+        spill_dir = make_spill_dir()
+
+    pieces, parts = {}, []
+    chunk_dtypes = {}  # column -> its dtype in each chunk, as parsed
+    head = tail = None
+    rows = 0
+    try:
+        for i, chunk in enumerate(pd.read_csv(file, chunksize=chunk_rows, **read_csv_kwargs)):
+            for col in chunk.columns:
+                chunk_dtypes.setdefault(col, []).append(chunk[col].dtype)
+            if compact:
+                chunk = _compact_chunk(chunk)
+            if head is None:
+                head = chunk.head(PREVIEW_ROWS)
+            tail = pd.concat([tail, chunk.tail(PREVIEW_ROWS)]).tail(PREVIEW_ROWS) if tail is not None else chunk.tail(PREVIEW_ROWS)
+            if spill:
+                path = os.path.join(spill_dir, f"part-{i:05d}.parquet")
+                _write_part(chunk, path)
+                parts.append((path, rows, len(chunk)))
+            else:
+                for col in chunk.columns:
+                    pieces.setdefault(col, []).append(chunk[col])
+            rows += len(chunk)
+            if progress:
+                progress(min(1.0, file.tell() / size) if size else 1.0, f"Read {rows:,} rows")
+
+        # Chunks parse a column on their own, so one whose text starts after the first
+        # chunk has numbers before it: read those columns again as text throughout
+        mixed = [col for col, dtypes in chunk_dtypes.items() if len({dtype == object for dtype in dtypes}) > 1]
+        if mixed and not spill:
+            for i, text in enumerate(_reread_as_text(file, mixed, chunk_rows, compact, read_csv_kwargs)):
+                for col in mixed:
+                    pieces[col][i] = text[col]
+        elif mixed:
+            import pyarrow.parquet as pq
+            head, tail = head.copy(), tail.copy()
+            text_tail = None
+            for i, text in enumerate(_reread_as_text(file, mixed, chunk_rows, compact, read_csv_kwargs)):
+                path = parts[i][0]
+                part = pq.read_table(path).to_pandas()
+                for col in mixed:
+                    part[col] = text[col].set_axis(part.index)
+                _write_part(part, path)
+                if i == 0:
+                    for col in mixed:
+                        head[col] = text[col].head(PREVIEW_ROWS)
+                text_tail = pd.concat([text_tail, text.tail(PREVIEW_ROWS)]).tail(PREVIEW_ROWS) if text_tail is not None else text.tail(PREVIEW_ROWS)
+            for col in mixed:
+                tail[col] = text_tail[col]
+    except BaseException:
+        if spill_dir:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+        raise
+
+    columns = head.columns
+    frame = None
+    if not spill:
+        frame = pd.DataFrame({col: _combine(pieces.pop(col), compact) for col in columns}, columns=columns)
+        head, tail = frame.head(PREVIEW_ROWS), frame.tail(PREVIEW_ROWS)
+    else:
+        # The previews come from the first and last chunks: give them the column's dtype over all chunks
+        widened = {col: pd.concat([pd.Series(dtype=dtype) for dtype in dtypes]).dtype
+                   for col, dtypes in chunk_dtypes.items() if col not in mixed and any(d != dtypes[0] for d in dtypes)}
+        head, tail = head.astype(widened), tail.astype(widened)
+    return Upload(name or getattr(file, "name", None), size, columns, rows, head, tail,
+                  frame=frame, parts=parts, spill_dir=spill_dir, compact=compact)
@@ -0,0 +1,134 @@
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from eda_ingest import CHUNK_ROWS, Upload, make_spill_dir
+from eda_profile import PERCENTILES, Profile, profile_column, profile_columns, sketch_column, sketch_columns
+
+# Parallel profiling for the EDA tool: columns are independent, so they are handed out
+# to a pool of worker processes and the per-column profiles gathered back in order.
+# Workers read the column data themselves rather than receiving pickled copies: a
+# spilled upload's columns from its Parquet parts, an in-memory frame's from an Arrow
+# IPC file written once and memory-mapped by every worker (zero-copy, shared through
+# the page cache). Only columns Arrow cannot store (mixed-type objects) are pickled.
+
+logger = logging.getLogger(__name__)
+
+PROFILE_WORKERS = int(os.environ.get("EDA_PROFILE_WORKERS", os.cpu_count() or 1))
+# Below this many cells the serial profiler finishes before workers would pay off
+PARALLEL_MIN_CELLS = int(os.environ.get("EDA_PARALLEL_MIN_CELLS", 2_000_000))
+SHARED_FILE = "frame.arrow"
+
+_pool = None  # (ProcessPoolExecutor, worker count)
+_pool_lock = threading.Lock()
+
+
+def _executor(workers):
+    """The process-wide worker pool; spawned, since forking a threaded server is unsafe."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool[1] != workers:
+            if _pool is not None:
+                _pool[0].shutdown(wait=False, cancel_futures=True)
+            _pool = (ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")), workers)
+        return _pool[0]
+
+
+def _discard_executor(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool[0] is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _series_pieces(series):
+    for start in range(0, len(series), CHUNK_ROWS):
+        yield series.iloc[start:start + CHUNK_ROWS]
+
+
+def _read_shared(path, name):
+    import pyarrow as pa
+    with pa.memory_map(path) as mapped:
+        series = pa.ipc.open_file(mapped).read_all().column(str(name)).to_pandas()
+    series.name = name
+    return series
+
+
+def _profile_worker(source, name, approximate, percentiles):
+    """Profile one column from its source: ("parts", parts, compact), ("arrow", path) or ("series", series)."""
+    if source[0] == "parts":
+        upload = Upload(None, 0, [name], 0, None, None, parts=source[1], compact=source[2])
+        if approximate:
+            return sketch_column(name, upload.column_pieces(name), percentiles)
+        return profile_column(upload.column(name), percentiles)
+    series = source[1] if source[0] == "series" else _read_shared(source[1], name)
+    if approximate:
+        return sketch_column(name, _series_pieces(series), percentiles)
+    return profile_column(series, percentiles)
+
+
+def _share_frame(frame, directory):
+    """Write frame's Arrow-compatible columns to an IPC file in directory; returns (path, names of the others)."""
+    import pyarrow as pa
+    arrays, names, others = [], [], []
+    for name in frame.columns:
+        try:
+            arrays.append(pa.Array.from_pandas(frame[name]))
+            names.append(str(name))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            others.append(name)
+    table = pa.Table.from_arrays(arrays, names=names)
+    path = os.path.join(directory, SHARED_FILE)
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return path, others
+
+
+def _profile_serially(upload, approximate, percentiles, progress):
+    if approximate:
+        return sketch_columns(upload.shape, upload.iter_column_pieces(), percentiles, progress)
+    return profile_columns(upload.shape, upload.iter_columns(), percentiles, progress)
+
+
+def profile_upload(upload, approximate=False, percentiles=PERCENTILES, progress=None, workers=PROFILE_WORKERS):
+    """Profile (or sketch, if approximate) every column of upload, across workers processes.
+
+    Small uploads, single-column uploads and workers <= 1 are profiled serially, as
+    profile_columns / sketch_columns do, and so is everything if the pool breaks (e.g. a
+    worker is killed for memory). progress(fraction, text) is called after each column.
+    """
+    rows, width = upload.shape
+    if workers <= 1 or width < 2 or rows * width < PARALLEL_MIN_CELLS:
+        return _profile_serially(upload, approximate, percentiles, progress)
+
+    shared_dir = None
+    try:
+        if upload.spilled:
+            sources = {name: ("parts", upload.parts, upload.compact) for name in upload.columns}
+        else:
+            shared_dir = make_spill_dir()
+            path, others = _share_frame(upload.frame, shared_dir)
+            sources = {name: ("series", upload.frame[name]) if name in others else ("arrow", path)
+                       for name in upload.columns}
+        pool = _executor(workers)
+        futures = {pool.submit(_profile_worker, sources[name], name, approximate, percentiles): i
+                   for i, name in enumerate(upload.columns)}
+        profiles = [None] * width
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                profiles[futures[future]] = future.result()
+                if progress:
+                    progress(done / width, f"{'Sketched' if approximate else 'Profiled'} {done} of {width} columns")
+        except BrokenProcessPool:
+            logger.warning("Profiling pool broke; profiling %s serially", upload.name)
+            _discard_executor(pool)
+            return _profile_serially(upload, approximate, percentiles, progress)
+    finally:
+        if shared_dir:
+            shutil.rmtree(shared_dir, ignore_errors=True)
+    return Profile(shape=upload.shape, columns=profiles)
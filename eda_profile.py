@@ -0,0 +1,300 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype, is_object_dtype
+from pandas.io.formats.format import format_percentiles
+
+from eda_sketch import CountMinSketch, HyperLogLog, KLLSketch, hash_values
+
+# Column profiler for the EDA tool (EDA_App.py). Everything perform_eda shows (summary
+# statistics, unique counts, nulls, duplicates, top values) comes out of one factorize
+# per column plus the numeric reductions, one column at a time, instead of a separate
+# full pass over the whole frame for each table. sketch_columns is the approximate
+# alternative: fixed-size sketches fed a chunk at a time, so the memory per column does
+# not grow with the row count.
+
+PERCENTILES = [0.25, 0.5, 0.75]
+TOP_VALUES = 10
+# Frequent-value candidates kept per column by sketch_column
+TOP_CANDIDATES = 64
+
+
+@dataclass
+class ColumnProfile:
+    """Statistics for one column. NaN where a statistic does not apply."""
+    name: object
+    dtype: object
+    count: int  # non-null values
+    nulls: int
+    distinct: int  # non-null distinct values, as Series.nunique()
+    duplicates: int  # as duplicated(subset=[col]).sum(): NaN counts as one value
+    top_values: pd.Series  # most frequent values and their counts, as value_counts().head(TOP_VALUES)
+    mean: float = np.nan
+    std: float = np.nan
+    min: object = np.nan
+    max: object = np.nan
+    quantiles: dict = field(default_factory=dict)
+    summary: pd.Series = None  # this column's part of describe(include='all')
+    # Row positions for the drill-downs: null rows, and the rows of duplicated values in
+    # sort_values order. None for approximate profiles, which keep no per-row state.
+    null_rows: np.ndarray = None
+    duplicate_rows: np.ndarray = None
+    # Error bounds of approximate statistics: "distinct", "duplicates" and "freq" (of
+    # the top values) in values, "percentile" as a fraction of the values. Empty if exact.
+    errors: dict = field(default_factory=dict)
+
+
+@dataclass
+class Profile:
+    """Per-column profiles of a frame, with the tables perform_eda displays."""
+    shape: tuple
+    columns: list
+
+    def names(self):
+        return pd.Index([col.name for col in self.columns])
+
+    def column(self, name):
+        return self.columns[self.names().get_loc(name)]
+
+    def dtypes(self):
+        """As pd.DataFrame(df.dtypes, columns=["Data Type"])."""
+        table = pd.DataFrame({"Data Type": pd.Series([col.dtype for col in self.columns], index=self.names(), dtype=object)})
+        table.index.name = "Column"
+        return table
+
+    def unique_counts(self):
+        """As df.nunique()."""
+        return pd.Series([col.distinct for col in self.columns], index=self.names(), dtype=np.int64)
+
+    def null_counts(self):
+        """As df.isnull().sum()."""
+        return pd.Series([col.nulls for col in self.columns], index=self.names(), dtype=np.int64)
+
+    def duplicate_counts(self):
+        """Per column, as df.duplicated(subset=[col]).sum()."""
+        return pd.Series([col.duplicates for col in self.columns], index=self.names(), dtype=np.int64)
+
+    def memory_bytes(self):
+        """Approximate RAM held by the profile: mostly the drill-down row positions."""
+        arrays = [rows for col in self.columns for rows in (col.null_rows, col.duplicate_rows) if rows is not None]
+        tables = [table for col in self.columns for table in (col.top_values, col.summary) if table is not None]
+        return int(sum(rows.nbytes for rows in arrays) + sum(table.memory_usage(index=True, deep=True) for table in tables))
+
+    @property
+    def approximate(self):
+        return any(col.errors for col in self.columns)
+
+    def error_bounds(self):
+        """Error bounds of the approximate statistics, one row per column."""
+        return pd.DataFrame([col.errors for col in self.columns], index=self.names())
+
+    def describe(self):
+        """As df.describe(include='all')."""
+        summaries = [col.summary for col in self.columns]
+        # Row order as pandas: shorter summaries (count, unique, top, freq) first
+        rows = []
+        for index in sorted((summary.index for summary in summaries), key=len):
+            rows += [row for row in index if row not in rows]
+        table = pd.concat([summary.reindex(rows, copy=False) for summary in summaries], axis=1, sort=False)
+        table.columns = self.names()
+        return table
+
+
+def _categorical_summary(profile):
+    if len(profile.top_values):
+        summary = [profile.count, profile.distinct, profile.top_values.index[0], profile.top_values.iloc[0]]
+        dtype = None
+    else:
+        summary = [profile.count, 0, np.nan, np.nan]
+        dtype = "object"
+    return pd.Series(summary, index=["count", "unique", "top", "freq"], name=profile.name, dtype=dtype)
+
+
+def _numeric_summary(profile):
+    return pd.Series(
+        [profile.count, profile.mean, profile.std, profile.min] + list(profile.quantiles.values()) + [profile.max],
+        index=["count", "mean", "std", "min"] + list(profile.quantiles) + ["max"],
+        name=profile.name, dtype=np.dtype("float"))
+
+
+def _row_indexes(codes, uniques, value_counts):
+    """Null row positions, and duplicated rows' positions ordered by value (NaN last), from factorize output."""
+    positions_dtype = np.int32 if len(codes) < 2**31 else np.int64
+    nulls = codes < 0
+    null_rows = np.flatnonzero(nulls).astype(positions_dtype)
+
+    # Code -1 (NaN) indexes the last count: NaNs are duplicates of one another, as in duplicated()
+    duplicated = np.append(value_counts, len(null_rows))[codes] > 1
+    rows = np.flatnonzero(duplicated).astype(positions_dtype)
+    # Only duplicated values need ranking, which spares sorting near-unique columns
+    repeated = np.flatnonzero(value_counts > 1)
+    try:
+        order = repeated[np.asarray(uniques[repeated].argsort())]
+    except TypeError:  # values of mixed types cannot be sorted: keep first appearance
+        order = repeated
+    # A value's rank in sorted order, in the smallest dtype so the stable sort is a radix sort
+    rank = np.zeros(len(uniques) + 1, dtype=np.min_scalar_type(len(order)))
+    rank[order] = np.arange(len(order))
+    rank[-1] = len(order)  # code -1: NaN sorts last
+    rows = rows[np.argsort(rank[codes[rows]], kind="stable")]
+    return null_rows, rows
+
+
+def row_indexes(series):
+    """(null rows, duplicated rows in sort_values order) of a column, as profile_column records them."""
+    codes, uniques = pd.factorize(series)
+    return _row_indexes(codes, uniques, np.bincount(codes[codes >= 0], minlength=len(uniques)))
+
+
+def profile_column(series, percentiles=PERCENTILES):
+    """Profile one column: a single factorize gives nulls, distinct and duplicate counts, top values and the drill-down rows."""
+    codes, uniques = pd.factorize(series)
+    present = codes[codes >= 0]
+    value_counts = np.bincount(present, minlength=len(uniques))
+    counts = pd.Series(value_counts, index=uniques)
+    # Same order as value_counts(): factorize keeps first appearance, so ties break the same way.
+    counts = counts.sort_values(ascending=False)
+
+    n = len(series)
+    nulls = n - len(present)
+    profile = ColumnProfile(
+        name=series.name,
+        dtype=series.dtype,
+        count=n - nulls,
+        nulls=nulls,
+        distinct=len(uniques),
+        duplicates=n - len(uniques) - (1 if nulls else 0),
+        top_values=counts.head(TOP_VALUES),
+    )
+    profile.null_rows, profile.duplicate_rows = _row_indexes(codes, uniques, value_counts)
+
+    plain_numpy = isinstance(series.dtype, np.dtype)
+    if (plain_numpy and is_bool_dtype(series.dtype)) or is_object_dtype(series.dtype):
+        profile.summary = _categorical_summary(profile)
+    elif plain_numpy and is_numeric_dtype(series.dtype) and series.dtype.kind != 'c':
+        profile.mean, profile.std = series.mean(), series.std()
+        profile.min, profile.max = series.min(), series.max()
+        profile.quantiles = dict(zip(format_percentiles(percentiles), series.quantile(percentiles).tolist()))
+        profile.summary = _numeric_summary(profile)
+    else:
+        # Datetimes, categoricals and extension dtypes: let pandas describe them
+        profile.summary = series.describe(percentiles=percentiles)
+    return profile
+
+
+def profile_columns(shape, columns, percentiles=PERCENTILES, progress=None):
+    """Profile columns as they are produced, e.g. loaded one by one from a spilled upload.
+
+    progress(fraction, text) is called after each column.
+    """
+    profiles = []
+    for series in columns:
+        profiles.append(profile_column(series, percentiles))
+        if progress:
+            progress(len(profiles) / shape[1], f"Profiled {len(profiles)} of {shape[1]} columns")
+    return Profile(shape=shape, columns=profiles)
+
+
+def profile_frame(dataframe, percentiles=PERCENTILES, progress=None):
+    """Profile every column of dataframe, one column at a time."""
+    columns = (dataframe.iloc[:, i] for i in range(dataframe.shape[1]))
+    return profile_columns(dataframe.shape, columns, percentiles, progress)
+
+
+def _common_dtype(dtypes):
+    """dtype of a column whose chunks have these dtypes, as pd.concat would give."""
+    if all(dtype == dtypes[0] for dtype in dtypes):
+        return dtypes[0]
+    if all(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes):
+        return pd.CategoricalDtype()
+    if all(isinstance(dtype, np.dtype) and dtype.kind in "iuf" for dtype in dtypes):
+        return np.result_type(*dtypes)
+    return np.dtype(object)
+
+
+def sketch_column(name, pieces, percentiles=PERCENTILES):
+    """Approximate profile of one column fed as pieces (chunks), in constant memory.
+
+    Counts, nulls, mean, std, min and max are exact. Distinct and duplicate counts come
+    from a HyperLogLog sketch and percentiles from a KLL sketch. The top values are
+    counted exactly from the piece they first show up among a piece's most frequent
+    values, plus a count-min estimate for the pieces before. profile.errors holds the
+    bound of each.
+    """
+    distinct, frequent, quantiles = HyperLogLog(), CountMinSketch(), KLLSketch()
+    # Top-value candidates: hash, a value, count, and the count-min overcount bound in it
+    candidates = pd.DataFrame({"hash": np.empty(0, dtype=np.uint64), "value": pd.Series(dtype=object),
+                               "count": np.empty(0, dtype=np.int64), "slack": np.empty(0)})
+    dtypes = []
+    n = count = 0
+    mean = m2 = 0.0
+    low = high = np.nan
+    for piece in pieces:
+        dtypes.append(piece.dtype)
+        n += len(piece)
+        present = piece.dropna()
+        hashes, first, counts = np.unique(hash_values(present), return_index=True, return_counts=True)
+
+        # Count the candidates seen in this piece, then add its most frequent values
+        # (first appearance breaks ties, as in value_counts) with what came before them
+        position = np.minimum(np.searchsorted(hashes, candidates["hash"].to_numpy()), max(0, len(hashes) - 1))
+        found = (hashes[position] == candidates["hash"].to_numpy()) if len(hashes) else np.zeros(len(candidates), bool)
+        candidates.loc[found, "count"] += counts[position[found]]
+        top = np.lexsort((first, -counts))[:TOP_CANDIDATES]
+        top = top[~np.isin(hashes[top], candidates["hash"].to_numpy())]
+        joining = pd.DataFrame({"hash": hashes[top], "value": present.iloc[first[top]].to_numpy(dtype=object),
+                                "count": frequent.estimate(hashes[top]) + counts[top],
+                                "slack": frequent.error()})
+        candidates = pd.concat([candidates, joining], ignore_index=True)
+        candidates = candidates.iloc[np.argsort(-candidates["count"].to_numpy(), kind="stable")[:TOP_CANDIDATES]]
+
+        distinct.update(hashes)
+        frequent.update(hashes, counts)
+        if is_numeric_dtype(piece.dtype) and not is_bool_dtype(piece.dtype) and len(present):
+            values = present.to_numpy(dtype=np.float64)
+            quantiles.update(values)
+            # Chan et al.'s pairwise update of the mean and sum of squared deviations
+            piece_mean = values.mean()
+            piece_m2 = np.square(values - piece_mean).sum()
+            delta = piece_mean - mean
+            total = count + len(values)
+            mean += delta * len(values) / total
+            m2 += piece_m2 + delta * delta * count * len(values) / total
+            low, high = np.nanmin([low, values.min()]), np.nanmax([high, values.max()])
+        count += len(present)
+
+    dtype = _common_dtype(dtypes) if dtypes else np.dtype(object)
+    top = candidates.head(TOP_VALUES)
+    nulls = n - count
+    unique = round(distinct.count())
+    profile = ColumnProfile(
+        name=name,
+        dtype=dtype,
+        count=count,
+        nulls=nulls,
+        distinct=unique,
+        duplicates=max(0, n - unique - (1 if nulls else 0)),
+        top_values=pd.Series(top["count"].to_numpy(dtype=np.int64), index=top["value"].to_numpy()),
+        errors={"distinct": distinct.error(), "duplicates": distinct.error(),
+                "freq": top["slack"].iloc[0] if len(top) else 0.0, "percentile": quantiles.rank_error()},
+    )
+    if isinstance(dtype, np.dtype) and dtype.kind in "iuf":
+        profile.mean = mean if count else np.nan
+        profile.std = np.sqrt(m2 / (count - 1)) if count > 1 else np.nan
+        profile.min, profile.max = low, high
+        profile.quantiles = dict(zip(format_percentiles(percentiles), quantiles.quantile(percentiles).tolist()))
+        profile.summary = _numeric_summary(profile)
+    else:
+        profile.summary = _categorical_summary(profile)
+    return profile
+
+
+def sketch_columns(shape, columns, percentiles=PERCENTILES, progress=None):
+    """Approximate profile of (name, pieces) columns; progress(fraction, text) is called after each."""
+    profiles = []
+    for name, pieces in columns:
+        profiles.append(sketch_column(name, pieces, percentiles))
+        if progress:
+            progress(len(profiles) / shape[1], f"Sketched {len(profiles)} of {shape[1]} columns")
+    return Profile(shape=shape, columns=profiles)
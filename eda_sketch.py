@@ -0,0 +1,171 @@
+import math
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+# Fixed-size sketches behind the EDA tool's approximate statistics (eda_profile.sketch_columns).
+# Each one is fed a column a chunk at a time and never grows with the row count:
+# HyperLogLog for distinct counts, a KLL sketch for percentiles and a count-min sketch
+# for the counts of the most frequent values. Each reports the error bound of its answer.
+
+HLL_PRECISION = 14  # 2**14 one-byte registers: about 0.8% standard error
+KLL_K = 200  # top-level compactor size: about 1.3% rank error
+KLL_MIN_CAPACITY = 8
+KLL_EXACT_VALUES = 8192  # kept as they are until there are more
+CMS_WIDTH = 2048
+CMS_DEPTH = 5
+# Confidence of the reported bounds: two standard errors for HyperLogLog; KLL and
+# count-min bounds hold with probability 0.99 and 1 - e**-CMS_DEPTH respectively.
+HLL_ERROR_SIGMAS = 2
+
+
+def hash_values(series):
+    """64-bit hashes of non-null values; equal values hash equally across chunks of any dtype."""
+    if is_numeric_dtype(series.dtype) and not is_bool_dtype(series.dtype):
+        # A column can be int in one chunk and float (with NaN) in the next
+        series = series.astype(np.float64)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return pd.util.hash_pandas_object(series, index=False).to_numpy()  # hashes each category once
+    # No factorizing first: most columns worth sketching have few repeats
+    return pd.util.hash_array(series.to_numpy(), categorize=False)
+
+
+class HyperLogLog:
+    """Distinct count of hashed values (Flajolet et al. 2007).
+
+    Counts exactly while there are few distinct values, as HyperLogLog++'s sparse
+    representation does, then switches to the registers.
+    """
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = None
+        self._exact = np.empty(0, dtype=np.uint64)
+
+    @property
+    def exact(self):
+        return self.registers is None
+
+    def update(self, hashes):
+        if self.exact:
+            self._exact = np.union1d(self._exact, hashes)
+            if len(self._exact) <= self.m // 2:
+                return
+            self.registers = np.zeros(self.m, dtype=np.uint8)
+            hashes, self._exact = self._exact, None
+        bits = 64 - self.precision
+        index = (hashes >> np.uint64(bits)).astype(np.intp)
+        rest = (hashes & np.uint64((1 << bits) - 1)).astype(np.float64)  # exact: bits < 53
+        # Position of the leftmost 1-bit in the remaining bits; frexp gives floor(log2) + 1
+        rank = (bits + 1 - np.frexp(rest)[1]).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def count(self):
+        if self.exact:
+            return float(len(self._exact))
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        zeros = np.count_nonzero(self.registers == 0)
+        if zeros and m * math.log(m / zeros) <= 3 * m:
+            # Linear counting: the raw estimate below is biased up to about 3m distinct values
+            return m * math.log(m / zeros)
+        return alpha * m * m / np.exp2(-self.registers.astype(np.float64)).sum()
+
+    def error(self):
+        """Absolute error bound of count()."""
+        if self.exact:
+            return 0.0
+        return HLL_ERROR_SIGMAS * 1.04 / math.sqrt(self.m) * self.count()
+
+
+class KLLSketch:
+    """Quantiles of a stream of floats (Karnin, Lang & Liberty 2016).
+
+    Level h holds items standing for 2**h values each. A full level is sorted and
+    every other item, from a random offset, moves up a level.
+    """
+
+    def __init__(self, k=KLL_K, seed=0):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def exact(self):
+        return len(self.levels) == 1
+
+    def _capacity(self, level):
+        if self.exact:
+            return KLL_EXACT_VALUES
+        depth = len(self.levels) - level - 1
+        return max(KLL_MIN_CAPACITY, math.ceil(self.k * (2 / 3) ** depth))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) <= self._capacity(level):
+                level += 1
+                continue
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(self.levels[level])
+            odd = len(items) % 2
+            self.levels[level] = items[:odd]
+            promoted = items[odd + self._rng.integers(2)::2]
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            # A new level lowers the capacity of those below it, so start over
+            level = 0
+
+    def quantile(self, q):
+        """Values at the quantiles q; with linear interpolation, as Series.quantile, while exact."""
+        if not self.n:
+            return np.full(len(q), np.nan)
+        if self.exact:
+            return np.quantile(self.levels[0], q)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        ranks = np.cumsum(weights[order])
+        position = np.searchsorted(ranks, np.asarray(q) * (self.n - 1), side="right")
+        return items[order][np.minimum(position, len(items) - 1)]
+
+    def rank_error(self):
+        """Bound on the error of quantile(), as a fraction of the values (99% confidence)."""
+        if self.exact:
+            return 0.0
+        return 2.296 / self.k ** 0.9723  # fitted bound for KLL sketches of size k
+
+
+class CountMinSketch:
+    """Counts of hashed values (Cormode & Muthukrishnan 2005); estimates never undercount."""
+
+    def __init__(self, width=CMS_WIDTH, depth=CMS_DEPTH):
+        self.width = width
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.n = 0
+
+    def _columns(self, hashes):
+        # One row index per hash function, from two halves of the 64-bit hash
+        low = hashes & np.uint64(0xFFFFFFFF)
+        high = (hashes >> np.uint64(32)) | np.uint64(1)
+        for row in range(len(self.table)):
+            yield ((low + np.uint64(row) * high) % np.uint64(self.width)).astype(np.intp)
+
+    def update(self, hashes, counts=None):
+        """Count hashes, each counts times (default once)."""
+        self.n += len(hashes) if counts is None else int(counts.sum())
+        for row, columns in zip(self.table, self._columns(hashes)):
+            row += np.bincount(columns, weights=counts, minlength=self.width).astype(np.int64)
+
+    def estimate(self, hashes):
+        return np.min([row[columns] for row, columns in zip(self.table, self._columns(hashes))], axis=0)
+
+    def error(self, n=None):
+        """Bound on the overcount of estimate() after n values (default all), with probability 1 - e**-depth."""
+        return math.e / self.width * (self.n if n is None else n)
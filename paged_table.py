@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Server-side paging for the apps' large tables. Sorting and filtering run on the
+# server over row positions; only the visible page of rows is materialized and sent
+# to the browser, so a table's payload stays the same size as the frame grows.
+
+PAGE_ROWS = 100
+NO_SORT = "(row order)"
+
+
+def page_slice(total, key, page_rows=PAGE_ROWS, label="Page"):
+    """Page number input for total rows (only shown when there is more than one page); returns the page's slice."""
+    pages = max(1, -(-total // page_rows))
+    page = 1
+    if pages > 1:
+        if st.session_state.get(key, 1) > pages:  # fewer rows than when the page was picked
+            st.session_state[key] = pages
+        page = st.number_input(f"{label} (of {pages:,})", min_value=1, max_value=pages, key=key)
+    start = min((page - 1) * page_rows, total)
+    return slice(start, min(start + page_rows, total))
+
+
+def page_caption(rows, total, unfiltered=None):
+    text = f"Rows {rows.start + 1:,}–{rows.stop:,} of {total:,}" if total else "No rows"
+    if unfiltered is not None and unfiltered != total:
+        text += f" (filtered from {unfiltered:,})"
+    st.caption(text)
+
+
+def _sorted_positions(column, positions, descending):
+    values = column.iloc[positions].reset_index(drop=True)
+    try:
+        order = values.sort_values(ascending=not descending, kind="stable", na_position="last").index
+    except TypeError:  # values of mixed types: order by their text
+        order = values.sort_values(ascending=not descending, kind="stable", na_position="last", key=lambda s: s.astype(str)).index
+    return positions[order.to_numpy()]
+
+
+def _matching_positions(frame, text, columns=None):
+    """Positions of rows where any text column (of columns, if given) contains text (case-insensitive)."""
+    mask = np.zeros(len(frame), dtype=bool)
+    for name in frame.columns if columns is None else columns:
+        column = frame[name]
+        if column.dtype == object or isinstance(column.dtype, pd.CategoricalDtype):
+            matches = column.astype(str).str.contains(text, case=False, regex=False) & column.notna()
+            mask |= matches.to_numpy(dtype=bool)
+    return np.flatnonzero(mask)
+
+
+def _shown(page, columns, index_offset):
+    if columns is not None:
+        page = page[columns]
+    if index_offset:
+        page = page.set_axis(page.index + index_offset, copy=False)
+    return page
+
+
+def paged_table(frame, key, page_rows=PAGE_ROWS, table=False, columns=None, index_offset=0, **dataframe_kwargs):
+    """Show frame a page at a time, with server-side sort and filter; key names its widgets.
+
+    Frames that fit on one page are shown whole, as st.dataframe (or st.table with
+    table=True) would. Only `columns` (all if None) are shown, sorted on and
+    filtered, with index_offset added to the index (1 for 1-based row numbers); both
+    are applied to the page, so a shared frame can be shown without copying it.
+    dataframe_kwargs go to st.dataframe.
+    """
+    if len(frame) <= page_rows:
+        frame = _shown(frame, columns, index_offset)
+        if table:
+            st.table(frame)
+        else:
+            st.dataframe(frame, **dataframe_kwargs)
+        return
+
+    sort_col, order_col, filter_col, page_col = st.columns([2, 1, 2, 1])
+    with sort_col:
+        sort_by = st.selectbox("Sort by", [NO_SORT] + list(frame.columns if columns is None else columns), key=f"{key}-sort")
+    with order_col:
+        descending = st.toggle("Descending", key=f"{key}-descending")
+    with filter_col:
+        text = st.text_input("Filter", key=f"{key}-filter", placeholder="Text in any column")
+
+    positions = _matching_positions(frame, text, columns) if text else np.arange(len(frame))
+    if sort_by != NO_SORT:
+        positions = _sorted_positions(frame[sort_by], positions, descending)
+    with page_col:
+        rows = page_slice(len(positions), key=f"{key}-page", page_rows=page_rows)
+
+    page = _shown(frame.iloc[positions[rows]], columns, index_offset)
+    if table:
+        st.table(page)
+    else:
+        st.dataframe(page, **dataframe_kwargs)
+    page_caption(rows, len(positions), unfiltered=len(frame))
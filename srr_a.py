@@ -1,18 +1,21 @@
 import streamlit as st
 import pandas as pd
-import time
-import numpy as np
 import altair as alt
 from streamlit_lottie import st_lottie
-import requests
-import json
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
-from st_aggrid.shared import JsCode
 import plotly.express as px
-import hmac
-from streamlit_gsheets import GSheetsConnection
-from datetime import datetime, timedelta
-import pytz
+from srr_data import format_hms, duration_columns
+from srr_store import current_snapshot, prefetch_snapshot, refresh_data
+from srr_archive import latest_month, month_options, months_named, service_options, snapshot_view
+from srr_ui import countdown, timings_panel, watch_snapshot
+from srr_assets import prefetch_lotties, FIVE9_LOGO
+from srr_filters import filter_engine
+from srr_cube import aggregate_cube
+from srr_charts import cached_chart, show_chart
+from srr_memory import memory_panel
+from srr_trace import trace_run
+from srr_auth import current_user, login, logout
+from paged_table import paged_table
 
 st.set_page_config(page_title="SRR Agent View", page_icon=":mag_right:", layout="wide")
 
@@ -25,9 +28,6 @@ hide_streamlit_style = """
         """
 st.markdown(hide_streamlit_style, unsafe_allow_html=True)
 
-#  Access usernames and passwords from secrets.toml
-credentials = st.secrets["credentials"]
-
 def login_form():
     """Form with widgets to collect user information"""
     with st.form("Credentials"):
@@ -36,107 +36,44 @@ def login_form():
         submit_button = st.form_submit_button("Log in")
 
         if submit_button:
-            if username_input in credentials and credentials[username_input] == password_input:
-                st.session_state.user_auth = True
-                st.session_state.username = username_input
-                st.session_state["password"] = password_input
+            error = login(username_input, password_input)
+            if error is None:
                 st.rerun()
                 
             else:
-                st.error("😕 User not known or password incorrect")
+                st.error(error)
                 
 
 def logout_button():
     if st.sidebar.button("Log Out"):
-        st.session_state.user_auth = False
-        st.session_state.username = ""
+        logout()
         st.rerun()
 
 
 
 def main():
-    if 'user_auth' not in st.session_state:
-        st.session_state.user_auth = False
-    if 'username' not in st.session_state:
-        st.session_state.username = ""
-
-    if not st.session_state.user_auth:
+    # Start the sheet fetch and the animation downloads together, while the login form or the page skeleton renders
+    prefetch_snapshot("gsheets")
+    lotties = prefetch_lotties([
+        "https://lottie.host/1df5f62e-c32f-47e8-aece-793c034b27e9/sQMtFYb9Rm.json",
+        "https://lottie.host/af0a6ccc-a8ac-4921-8564-5769d8e09d1e/4Czx1gna6U.json",
+        "https://lottie.host/910429d2-a0a4-4668-a4d4-ee831f9ccecd/yOKbdL2Yze.json",
+        "https://lottie.host/c5c6caea-922b-4b4e-b34a-41ecaafe2a13/mphMkSfOkR.json",
+        "https://lottie.host/2acdde4d-32d7-44a8-aa64-03e1aa191466/8EG5a8ToOQ.json",
+    ])
+
+    # A signed token from the login, checked without the password on every rerun
+    if current_user() is None:
         login_form()
     else:
         logout_button()
-
-        # Create functions for computation
-        # @st.cache_data(ttl=120, show_spinner=True)
-        # def load_data(url):
-        #     df = pd.read_csv(url)
-        #     df['Date Created'] = pd.to_datetime(df['Date Created'], errors='coerce')  # set 'Date Created' as datetime
-        #     df.rename(columns={'In process (On It SME)': 'SME (On It)'}, inplace=True)  # Renaming column
-        #     df['TimeTo: On It (Raw)'] = df['TimeTo: On It'].copy()
-        #     df['TimeTo: Attended (Raw)'] = df['TimeTo: Attended'].copy()
-        #     df.drop('Survey', axis=1, inplace=True)
-        #     return df
-        # Set timezone to America/Los_Angeles
-        timezone = pytz.timezone('America/Los_Angeles')
-
-
-        @st.cache_data(ttl=120, show_spinner=True)
-        def load_data(data):
-            df = data.copy()  # Make a copy to avoid modifying the original DataFrame
-            df['Date Created'] = pd.to_datetime(df['Date Created'], errors='coerce').dt.tz_localize(timezone)
-            df.rename(columns={'In process (On It SME)': 'SME (On It)'}, inplace=True)
-            df['TimeTo: On It (Raw)'] = df['TimeTo: On It'].copy()
-            df['TimeTo: Attended (Raw)'] = df['TimeTo: Attended'].copy()
-            df.drop('Survey', axis=1, inplace=True)
-            df.dropna(subset=['Service'], inplace=True)
-            df.rename(columns={'Case #': 'Case no'}, inplace=True)
-            # df = make_arrow_compatible(df) # Make data Arrow-compatible
-            return df
+        # Stage timings of this run (see srr_trace.py); each lap closes the stage since the previous one
+        run = trace_run("srr_a")
 
         def calculate_metrics(df):
             unique_case_count = df['Service'].count()
             return unique_case_count
 
-        def convert_to_seconds(time_str):
-            if pd.isnull(time_str):
-                return 0
-            try:
-                h, m, s = map(int, time_str.split(':'))
-                return h * 3600 + m * 60 + s
-            except ValueError:
-                return 0
-
-        def seconds_to_hms(seconds):
-            if np.isnan(seconds):
-                return "00:00:00"
-            sign = "-" if seconds < 0 else ""
-            seconds = abs(seconds)
-            hours = int(seconds // 3600)
-            minutes = int((seconds % 3600) // 60)
-            seconds = int(seconds % 60)
-            return f"{sign}{hours:02d}:{minutes:02d}:{seconds:02d}"
-
-        def minutes_to_hms(minutes):
-            hours = int(minutes // 60)
-            mins = int(minutes % 60)
-            secs = 0
-            return f"{hours:02d}:{mins:02d}:{secs:02d}"
-
-        conn = st.connection("gsheets", type=GSheetsConnection)
-        data = conn.read(worksheet="Response and Survey Form", usecols=list(range(31)))
-        df = load_data(data).copy()
-
-        def load_lottieurl(url: str):
-            r = requests.get(url)
-            if r.status_code != 200:
-                return None
-            return r.json()
-
-        lottie_globe = load_lottieurl("https://lottie.host/1df5f62e-c32f-47e8-aece-793c034b27e9/sQMtFYb9Rm.json")
-        lottie_clap = load_lottieurl("https://lottie.host/af0a6ccc-a8ac-4921-8564-5769d8e09d1e/4Czx1gna6U.json")
-        lottie_queuing = load_lottieurl("https://lottie.host/910429d2-a0a4-4668-a4d4-ee831f9ccecd/yOKbdL2Yze.json")
-        lottie_inprogress = load_lottieurl("https://lottie.host/c5c6caea-922b-4b4e-b34a-41ecaafe2a13/mphMkSfOkR.json")
-        lottie_chill = load_lottieurl("https://lottie.host/2acdde4d-32d7-44a8-aa64-03e1aa191466/8EG5a8ToOQ.json")
-
         # Define the color mapping for Service values
         color_map = {
             "VCC": "#0068C9",
@@ -154,7 +91,7 @@ def main():
         col1, col2 = st.columns([3, .350])
         with col2:
             if st.button('Refresh Data'):
-                st.cache_data.clear()
+                refresh_data("gsheets")
                 st.rerun()
 
         st.markdown(
@@ -162,45 +99,67 @@ def main():
             unsafe_allow_html=True
         )
 
-        st_lottie(lottie_globe, speed=1, reverse=False, loop=True, quality="low", height=200, width=200, key=None)
+        # Lottie animation, filled in once it has loaded
+        header_lottie = st.empty()
 
-        five9logo_url = "https://raw.githubusercontent.com/mackensey31712/srr/main/five9log1.png"
-        st.sidebar.image(five9logo_url, width=200)
+        st.sidebar.image(FIVE9_LOGO, width=200)
 
         st.sidebar.markdown('# Select a **Filter:**')
+        run.lap("skeleton")
 
-        with st.sidebar:
-            all_services_options = ['All'] + list(df['Service'].unique())
+        with st.spinner("Loading SRR data..."):
+            snapshot = current_snapshot("gsheets")
+        run.lap("snapshot", rows=len(snapshot.frame))
+
+        lottie_globe, lottie_clap, lottie_queuing, lottie_inprogress, lottie_chill = [future.result() for future in lotties]
+        run.lap("lottie")
+
+        with header_lottie:
+            st_lottie(lottie_globe, speed=1, reverse=False, loop=True, quality="low", height=200, width=200, key=None)
+
+        # The Service options span every month, so the selection survives changing the Month
+        service_slot = st.sidebar.container()
+        with service_slot:
+            all_services_options = ['All'] + service_options(snapshot)
             selected_service = st.multiselect('Service - (Multi-Select)', all_services_options, default='All')
 
+        # Opens on the latest month, so the first render loads no archived history
+        with st.sidebar:
+            month_choices = ['All'] + month_options(snapshot)
+            default_month = latest_month(snapshot)
+            selected_month = st.selectbox('Month', month_choices,
+                                          index=month_choices.index(default_month) if default_month in month_choices else 0)
+
+        # Only the archived months holding the selected Month are loaded (see srr_archive.py)
+        view = snapshot_view(snapshot, None if selected_month == 'All' else months_named(snapshot, [selected_month]))
+
+        # Filters narrow a precomputed bitmask selection; the frame is materialized once at the end
+        rows = filter_engine(view).everything()
+
         if 'All' in selected_service:
-            df_filtered = df
+            pass
         elif not selected_service:
-            st.sidebar.markdown("<h3 style='color: red;'>Displaying All Services</h1>", unsafe_allow_html=True)
-            df_filtered = df
+            service_slot.markdown("<h3 style='color: red;'>Displaying All Services</h1>", unsafe_allow_html=True)
         else:
-            df_filtered = df[df['Service'].isin(selected_service)]
-
-        with st.sidebar:
-            selected_month = st.selectbox('Month', ['All'] + list(df_filtered['Month'].unique()))
+            rows = rows.isin('Service', selected_service)
 
         if selected_month != 'All':
-            df_filtered = df_filtered[df_filtered['Month'] == selected_month]
+            rows = rows.isin('Month', [selected_month])
 
         with st.sidebar:
             selected_weekend = st.selectbox('Weekend?', ['All', 'Yes', 'No'])
 
         if selected_weekend != 'All':
-            df_filtered = df_filtered[df_filtered['Weekend?'] == selected_weekend]
+            rows = rows.isin('Weekend?', [selected_weekend])
 
         with st.sidebar:
             selected_working_hours = st.selectbox('Working Hours?', ['All', 'Yes', 'No'])
 
         if selected_working_hours != 'All':
-            df_filtered = df_filtered[df_filtered['Working Hours?'] == selected_working_hours]
+            rows = rows.isin('Working Hours?', [selected_working_hours])
 
         with st.sidebar:
-            all_sme_options = ['All'] + list(df_filtered['SME (On It)'].unique())
+            all_sme_options = ['All'] + rows.options('SME (On It)')
             selected_sme_on_it = st.multiselect('SME (On It) - (Multi-Select)', all_sme_options, default='All')
 
         if 'All' in selected_sme_on_it:
@@ -208,25 +167,33 @@ def main():
         elif not selected_sme_on_it:
             st.sidebar.markdown("<h3 style='color: red;'>Displaying All SMEs</h1>", unsafe_allow_html=True)
         else:
-            df_filtered = df_filtered[df_filtered['SME (On It)'].isin(selected_sme_on_it)]
+            rows = rows.isin('SME (On It)', selected_sme_on_it)
             st.sidebar.markdown("<h3 style='color: red;'>Displaying Selected SMEs</h1>", unsafe_allow_html=True)
 
-        df_inqueue = df_filtered[df_filtered['Status'] == 'In Queue']
-        df_inqueue = df_inqueue[['Case no', 'Requestor', 'Service', 'Creation Timestamp', 'Message Link']]
-        df_inprogress = df_filtered[df_filtered['Status'] == 'In Progress']
-        df_inprogress = df_inprogress[['Case no', 'Requestor', 'Service', 'Creation Timestamp', 'SME (On It)', 'TimeTo: On It', 'Message Link']]
-
-        df_filtered['TimeTo: On It Sec'] = df_filtered['TimeTo: On It'].apply(convert_to_seconds)
-        df_filtered['TimeTo: Attended Sec'] = df_filtered['TimeTo: Attended'].apply(convert_to_seconds)
-
-        df_filtered['TimeTo: On It'] = pd.to_timedelta(df_filtered['TimeTo: On It'])
-        df_filtered['TimeTo: Attended'] = pd.to_timedelta(df_filtered['TimeTo: Attended'])
+        df_filtered = rows.frame().rename(columns={'Case #': 'Case no'}, copy=False)
+        run.lap("filters", rows=len(df_filtered))
+        # Charts and summary tables are rolled up from the view's aggregate cube
+        cube = aggregate_cube(view)
+
+        # The open-case tables are built once per filter chain and shared by every session (see srr_filters.py)
+        def open_cases(status, columns):
+            def build(frame):
+                cases = frame.loc[frame['Status'] == status, columns]
+                cases = cases.rename(columns={'Case #': 'Case no', 'TimeTo: On It (Raw)': 'TimeTo: On It'})
+                cases['Case no'] = cases['Case no'].astype(str).str.replace(',', '')
+                cases = cases.reset_index(drop=True)
+                cases.index = cases.index + 1
+                return cases
+            return rows.derived(('open_cases', status), build)
+
+        df_inqueue = open_cases('In Queue', ['Case #', 'Requestor', 'Service', 'Creation Timestamp', 'Message Link'])
+        df_inprogress = open_cases('In Progress', ['Case #', 'Requestor', 'Service', 'Creation Timestamp', 'SME (On It)', 'TimeTo: On It (Raw)', 'Message Link'])
 
         overall_avg_on_it_sec = df_filtered['TimeTo: On It'].dt.total_seconds().mean()
         overall_avg_attended_sec = df_filtered['TimeTo: Attended'].dt.total_seconds().mean()
 
-        overall_avg_on_it_hms = seconds_to_hms(overall_avg_on_it_sec)
-        overall_avg_attended_hms = seconds_to_hms(overall_avg_attended_sec)
+        overall_avg_on_it_hms = format_hms(overall_avg_on_it_sec)
+        overall_avg_attended_hms = format_hms(overall_avg_attended_sec)
         unique_case_count = calculate_metrics(df_filtered)
 
         col1, col3, col5 = st.columns(3)
@@ -237,9 +204,6 @@ def main():
         with col5:
             st.metric("Overall Avg. TimeTo: Attended", overall_avg_attended_hms)
 
-        df_inqueue['Case no'] = df_inqueue['Case no'].astype(str).str.replace(',', '')
-        df_inprogress['Case no'] = df_inprogress['Case no'].astype(str).str.replace(',', '')
-
         in_queue_count = len(df_inqueue)
 
         if in_queue_count == 0:
@@ -249,7 +213,7 @@ def main():
             with col2:
                 st_lottie(lottie_clap, speed=1, height=100, width=200)
             with st.expander("Show Data", expanded=False):
-                st.dataframe(df_inqueue, use_container_width=True)
+                paged_table(df_inqueue, key="inqueue", use_container_width=True)
         else:
             col1, col2 = st.columns([0.3, 1.2])
             with col1:
@@ -257,9 +221,7 @@ def main():
             with col2:
                 st_lottie(lottie_queuing, speed=1, height=100, width=200)
             with st.expander("Show Data", expanded=False):
-                df_inqueue_display = df_inqueue.reset_index(drop=True)
-                df_inqueue_display.index = df_inqueue_display.index + 1
-                st.dataframe(df_inqueue_display, use_container_width=True)
+                paged_table(df_inqueue, key="inqueue", use_container_width=True)
 
         in_progress_count = len(df_inprogress)
         if in_progress_count == 0:
@@ -269,7 +231,7 @@ def main():
             with col2:
                 st_lottie(lottie_chill, speed=1, height=100, width=200)
             with st.expander("Show Data", expanded=False):
-                st.dataframe(df_inprogress, use_container_width=True)
+                paged_table(df_inprogress, key="inprogress", use_container_width=True)
         else:
             col1, col2 = st.columns([0.4, 1.2])
             with col1:
@@ -277,9 +239,7 @@ def main():
             with col2:
                 st.lottie(lottie_inprogress, speed=1, height=100, width=200)
             with st.expander("Show Data", expanded=False):
-                df_inprogress_display = df_inprogress.reset_index(drop=True)
-                df_inprogress_display.index = df_inprogress_display.index + 1
-                st.dataframe(df_inprogress_display, use_container_width=True)
+                paged_table(df_inprogress, key="inprogress", use_container_width=True)
 
         filtered_columns = ['Case no', 'Service', 'Inquiry', 'Requestor', 'Creation Timestamp',
             'SME (On It)', 'On It Time', 'Attendee', 'Attended Timestamp',
@@ -291,25 +251,25 @@ def main():
         # Display the filtered dataframe
         st.title('Data')
         with st.expander('Show Data', expanded=False):
-            df_display = df_filtered[filtered_columns].copy()
-            df_display.index = df_display.index + 1  # Adjust the index to start from 1
-            st.dataframe(df_display, use_container_width=True)
+            # Columns and the 1-based index are applied per page, so the shared frame is not copied
+            paged_table(df_filtered, key="data", columns=filtered_columns, index_offset=1, use_container_width=True)
 
-        agg_month = df_filtered.groupby('Month').agg({
-            'TimeTo: On It Sec': 'mean',
-            'TimeTo: Attended Sec': 'mean'
+        run.lap("metrics")
+        agg_month = cube.rollup(rows, 'Month', {
+            'TimeTo: On It Sec': ('TimeTo: On It Sec', 'mean'),
+            'TimeTo: Attended Sec': ('TimeTo: Attended Sec', 'mean')
         }).reset_index()
 
-        agg_month['TimeTo: On It'] = agg_month['TimeTo: On It Sec'].apply(seconds_to_hms)
-        agg_month['TimeTo: Attended'] = agg_month['TimeTo: Attended Sec'].apply(seconds_to_hms)
+        agg_month['TimeTo: On It'] = format_hms(agg_month['TimeTo: On It Sec'])
+        agg_month['TimeTo: Attended'] = format_hms(agg_month['TimeTo: Attended Sec'])
 
-        agg_service = df_filtered.groupby('Service').agg({
-            'TimeTo: On It Sec': 'mean',
-            'TimeTo: Attended Sec': 'mean'
+        agg_service = cube.rollup(rows, 'Service', {
+            'TimeTo: On It Sec': ('TimeTo: On It Sec', 'mean'),
+            'TimeTo: Attended Sec': ('TimeTo: Attended Sec', 'mean')
         }).reset_index()
 
-        agg_service['TimeTo: On It'] = agg_service['TimeTo: On It Sec'].apply(seconds_to_hms)
-        agg_service['TimeTo: Attended'] = agg_service['TimeTo: Attended Sec'].apply(seconds_to_hms)
+        agg_service['TimeTo: On It'] = format_hms(agg_service['TimeTo: On It Sec'])
+        agg_service['TimeTo: Attended'] = format_hms(agg_service['TimeTo: Attended Sec'])
 
         agg_month['TimeTo: On It Minutes'] = agg_month['TimeTo: On It Sec'] / 60
         agg_month['TimeTo: Attended Minutes'] = agg_month['TimeTo: Attended Sec'] / 60
@@ -328,7 +288,8 @@ def main():
 
         month_order = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November', 'December']
 
-        chart = alt.Chart(agg_month_long).mark_bar().encode(
+        # Chart specs are cached per snapshot and sidebar filters (see srr_charts.py)
+        chart = cached_chart("srr_a", view, rows, 'monthly_response_times', lambda: alt.Chart(agg_month_long).mark_bar().encode(
             x=alt.X('Month', sort=month_order),
             y=alt.Y('Minutes', stack='zero'),
             color='Category',
@@ -337,15 +298,15 @@ def main():
             title='Monthly Response Times',
             width=800,
             height=600
-        )
+        ))
 
-        agg_month['TimeTo_On_It_HH:MM:SS'] = agg_month['TimeTo_On_It_Minutes'].apply(minutes_to_hms)
-        agg_month['TimeTo_Attended_HH:MM:SS'] = agg_month['TimeTo_Attended_Minutes'].apply(minutes_to_hms)
+        agg_month['TimeTo_On_It_HH:MM:SS'] = format_hms(agg_month['TimeTo: On It Sec'], precision=60)
+        agg_month['TimeTo_Attended_HH:MM:SS'] = format_hms(agg_month['TimeTo: Attended Sec'], precision=60)
 
         csv = agg_month.to_csv(index=False).encode('utf-8')
 
         with col1:
-            st.write(chart)
+            show_chart(chart)
             with st.expander(':blue[Show Data]', expanded=False):
                 agg_month_filtered = agg_month[agg_month['Month'].isin(month_order)]
                 agg_month_filtered['Month'] = pd.Categorical(agg_month_filtered['Month'], categories=month_order, ordered=True)
@@ -363,7 +324,7 @@ def main():
                                             var_name='Category',
                                             value_name='Minutes')
 
-        chart2 = alt.Chart(agg_service_long).mark_bar().encode(
+        chart2 = cached_chart("srr_a", view, rows, 'group_response_times', lambda: alt.Chart(agg_service_long).mark_bar().encode(
             x='Service',
             y=alt.Y('Minutes', stack='zero'),
             color='Category',
@@ -372,12 +333,12 @@ def main():
             title='Group Response Times',
             width=800,
             height=600
-        )
+        ))
 
         with col5:
-            st.write(chart2)
-            agg_service['TimeTo_On_It_HH:MM:SS'] = agg_service['TimeTo_On_It_Minutes'].apply(minutes_to_hms)
-            agg_service['TimeTo_Attended_HH:MM:SS'] = agg_service['TimeTo_Attended_Minutes'].apply(minutes_to_hms)
+            show_chart(chart2)
+            agg_service['TimeTo_On_It_HH:MM:SS'] = format_hms(agg_service['TimeTo: On It Sec'], precision=60)
+            agg_service['TimeTo_Attended_HH:MM:SS'] = format_hms(agg_service['TimeTo: Attended Sec'], precision=60)
             with st.expander(':blue[Show Data]', expanded=False):
                 agg_service_display = agg_service[['Service', 'TimeTo_On_It_HH:MM:SS', 'TimeTo_Attended_HH:MM:SS']].reset_index(drop=True)
                 agg_service_display.index = agg_service_display.index + 1
@@ -385,24 +346,27 @@ def main():
                 csv = agg_service_display.to_csv(index=False).encode('utf-8')
                 st.download_button(':green[Download Data]', csv, file_name='group_response_times.csv', mime='text/csv', help="Click to download the Group Response Times in CSV format")
 
-        service_counts = df_filtered['Service'].value_counts().reset_index()
-        service_counts.columns = ['Service', 'Count']
+        service_counts = cube.rollup(rows, 'Service', {'Count': ('Service', 'size')}).reset_index()
+        service_counts = service_counts.sort_values('Count', ascending=False, kind='stable')
 
         # chart3 = px.bar(service_counts, x='Service', y='Count', color='Service', text='Count', title='Interaction Count')
         # chart3.update_traces(textposition='outside')
         # chart3.update_layout(uniformtext_minsize=8, uniformtext_mode='hide', xaxis_tickangle=-0)
         # chart3.update_layout(width=800, height=600)
 
-        chart3 = px.bar(service_counts, x='Service', y='Count', color='Service', text='Count', 
-                        title='Interaction Count',
-                        color_discrete_map=color_map)
-        chart3.update_traces(textposition='outside')
-        chart3.update_layout(uniformtext_minsize=8, uniformtext_mode='hide', xaxis_tickangle=-0)
-        chart3.update_layout(width=800, height=600)
+        def interaction_count_chart():
+            chart3 = px.bar(service_counts, x='Service', y='Count', color='Service', text='Count', 
+                            title='Interaction Count',
+                            color_discrete_map=color_map)
+            chart3.update_traces(textposition='outside')
+            chart3.update_layout(uniformtext_minsize=8, uniformtext_mode='hide', xaxis_tickangle=-0)
+            chart3.update_layout(width=800, height=600)
+            return chart3
 
+        chart3 = cached_chart("srr_a", view, rows, 'interaction_count', interaction_count_chart)
 
         with col1:
-            st.write(chart3)
+            show_chart(chart3)
 
         # chart4_data = df_filtered[df_filtered['SME'].notna()].groupby(['SME', 'Service']).size().reset_index(name='count')
 
@@ -435,10 +399,10 @@ def main():
 
 
         # Prepare data for the chart
-        chart4_data = df_filtered[df_filtered['SME'].notna()].groupby(['SME', 'Service']).size().reset_index(name='count')
+        chart4_data = cube.rollup(rows, ['SME', 'Service'], {'count': ('SME', 'size')}).reset_index()
 
         # Sum counts per SME and sort in descending order
-        sme_order = chart4_data.groupby('SME')['count'].sum().sort_values(ascending=False).index
+        sme_order = chart4_data.groupby('SME', observed=True)['count'].sum().sort_values(ascending=False).index
 
         # # Create the Plotly bar chart
         # fig = px.bar(chart4_data, x='count', y='SME', color='Service', 
@@ -455,35 +419,40 @@ def main():
         # )
 
 
-        fig = px.bar(chart4_data, x='count', y='SME', color='Service', 
-                    title='Interactions Handled by SME Attended', 
-                    orientation='h',
-                    category_orders={'SME': list(sme_order)},
-                    color_discrete_map=color_map)
+        def interactions_handled_chart():
+            fig = px.bar(chart4_data, x='count', y='SME', color='Service', 
+                        title='Interactions Handled by SME Attended', 
+                        orientation='h',
+                        category_orders={'SME': list(sme_order)},
+                        color_discrete_map=color_map)
 
-        fig.update_layout(
-            xaxis_title='Interaction Count',
-            yaxis_title='SME',
-            width=700,
-            height=600
-        )
+            fig.update_layout(
+                xaxis_title='Interaction Count',
+                yaxis_title='SME',
+                width=700,
+                height=600
+            )
+            return fig
+
+        fig = cached_chart("srr_a", view, rows, 'interactions_handled', interactions_handled_chart)
 
         # Prepare data for table
-        data_chart4 = chart4_data.pivot_table(index='SME', columns='Service', values='count', fill_value=0).reset_index()
+        data_chart4 = chart4_data.pivot_table(index='SME', columns='Service', values='count', fill_value=0, observed=True).reset_index()
         data_chart4['Total'] = data_chart4.sum(axis=1)
         data_chart4 = data_chart4.sort_values('Total', ascending=False).reset_index(drop=True)
         data_chart4.index = data_chart4.index + 1
 
         # Display the chart in your Streamlit app
         with col5:
-            st.plotly_chart(fig, use_container_width=True)
+            show_chart(fig, use_container_width=True)
             with st.expander("Show Data", expanded=False):
                 st.dataframe(data_chart4, use_container_width=True)     
         
 
+        run.lap("charts")
         st.subheader('Interaction Count by Requestor')
 
-        pivot_df = df_filtered.pivot_table(index='Requestor', columns='Service', aggfunc='size', fill_value=0)
+        pivot_df = cube.rollup(rows, ['Requestor', 'Service'], {'count': ('Service', 'size')})['count'].unstack(fill_value=0)
         pivot_df.reset_index(inplace=True)
 
         gb = GridOptionsBuilder.from_dataframe(pivot_df)
@@ -497,49 +466,35 @@ def main():
         csv = pivot_df.to_csv(index=False).encode('utf-8')
         st.download_button(':green[Download Data]', csv, file_name='interaction_count_by_requestor.csv', mime='text/csv', help="Download Interaction Count by Requestor Data in CSV format")
 
-        df_grouped = df_filtered.groupby('SME (On It)').agg(
-            Avg_On_It_Sec=pd.NamedAgg(column='TimeTo: On It Sec', aggfunc='mean'),
-            Avg_Attended_Sec=pd.NamedAgg(column='TimeTo: Attended Sec', aggfunc='mean'),
-            Number_of_Interactions=pd.NamedAgg(column='SME (On It)', aggfunc='count')
-        ).reset_index()
+        run.lap("requestors")
+        df_grouped = cube.rollup(rows, 'SME (On It)', {
+            'Avg_On_It_Sec': ('TimeTo: On It Sec', 'mean'),
+            'Avg_Attended_Sec': ('TimeTo: Attended Sec', 'mean'),
+            'Number_of_Interactions': ('SME (On It)', 'count')
+        }).reset_index()
 
         df_grouped['Total_Avg_Sec'] = df_grouped['Avg_On_It_Sec'] + df_grouped['Avg_Attended_Sec']
         df_sorted = df_grouped.sort_values(by=['Total_Avg_Sec', 'Number_of_Interactions'], ascending=[True, False])
-        df_sorted['Avg_On_It'] = df_sorted['Avg_On_It_Sec'].apply(seconds_to_hms)
-        df_sorted['Avg_Attended'] = df_sorted['Avg_Attended_Sec'].apply(seconds_to_hms)
+        duration_config = duration_columns(df_sorted, {'Avg_On_It_Sec': 'Avg_On_It', 'Avg_Attended_Sec': 'Avg_Attended'})
 
         df_sorted.rename(columns={'SME (On It)': 'SME'}, inplace=True)
 
         st.subheader("SME Summary Table")
         df_sorted_display = df_sorted[['SME', 'Avg_On_It', 'Avg_Attended', 'Number_of_Interactions']].reset_index(drop=True)
         df_sorted_display.index = df_sorted_display.index + 1
-        st.dataframe(df_sorted_display, use_container_width=True)
-
-        la_timezone = pytz.timezone('America/Los_Angeles')
-        la_now = datetime.now(la_timezone)
-        st.sidebar.markdown(f"**Last Updated:** {la_now.strftime('%Y-%m-%d, %H:%M:%S %Z%z')}")
-
-        refresh_rate = 120
-
-        def countdown_timer(duration):
-            countdown_seconds = duration
-
-            sidebar_html = st.sidebar.empty()
-            sidebar_html.markdown("<p style='color:red;'>Time to refresh: 02:00</p>", unsafe_allow_html=True)
-
-            while countdown_seconds:
-                mins, secs = divmod(countdown_seconds, 60)
-                timer_text = f"Time to refresh: {mins:02d}:{secs:02d}"
-                sidebar_html.markdown(f"<p style='color:red;'>{timer_text}</p>", unsafe_allow_html=True)
-                time.sleep(1)
-                countdown_seconds -= 1
-
-            sidebar_html.markdown("<p style='color:red;'>Refreshing...</p>", unsafe_allow_html=True)
-            st.cache_data.clear()
-            st.rerun()
-
-        while True:
-            countdown_timer(refresh_rate)
+        paged_table(df_sorted_display, key="sme_summary", use_container_width=True, column_config=duration_config)
+        run.lap("summary", rows=len(df_sorted_display))
+
+        st.sidebar.markdown(f"**Last Updated:** {snapshot.fetched_at.strftime('%Y-%m-%d, %H:%M:%S %Z%z')}")
+
+        # The countdown ticks in the browser; the app only reruns once a newer snapshot is published
+        countdown("gsheets")
+        watch_snapshot("gsheets", snapshot.version)
+        run.end(rows=len(df_filtered))
+        # Memory held by the shared caches and by each session: /_stcore/metrics, or the sidebar with ?debug=memory
+        memory_panel("gsheets")
+        # Stage timings: Prometheus text on SRR_METRICS_PORT, or the sidebar with ?debug=timings
+        timings_panel()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,220 @@
+import contextlib
+import dataclasses
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from srr_data import OPEN_STATUSES, TIMEZONE, concat_canonical
+from srr_persist import read_frame, write_frame
+
+# Month-partitioned archive of closed cases. After each refresh the store moves closed
+# cases of past months ("sealed" months, by 'Date Created') out of the published frame
+# into one Arrow file per month, rewritten only when that month's rows change. The
+# published snapshot keeps the hot rows (open cases, the current month, undated rows)
+# and the list of partitions; the views load only the months their date range or
+# Month filter selects (snapshot_view), so a current-month view never reads history.
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = os.environ.get("SRR_ARCHIVE_DIR", os.path.join(tempfile.gettempdir(), "srr_archive"))
+VIEW_CACHE_SIZE = 16  # every Month option of a year (13 months and 'All') and a few date ranges
+
+
+@dataclass(frozen=True)
+class Partition:
+    """One archived month: its closed cases, stored at path."""
+    month: str  # "YYYY-MM" of 'Date Created'
+    path: str
+    rows: int
+    start: pd.Timestamp  # first and last 'Date Created'
+    end: pd.Timestamp
+    months: tuple  # ('Month' value, first sheet row) pairs, for the Month filter options
+    fingerprint: str
+    services: tuple = ()  # ('Service' value, first sheet row) pairs, for the Service filter options
+
+    def to_json(self):
+        return {**dataclasses.asdict(self), "start": self.start.isoformat(), "end": self.end.isoformat(),
+                "months": [list(item) for item in self.months], "services": [list(item) for item in self.services]}
+
+    @classmethod
+    def from_json(cls, info):
+        return cls(**{**info, "start": pd.Timestamp(info["start"]), "end": pd.Timestamp(info["end"]),
+                      "months": tuple(tuple(item) for item in info["months"]),
+                      "services": tuple(tuple(item) for item in info.get("services", ()))})
+
+
+def _month_codes(dates):
+    """year * 12 + month - 1 per date, -1 for NaT."""
+    codes = dates.dt.year * 12 + dates.dt.month - 1
+    return codes.fillna(-1).to_numpy(np.int64)
+
+
+def _fingerprint(rows):
+    return hashlib.sha1(pd.util.hash_pandas_object(rows, index=True).to_numpy().tobytes()).hexdigest()[:16]
+
+
+def _first_rows(rows, col='Month'):
+    names = rows[col].astype(object).to_numpy()
+    first = pd.Series(rows.index, index=names).groupby(level=0).min()
+    return tuple((name, int(row)) for name, row in first.items())
+
+
+class CaseArchive:
+    """Sealed months of one sheet source, as <month>-<fingerprint>.arrow files in directory."""
+
+    def __init__(self, source, directory=ARCHIVE_DIR):
+        self.directory = os.path.join(directory, source)
+        self.partitions = {}  # month -> Partition, as of the last sync
+        self._previous = {}
+
+    def restore(self, partitions):
+        """Continue from the partitions of a snapshot recovered from disk, as if this process had synced it.
+
+        The next sync then keeps their files for the sessions still rendering that snapshot.
+        """
+        if not self.partitions:
+            self.partitions = {p.month: p for p in partitions}
+
+    def sync(self, frame, changed_from=0, now=None):
+        """Archive frame's sealed rows; returns (hot rows, partitions).
+
+        Only months with rows at sheet positions >= changed_from (everything after a
+        full reload), and months that were not archived yet or no longer have rows,
+        are looked at again.
+        """
+        now = now or datetime.now(TIMEZONE)
+        codes = _month_codes(frame['Date Created'])
+        closed = ~frame['Status'].isin(OPEN_STATUSES).to_numpy()
+        sealed = closed & (codes >= 0) & (codes < now.year * 12 + now.month - 1)
+
+        sealed_codes = codes[sealed]
+        months = {f"{code // 12:04d}-{code % 12 + 1:02d}": code for code in np.unique(sealed_codes)}
+        touched = set(np.unique(sealed_codes[frame.index.to_numpy()[sealed] >= changed_from]))
+        partitions = {}
+        for month, code in months.items():
+            known = self.partitions.get(month)
+            if known is not None and not known.services:  # archived before the Service options were recorded
+                known = None
+            if known is not None and code not in touched:
+                partitions[month] = known
+                continue
+            rows = frame[sealed & (codes == code)]
+            fingerprint = _fingerprint(rows)
+            if known is not None and known.fingerprint == fingerprint:
+                partitions[month] = known
+                continue
+            path = os.path.join(self.directory, f"{month}-{fingerprint}.arrow")
+            if not os.path.exists(path):  # else written by an earlier process
+                write_frame(path, rows, {"month": month})
+                logger.info("Archived %s (%d closed cases) to %s", month, len(rows), path)
+            dates = rows['Date Created']
+            partitions[month] = Partition(month, path, len(rows), dates.min(), dates.max(), _first_rows(rows), fingerprint,
+                                          _first_rows(rows, 'Service'))
+
+        self._previous, self.partitions = self.partitions, partitions
+        self._remove_unreferenced()
+        return frame[~sealed], tuple(partitions[month] for month in sorted(partitions))
+
+    def _remove_unreferenced(self):
+        # Files of the previous sync stay one more round, for sessions still rendering that snapshot
+        keep = {os.path.basename(p.path) for p in [*self.partitions.values(), *self._previous.values()]}
+        with contextlib.suppress(FileNotFoundError):
+            for name in os.listdir(self.directory):
+                if name.endswith(".arrow") and name not in keep:
+                    with contextlib.suppress(OSError):
+                        os.remove(os.path.join(self.directory, name))
+
+
+_views = []  # (snapshot, months, view), most recently used last
+_views_lock = threading.Lock()
+
+
+def snapshot_view(snapshot, months=None):
+    """The snapshot with the archived months in `months` (all if None) loaded back into its frame.
+
+    Memoized per (snapshot, months), so the view is the same object for every session and
+    the per-snapshot filter engine and aggregate cube are built once per view.
+    """
+    if not snapshot.partitions:
+        return snapshot
+    parts = tuple(p for p in snapshot.partitions if months is None or p.month in months)
+    key = tuple(p.month for p in parts)
+    with _views_lock:
+        for i, (seen, seen_key, view) in enumerate(_views):
+            if seen is snapshot and seen_key == key:
+                _views.append(_views.pop(i))
+                return view
+    frames = [read_frame(p.path)[0] for p in parts]
+    frame = concat_canonical(*frames, snapshot.frame).sort_index(kind='stable') if frames else snapshot.frame
+    view = dataclasses.replace(snapshot, frame=frame, partitions=())
+    with _views_lock:
+        for seen, seen_key, built in _views:
+            if seen is snapshot and seen_key == key:  # another session built it meanwhile
+                return built
+        _views.append((snapshot, key, view))
+        del _views[:-VIEW_CACHE_SIZE]
+    return view
+
+
+def cached_views():
+    """(snapshot, months, view) of the memoized views, least recently used first."""
+    with _views_lock:
+        return list(_views)
+
+
+def date_bounds(snapshot):
+    """Earliest and latest 'Date Created' across the hot rows and the archive."""
+    dates = snapshot.frame['Date Created']
+    starts = [dates.min()] + [p.start for p in snapshot.partitions]
+    ends = [dates.max()] + [p.end for p in snapshot.partitions]
+    return (min((d for d in starts if pd.notna(d)), default=pd.NaT),
+            max((d for d in ends if pd.notna(d)), default=pd.NaT))
+
+
+def months_between(snapshot, start, end):
+    """Archived months with cases between start and end."""
+    return [p.month for p in snapshot.partitions if p.end >= start and p.start <= end]
+
+
+def month_options(snapshot):
+    """'Month' values across the hot rows and the archive, in order of first appearance in the sheet."""
+    return _options(snapshot, 'Month', lambda p: p.months)
+
+
+def service_options(snapshot):
+    """'Service' values across the hot rows and the archive, in order of first appearance in the sheet.
+
+    Unlike the options of a view, these do not change with the date range or Month,
+    so a Service selection survives changing those filters.
+    """
+    return _options(snapshot, 'Service', lambda p: p.services)
+
+
+def _options(snapshot, col, archived):
+    present = snapshot.frame[col].notna().to_numpy()
+    first = {}
+    for name, row in [*_first_rows(snapshot.frame[present], col), *(item for p in snapshot.partitions for item in archived(p))]:
+        first[name] = min(row, first.get(name, row))
+    return sorted(first, key=first.get)
+
+
+def latest_month(snapshot):
+    """'Month' value of the latest case, hot or archived, for the views' default; None without dated cases."""
+    dates = snapshot.frame['Date Created']
+    newest = max(snapshot.partitions, key=lambda p: p.end, default=None)
+    if dates.notna().any() and (newest is None or dates.max() >= newest.end):
+        return snapshot.frame['Month'].loc[dates.idxmax()]
+    return max(newest.months, key=lambda item: item[1])[0] if newest else None
+
+
+def months_named(snapshot, names):
+    """Archived months holding cases whose 'Month' is one of names."""
+    names = set(names)
+    return [p.month for p in snapshot.partitions if names & {name for name, _ in p.months}]
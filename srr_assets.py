@@ -0,0 +1,172 @@
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from srr_trace import span
+
+# Static assets for the dashboards. Lottie animations are fetched at most once per
+# process and kept in a content-addressed disk cache, so reruns never wait on
+# lottie.host and the dashboards still render with no network. A script starts all
+# of its animations at once (prefetch_lotties) on a small thread pool sharing one
+# pooled HTTP session, so a cold start waits for the slowest download, not the sum.
+
+logger = logging.getLogger(__name__)
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSET_CACHE_DIR = os.environ.get("SRR_ASSET_CACHE", os.path.join(ASSET_DIR, ".asset_cache"))
+FETCH_TIMEOUT = 3  # seconds, for connecting and for each read
+FETCH_WORKERS = 8
+FETCH_RETRIES = 2  # for 429 and 5xx answers only: an unreachable or hung host costs one FETCH_TIMEOUT
+RETRY_SECONDS = 60  # how long an unreachable asset is served as BLANK_LOTTIE before retrying
+
+# Bundled with the repo instead of fetched from raw.githubusercontent.com on every rerun.
+FIVE9_LOGO = os.path.join(ASSET_DIR, "five9log1.png")
+
+# Shown when an animation is neither cached nor reachable: an empty 1x1 Lottie.
+BLANK_LOTTIE = {"v": "5.5.2", "fr": 30, "ip": 0, "op": 1, "w": 1, "h": 1, "layers": []}
+
+
+def _new_session():
+    retry = Retry(total=FETCH_RETRIES, connect=0, read=0, backoff_factor=0.2,
+                  status_forcelist=(429, 500, 502, 503, 504), raise_on_status=False)
+    adapter = HTTPAdapter(pool_maxsize=FETCH_WORKERS, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_session = _new_session()
+_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="srr-assets")
+_loaded = {}
+_failed = {}
+_pending = {}  # url -> Future of a load in flight
+_loaded_lock = threading.Lock()
+_index_lock = threading.Lock()  # the fetch threads each read, update and replace index.json
+
+
+def _index_path():
+    return os.path.join(ASSET_CACHE_DIR, "index.json")
+
+
+def _read_index():
+    try:
+        with open(_index_path()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _read_cached(url):
+    """Cached body for url, or None if missing or if the file no longer matches its hash."""
+    digest = _read_index().get(url)
+    if not digest:
+        return None
+    try:
+        with open(os.path.join(ASSET_CACHE_DIR, digest), "rb") as f:
+            body = f.read()
+    except OSError:
+        return None
+    return body if hashlib.sha256(body).hexdigest() == digest else None
+
+
+def _write_cached(url, body):
+    digest = hashlib.sha256(body).hexdigest()
+    try:
+        os.makedirs(ASSET_CACHE_DIR, exist_ok=True)
+        _write_atomic(os.path.join(ASSET_CACHE_DIR, digest), body)
+        with _index_lock:
+            index = _read_index()
+            index[url] = digest
+            _write_atomic(_index_path(), json.dumps(index, indent=2).encode())
+    except OSError:
+        logger.warning("Could not cache %s in %s", url, ASSET_CACHE_DIR)
+
+
+def _write_atomic(path, data):
+    # A unique temporary name, so writers in other processes never share (or truncate) it
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+        raise
+
+
+def fetch_asset(url, timeout=FETCH_TIMEOUT):
+    """Bytes for url: from the disk cache if present, otherwise downloaded and cached. None if unavailable."""
+    body = _read_cached(url)
+    if body is not None:
+        return body
+    try:
+        with span("assets", "asset_fetch"):
+            r = _session.get(url, timeout=timeout)
+    except requests.RequestException:
+        logger.warning("Could not fetch %s", url)
+        return None
+    if r.status_code != 200:
+        return None
+    _write_cached(url, r.content)
+    return r.content
+
+
+def _load(url):
+    try:
+        body = fetch_asset(url)
+        animation = json.loads(body) if body is not None else None
+    except Exception:
+        logger.exception("Could not load %s", url)
+        animation = None
+    with _loaded_lock:
+        _pending.pop(url, None)
+        if animation is None:
+            _failed[url] = time.monotonic()
+            return BLANK_LOTTIE
+        _failed.pop(url, None)
+        _loaded[url] = animation
+    return animation
+
+
+def _done(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def lottie_future(url):
+    """Future of the Lottie animation JSON for url; a load already in flight is shared, not repeated.
+
+    Resolves to BLANK_LOTTIE while offline with no cached copy, without retrying
+    for RETRY_SECONDS, so reruns do not each wait out the fetch timeout.
+    """
+    with _loaded_lock:
+        if url in _loaded:
+            return _done(_loaded[url])
+        if time.monotonic() - _failed.get(url, -RETRY_SECONDS) < RETRY_SECONDS:
+            return _done(BLANK_LOTTIE)
+        if url not in _pending:
+            _pending[url] = _pool.submit(_load, url)
+        return _pending[url]
+
+
+def prefetch_lotties(urls):
+    """Start loading every url at once; their futures, in the same order."""
+    return [lottie_future(url) for url in urls]
+
+
+def load_lottieurl(url: str):
+    """Lottie animation JSON for url, loaded once per process (see lottie_future)."""
+    return lottie_future(url).result()
@@ -0,0 +1,223 @@
+import base64
+import getpass
+import hashlib
+import hmac
+import logging
+import secrets
+import threading
+import time
+
+import streamlit as st
+
+# Logins for the agent view. The [credentials] table of secrets.toml is read once per
+# process into salted PBKDF2 hashes (entries may already be hashes, see hash_password;
+# plain passwords are hashed on load) and passwords are checked in constant time. A
+# successful login stores a signed token in the session, so reruns check an HMAC
+# instead of the password, and only a submitted login form pays for the hashing
+# (~0.1 s at HASH_ITERATIONS). Failed attempts back off per (user, client address)
+# pair, so a stranger cannot lock a user out, and more leniently per address, so
+# one client guessing many users is slowed down too. Attempts inside a back-off
+# are refused before any hashing, so a brute-force client cannot keep the script
+# threads busy.
+
+logger = logging.getLogger(__name__)
+
+HASH_ALGORITHM = "pbkdf2_sha256"
+HASH_ITERATIONS = 200_000  # ~0.1 s per login attempt; reruns check the token instead
+TOKEN_TTL_SECONDS = 12 * 3600
+FAILURE_WINDOW_SECONDS = 900  # a key's failures are forgotten this long after its last one
+FREE_PAIR_FAILURES = 3  # failures of one user from one address before backing off
+FREE_CLIENT_FAILURES = 20  # higher: users behind one proxy share an address
+BACKOFF_SECONDS = 1  # first wait once over the free failures, doubled by every further one
+MAX_PAIR_BACKOFF_SECONDS = 300
+MAX_CLIENT_BACKOFF_SECONDS = 30  # a proxy full of users only ever waits this long
+MAX_THROTTLED_KEYS = 10_000
+
+TOKEN_KEY = "auth_token"  # session state key of the signed token
+
+
+def hash_password(password, salt=None, iterations=HASH_ITERATIONS):
+    """"pbkdf2_sha256$<iterations>$<salt>$<hash>" for password, as accepted in [credentials]."""
+    salt = salt or secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return "$".join([HASH_ALGORITHM, str(iterations), base64.b64encode(salt).decode(), base64.b64encode(digest).decode()])
+
+
+def _parse_hash(value):
+    """(iterations, salt, digest) of a hash_password string, or None for anything else."""
+    parts = str(value).split("$")
+    if len(parts) != 4 or parts[0] != HASH_ALGORITHM or not parts[1].isdigit():
+        return None
+    try:
+        return int(parts[1]), base64.b64decode(parts[2], validate=True), base64.b64decode(parts[3], validate=True)
+    except ValueError:
+        return None
+
+
+class Credentials:
+    """Password hashes per username; verify() takes the same time for unknown users."""
+
+    def __init__(self, entries):
+        self._hashes = {}
+        plain = 0
+        for username, value in entries.items():
+            parsed = _parse_hash(value)
+            if parsed is None:
+                parsed = _parse_hash(hash_password(str(value)))
+                plain += 1
+            self._hashes[str(username)] = parsed
+        if plain:
+            logger.warning("%d SRR credentials are plain passwords; store hash_password() values instead", plain)
+        self._unknown = _parse_hash(hash_password(secrets.token_hex(16)))
+
+    def __contains__(self, username):
+        return username in self._hashes
+
+    def verify(self, username, password):
+        iterations, salt, digest = self._hashes.get(username, self._unknown)
+        candidate = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+        return hmac.compare_digest(candidate, digest) and username in self._hashes
+
+
+class TokenSigner:
+    """Signed "<username>.<issued at>" tokens, valid for ttl seconds."""
+
+    def __init__(self, key, ttl=TOKEN_TTL_SECONDS):
+        self.key = key
+        self.ttl = ttl
+
+    def _sign(self, payload):
+        return hmac.new(self.key, payload.encode(), hashlib.sha256).hexdigest()
+
+    def issue(self, username, now=None):
+        name = base64.urlsafe_b64encode(username.encode()).decode()
+        payload = f"{name}.{int(now or time.time())}"
+        return f"{payload}.{self._sign(payload)}"
+
+    def username(self, token, now=None):
+        """The token's username, or None if it is forged, malformed or expired."""
+        payload, _, signature = str(token).rpartition(".")
+        if not hmac.compare_digest(self._sign(payload), signature):
+            return None
+        name, _, issued = payload.partition(".")
+        if not issued.isdigit() or (now or time.time()) - int(issued) > self.ttl:
+            return None
+        return base64.urlsafe_b64decode(name).decode()
+
+
+class FailureThrottle:
+    """Back-off per key: after `free` failed attempts, each further one doubles the wait before the
+    next (BACKOFF_SECONDS up to max_delay). A key starts over `window` seconds after its last failure."""
+
+    def __init__(self, free, max_delay, window=FAILURE_WINDOW_SECONDS, max_keys=MAX_THROTTLED_KEYS):
+        self.free = free
+        self.max_delay = max_delay
+        self.window = window
+        self.max_keys = max_keys
+        self._failures = {}  # key -> (failures, time of the last one), least recently failed first
+        self._lock = threading.Lock()
+
+    def _delay(self, failures):
+        if failures < self.free:
+            return 0
+        return min(self.max_delay, BACKOFF_SECONDS * 2 ** min(failures - self.free, 32))
+
+    def retry_after(self, key, now=None):
+        """Seconds until key may try again (0 if it is not backing off)."""
+        now = now or time.monotonic()
+        with self._lock:
+            failures, last = self._failures.get(key, (0, now))
+            if last + self.window < now:
+                return 0
+            return max(0, last + self._delay(failures) - now)
+
+    def fail(self, key, now=None):
+        now = now or time.monotonic()
+        with self._lock:
+            failures, last = self._failures.pop(key, (0, now))
+            if last + self.window < now:
+                failures = 0
+            self._failures[key] = (failures + 1, now)
+            if len(self._failures) > self.max_keys:
+                self._prune(now)
+
+    def clear(self, key):
+        with self._lock:
+            self._failures.pop(key, None)
+
+    def _prune(self, now):
+        for key in [key for key, (_, last) in self._failures.items() if last + self.window < now]:
+            del self._failures[key]
+        while len(self._failures) > self.max_keys:  # all recent: forget the oldest keys
+            del self._failures[next(iter(self._failures))]
+
+
+class Authenticator:
+    def __init__(self, credentials, key):
+        self.credentials = credentials
+        self.tokens = TokenSigner(key)
+        self.pairs = FailureThrottle(FREE_PAIR_FAILURES, MAX_PAIR_BACKOFF_SECONDS)
+        self.clients = FailureThrottle(FREE_CLIENT_FAILURES, MAX_CLIENT_BACKOFF_SECONDS)
+
+    def login(self, username, password, client=None):
+        """(token, None) on success, else (None, seconds to wait or 0 for wrong credentials)."""
+        keys = [(self.pairs, (username, client))] + ([(self.clients, client)] if client else [])
+        wait = max(throttle.retry_after(key) for throttle, key in keys)
+        if wait:
+            return None, wait
+        if not self.credentials.verify(username, password):
+            for throttle, key in keys:
+                throttle.fail(key)
+            logger.info("Failed SRR login for %r from %s", username, client or "unknown client")
+            return None, 0
+        self.pairs.clear((username, client))
+        return self.tokens.issue(username), None
+
+    def username(self, token):
+        username = self.tokens.username(token)
+        return username if username in self.credentials else None
+
+
+@st.cache_resource
+def _authenticator():
+    # A fixed auth_key keeps tokens valid across restarts; otherwise they last for this process
+    key = st.secrets.get("auth_key")
+    key = key.encode() if key else secrets.token_bytes(32)
+    return Authenticator(Credentials(st.secrets["credentials"]), key)
+
+
+def _client_address():
+    """Address of this session's browser connection, or None outside `streamlit run`."""
+    try:
+        from streamlit import runtime
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        return runtime.get_instance().get_client(ctx.session_id).request.remote_ip
+    except Exception:
+        return None
+
+
+def login(username, password):
+    """Log this session in; None on success, else the message to show."""
+    token, wait = _authenticator().login(username, password, _client_address())
+    if token is None:
+        if wait:
+            return f"Too many failed attempts. Try again in {int(wait) + 1} seconds."
+        return "😕 User not known or password incorrect"
+    st.session_state[TOKEN_KEY] = token
+    return None
+
+
+def current_user():
+    """Username of this session's login, or None."""
+    token = st.session_state.get(TOKEN_KEY)
+    return _authenticator().username(token) if token else None
+
+
+def logout():
+    st.session_state.pop(TOKEN_KEY, None)
+
+
+if __name__ == "__main__":
+    # Prints a [credentials] value: python srr_auth.py
+    print(hash_password(getpass.getpass("Password: ")))
@@ -0,0 +1,49 @@
+import altair as alt
+import streamlit as st
+
+from srr_archive import VIEW_CACHE_SIZE
+from srr_filters import LRUCache
+from srr_store import per_snapshot
+
+# Chart specs for the dashboards. Charts are drawn from cube rollups (one row per bar
+# or slice, never the filtered cases), so a spec's size does not grow with the case
+# history. Each spec is serialized once per (snapshot, sidebar filters, chart) into a
+# plain dict and shared by every rerun and session with the same filters; only a new
+# snapshot or a new filter combination builds an Altair / Plotly figure again.
+
+CHART_CACHE_SIZE = 128
+SNAPSHOT_CACHE_SIZE = VIEW_CACHE_SIZE  # one per cached view, so switching Month options keeps the specs
+
+
+@per_snapshot(SNAPSHOT_CACHE_SIZE)
+def _chart_cache(snapshot):
+    return LRUCache(CHART_CACHE_SIZE)
+
+
+def chart_spec(chart):
+    """("vega_lite" | "plotly", spec dict) for an Altair chart or a Plotly figure."""
+    if isinstance(chart, alt.TopLevelMixin):
+        # Without Altair's default view size, as st.altair_chart renders it (alt.themes before Altair 5.5)
+        themes = alt.theme if hasattr(alt, "theme") else alt.themes
+        with themes.enable("none"):
+            return "vega_lite", chart.to_dict()
+    return "plotly", chart.to_dict()
+
+
+def cached_chart(app, snapshot, selection, name, build):
+    """Spec of `app`'s chart `name` for the rows in a sidebar Selection; build() makes the chart on a miss.
+
+    build must depend only on the snapshot and the selection: its result is shared
+    across sessions. The views draw different charts under the same names, hence
+    the app in the key. Treat the returned spec as read-only.
+    """
+    return _chart_cache(snapshot).get_or_create((app, name, selection.key), lambda: chart_spec(build()))
+
+
+def show_chart(spec, **kwargs):
+    """Render a cached_chart spec; kwargs go to st.vega_lite_chart / st.plotly_chart."""
+    kind, spec = spec
+    if kind == "vega_lite":
+        st.vega_lite_chart(spec=spec, **kwargs)
+    else:
+        st.plotly_chart(spec, **kwargs)
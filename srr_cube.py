@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_integer_dtype, is_numeric_dtype
+
+from srr_archive import VIEW_CACHE_SIZE
+from srr_filters import FilterEngine, LRUCache
+from srr_store import per_snapshot
+
+# Aggregate cube for the dashboard charts and tables. Each snapshot is rolled up
+# once into one cell per observed combination of CUBE_DIMENSIONS, holding the row
+# count and the sum and non-null count of each measure. The sidebar filters are
+# replayed on the cells, and every chart is a groupby over those few cells instead
+# of over the raw rows. Rollups are memoized per (filter chain, rollup), so reruns
+# and other sessions with the same sidebar state reuse them. Means are sum / count
+# with integer sums, so for the whole-second durations they are bit-for-bit the
+# groupby means.
+#
+# Only low-cardinality columns are dimensions, and datetimes are bucketed by day
+# ('Date Created' is a sheet date, so the date filter selects whole cells), which
+# keeps the cube a small fraction of the rows. Rollups by other columns, like
+# 'Requestor' or 'Case Reason', are grouped from the selected rows instead.
+
+CUBE_DIMENSIONS = ['Month', 'Service', 'SME (On It)', 'SME', 'Weekend?', 'Working Hours?', 'Date Created']
+CUBE_MEASURES = ['TimeTo: On It Sec', 'TimeTo: Attended Sec', 'Survey']
+
+ROLLUP_CACHE_SIZE = 256
+CUBE_CACHE_SIZE = VIEW_CACHE_SIZE  # one per cached view, so switching Month options does not rebuild them
+
+
+class AggregateCube:
+    """Counts and sums over every observed combination of the cube dimensions in one frame."""
+
+    def __init__(self, frame, dimensions=CUBE_DIMENSIONS, measures=CUBE_MEASURES):
+        self.dimensions = [col for col in dimensions if col in frame.columns]
+        self.measures = [col for col in measures if col in frame.columns and is_numeric_dtype(frame[col])]
+
+        # Group on integer codes so rows with missing dimension values keep their own cells
+        codes, uniques = {}, {}
+        for col in self.dimensions:
+            values = frame[col]
+            if is_datetime64_any_dtype(values.dtype):
+                values = values.dt.normalize()
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                codes[col] = values.cat.codes.to_numpy()
+            else:
+                codes[col], uniques[col] = pd.factorize(values, sort=True)
+        data = pd.DataFrame(codes)
+        data['count'] = np.ones(len(frame), dtype=np.int64)
+        for col in self.measures:
+            values = frame[col]
+            data[f'{col} (sum)'] = values.to_numpy(np.int64 if is_integer_dtype(values.dtype) else np.float64)
+            data[f'{col} (count)'] = values.notna().to_numpy(np.int64)
+        cells = data.groupby(self.dimensions, sort=False).sum().reset_index()
+
+        for col in self.dimensions:
+            if col in uniques:
+                cells[col] = pd.api.extensions.take(uniques[col].array, cells[col].to_numpy(), allow_fill=True)
+            else:
+                cells[col] = pd.Categorical.from_codes(cells[col], dtype=frame[col].dtype)
+        self.cells = cells
+        self.engine = FilterEngine(cells)
+        self._rollups = LRUCache(ROLLUP_CACHE_SIZE)
+
+    def slice(self, selection):
+        """Cells of the rows in a sidebar Selection (shared across sessions: treat as read-only)."""
+        return selection.on(self.engine).frame()
+
+    def rollup(self, selection, by, aggs, observed=True, dropna=True):
+        """rollup() of the cells in a sidebar Selection, memoized; the caller gets its own copy.
+
+        Rollups by columns that are not cube dimensions are grouped from the selected rows.
+        """
+        by = by if isinstance(by, str) else tuple(by)
+        key = (selection.key, by, tuple(aggs.items()), observed, dropna)
+        if set([by] if isinstance(by, str) else by) <= set(self.dimensions):
+            result = self._rollups.get_or_create(key, lambda: rollup(self.slice(selection), by, aggs, observed, dropna))
+        else:
+            result = selection.derived(('rollup',) + key[1:], lambda frame: group(frame, by, aggs, observed, dropna))
+        return result.copy()
+
+
+def rollup(cells, by, aggs, observed=True, dropna=True):
+    """Roll cube cells up to `by`, like frame.groupby(by, observed=observed, dropna=dropna).agg(...) over the rows.
+
+    aggs maps output column -> (column, func), with func one of 'size', 'count',
+    'sum' or 'mean'. Groups are sorted by key and, unless dropna=False, missing keys
+    are dropped, as in groupby.
+    """
+    keys = _group_keys(cells, by, dropna)
+    columns = {}
+    for name, (col, func) in aggs.items():
+        if func == 'size':
+            columns[name] = cells['count']
+        elif func == 'count':
+            if f'{col} (count)' in cells.columns:
+                columns[name] = cells[f'{col} (count)']
+            else:
+                columns[name] = cells['count'].where(cells[col].notna(), 0)
+        elif func in ('sum', 'mean'):
+            columns[f'{name} (sum)'] = cells[f'{col} (sum)']
+            columns[f'{name} (count)'] = cells[f'{col} (count)']
+        else:
+            raise ValueError(f"Unsupported cube aggregation {func!r}")
+    totals = pd.DataFrame(columns).groupby(keys, observed=observed, dropna=dropna).sum().sort_index()
+
+    result = pd.DataFrame(index=totals.index)
+    for name, (col, func) in aggs.items():
+        if func == 'mean':
+            result[name] = totals[f'{name} (sum)'] / totals[f'{name} (count)']
+        elif func == 'sum':
+            result[name] = totals[f'{name} (sum)']
+        else:
+            result[name] = totals[name]
+    return result
+
+
+def group(frame, by, aggs, observed=True, dropna=True):
+    """The same result as rollup(), grouped from rows instead of cube cells."""
+    grouped = frame.groupby(_group_keys(frame, by, dropna), observed=observed, dropna=dropna)
+    return grouped.agg(**{name: (col, func) for name, (col, func) in aggs.items()}).sort_index()
+
+
+def _group_keys(frame, by, dropna):
+    keys = [frame[col] for col in ([by] if isinstance(by, str) else by)]
+    if not dropna:
+        # pandas < 2 drops missing categorical keys even with dropna=False; group those by value
+        keys = [key.astype(object) if isinstance(key.dtype, pd.CategoricalDtype) else key for key in keys]
+    return keys
+
+
+@per_snapshot(CUBE_CACHE_SIZE)
+def aggregate_cube(snapshot):
+    """AggregateCube for a snapshot, built once per snapshot per process."""
+    return AggregateCube(snapshot.frame)
@@ -0,0 +1,409 @@
+import logging
+import streamlit as st
+import pandas as pd
+import numpy as np
+import pytz
+import threading
+from pandas.api.types import infer_dtype, is_float_dtype, union_categoricals
+
+# Shared ingestion for the SRR Agent View (srr_a.py) and Management View (srr_m.py).
+# Both views read the same "Response and Survey Form" sheet, so the rename, the raw
+# copies, the datetime parsing and the duration parsing all happen here, once per
+# sheet revision, and the views only slice the canonical frame (see srr_store.py).
+
+logger = logging.getLogger(__name__)
+
+SHEET_CSV_URL = 'https://docs.google.com/spreadsheets/d/e/2PACX-1vSQVnfH-edbXqAXxlCb2FrhxxpsOHJhtqKMYsHWxf5SyLVpAPTSIWQeIGrBAGa16dE4CA59o2wyz59G/pub?gid=0&single=true&output=csv'
+WORKSHEET = "Response and Survey Form"
+SHEET_COLUMNS = 31
+
+TIMEZONE = pytz.timezone('America/Los_Angeles')
+REFRESH_SECONDS = 120
+
+# Hand duration tables to st.dataframe as raw seconds (formatted by the renderer)
+# instead of building HH:MM:SS strings server-side.
+RAW_DURATION_TABLES = False
+
+DURATION_COLUMNS = ['TimeTo: On It', 'TimeTo: Attended']
+# Categoricals: group them with observed=True and sort_index() afterwards, since pandas 1.5
+# returns observed groups in order of appearance rather than sorted.
+CATEGORY_COLUMNS = ['Service', 'Status', 'Month', 'SME', 'SME (On It)']
+# Free-text and id columns: always strings (NaN if missing), whatever read_csv inferred
+# for a given download, so every snapshot has the same Arrow schema (see srr_persist.py)
+# and st.dataframe never has to repair mixed-type columns.
+TEXT_COLUMNS = ['Case #', 'Inquiry', 'Requestor', 'Creation Timestamp', 'On It Time', 'Attendee',
+                'Attended Timestamp', 'Message Link', 'Message Link 0', 'Message Link 1', 'Message Link 2',
+                'Case Reason', 'AFI', 'AFI Comment', 'Article#', 'Day', 'Weekend?', 'Working Hours?',
+                'TimeTo: On It (Raw)', 'TimeTo: Attended (Raw)']
+
+# Cases that can still change. Everything else is only ever appended to the sheet.
+OPEN_STATUSES = ['In Queue', 'In Progress']
+# Safety net for edits the incremental refresh cannot see (closed rows above the tail).
+FULL_RELOAD_EVERY = 30
+
+
+# "HH:MM:SS" as accepted by int() in convert_to_seconds: every field may carry a sign,
+# be padded with whitespace and group its digits with single underscores. Groups are
+# (sign, digits) for hours, minutes, seconds.
+_HMS_PATTERN = r'^\s*([+-]?)(\d+(?:_\d+)*)\s*:\s*([+-]?)(\d+(?:_\d+)*)\s*:\s*([+-]?)(\d+(?:_\d+)*)\s*$'
+_INT32_MAX = np.iinfo(np.int32).max
+
+
+def convert_to_seconds(time_str):
+    if pd.isnull(time_str):
+        return 0
+    try:
+        h, m, s = map(int, time_str.split(':'))
+        return h * 3600 + m * 60 + s
+    except ValueError:
+        return 0
+
+
+def _split_hms(text):
+    """Fast path for plain "H:MM:SS" values in a fixed-width unicode array.
+
+    Works on the character codes as an (n, width) matrix, so there is no
+    per-row Python. Returns (ok, hours, minutes, seconds); rows that are not
+    plain digits-and-colons (signs, padding, garbage) come back with ok=False.
+    """
+    width = text.dtype.itemsize // 4
+    codes = text.view(np.uint32).reshape(len(text), width)
+    digits = codes.astype(np.int64) - ord('0')
+    is_digit = (digits >= 0) & (digits <= 9)
+
+    length = (codes != 0).sum(axis=1)
+    rows = np.arange(len(text))
+
+    def char_at(offset):
+        return np.clip(length - offset, 0, width - 1)
+
+    ok = (length >= 7) & (length <= 15)
+    for offset in (1, 2, 4, 5):
+        ok &= is_digit[rows, char_at(offset)]
+    for offset in (3, 6):
+        ok &= codes[rows, char_at(offset)] == ord(':')
+
+    columns = np.arange(width)
+    hour_columns = columns < (length - 6)[:, None]
+    ok &= np.where(hour_columns, is_digit, True).all(axis=1)
+
+    place = np.clip((length - 7)[:, None] - columns, 0, 9)
+    hours = np.where(hour_columns & ok[:, None], digits * 10 ** place, 0).sum(axis=1)
+    minutes = np.where(ok, digits[rows, char_at(5)] * 10 + digits[rows, char_at(4)], 0)
+    seconds = np.where(ok, digits[rows, char_at(2)] * 10 + digits[rows, char_at(1)], 0)
+    return ok, hours, minutes, seconds
+
+
+def parse_duration(values):
+    """Vectorized convert_to_seconds and pd.to_timedelta over a column of "HH:MM:SS" strings.
+
+    Returns (seconds, timedelta) from a single parse. Seconds are int32 and match
+    convert_to_seconds, with missing or malformed values (including non-strings) as 0.
+    The timedelta is NaT for those values, as with pd.to_timedelta(errors='coerce');
+    a leading '-' negates the whole duration and signed minutes/seconds are NaT.
+    Durations beyond the int32 range of seconds are treated as malformed.
+    """
+    text = values.to_numpy(dtype=object, copy=True)
+    text[pd.isna(text)] = ''
+    text = text.astype('U')
+    if text.dtype.itemsize == 0:
+        text = text.astype('U1')
+
+    valid, hours, minutes, secs = _split_hms(text)
+    signs = np.ones((3, len(text)), dtype=np.int64)
+    unsigned_fields = valid.copy()
+
+    # Anything the fast path could not read (signs, padding, garbage) goes through the regex.
+    rest = np.flatnonzero(~valid & (text != ''))
+    if rest.size:
+        parts = pd.Series(text[rest]).str.extract(_HMS_PATTERN)
+        matched = parts[1].notna().to_numpy()
+        parts = parts[matched]
+        rest = rest[matched]
+        # Fields may have any number of digits here: read them as Python ints, so none overflows
+        fields = [parts[i].map(int).to_numpy(dtype=object) for i in (1, 3, 5)]
+        fits = (fields[0] * 3600 + fields[1] * 60 + fields[2] <= _INT32_MAX).astype(bool)
+        parts, rest = parts[fits], rest[fits]
+        valid[rest] = True
+        hours[rest], minutes[rest], secs[rest] = (field[fits].astype(np.int64) for field in fields)
+        for field, i in enumerate((0, 2, 4)):
+            signs[field, rest] = np.where(parts[i] == '-', -1, 1)
+        unsigned_fields[rest] = ((parts[2] == '') & (parts[4] == '')).to_numpy()
+
+    # Beyond int32 (about 68 years) a duration is a typo, not a time: malformed, like garbage
+    in_range = hours * 3600 + minutes * 60 + secs <= _INT32_MAX
+    signs[:, ~in_range] = 0
+    unsigned_fields &= in_range
+
+    seconds = signs[0] * hours * 3600 + signs[1] * minutes * 60 + signs[2] * secs
+
+    td = (signs[0] * (hours * 3600 + minutes * 60 + secs)).astype('timedelta64[s]')
+    td[~unsigned_fields] = np.timedelta64('NaT')
+
+    return (
+        pd.Series(seconds.astype(np.int32), index=values.index),
+        pd.Series(td.astype('timedelta64[ns]'), index=values.index),
+    )
+
+
+def parse_durations(df):
+    """Add the '<col> Sec' int32 columns and turn the 'HH:MM:SS' strings into timedeltas."""
+    for col in DURATION_COLUMNS:
+        df[f'{col} Sec'], df[col] = parse_duration(df[col])
+    return df
+
+
+def format_hms(seconds, precision=1):
+    """Format seconds as "HH:MM:SS" strings, for a whole column at once.
+
+    NaN formats as "00:00:00" and negative values get a leading "-". Values are
+    truncated to `precision` seconds (precision=60 drops the seconds, as the
+    old minutes_to_hms did). A scalar in gives a single string back.
+    """
+    if np.ndim(seconds) == 0:
+        return format_hms(pd.Series([seconds]), precision).iloc[0]
+    values = pd.to_numeric(pd.Series(seconds), errors='coerce')
+    total = values.fillna(0).to_numpy(dtype=np.float64)
+    negative = total < 0
+    total = (np.abs(total) // precision * precision).astype(np.int64)
+    hours, rest = np.divmod(total, 3600)
+    minutes, secs = np.divmod(rest, 60)
+
+    # Lay the characters out in an (n, width) code matrix and view it as strings:
+    # [-]H..H:MM:SS with at least two hour digits, left-aligned in each row.
+    hour_digits = np.maximum(2, np.floor(np.log10(np.maximum(hours, 1))).astype(np.int64) + 1)
+    width = 1 + int(hour_digits.max(initial=2)) + 6
+    codes = np.zeros((len(total), width), dtype=np.uint32)
+    rows = np.arange(len(total))
+    start = negative.astype(np.int64)
+    codes[negative, 0] = ord('-')
+    for j in range(width - 7):
+        has_digit = j < hour_digits
+        digit = hours // 10 ** np.maximum(hour_digits - 1 - j, 0) % 10
+        codes[rows[has_digit], (start + j)[has_digit]] = ord('0') + digit[has_digit]
+    end = start + hour_digits
+    for offset, char in ((0, ord(':')), (1, minutes // 10), (2, minutes % 10), (3, ord(':')), (4, secs // 10), (5, secs % 10)):
+        codes[rows, end + offset] = char if offset in (0, 3) else ord('0') + char
+    text = codes.view(f'<U{width}').reshape(len(total))
+    return pd.Series(text, index=values.index, dtype=object)
+
+
+def duration_columns(df, columns, raw=RAW_DURATION_TABLES):
+    """Add duration display columns to df and return the column_config for st.dataframe.
+
+    `columns` maps each seconds column to its display column. By default the display
+    columns are "HH:MM:SS" strings. With raw=True the seconds are passed through and
+    the renderer formats them, so no strings are built and the column sorts numerically.
+    """
+    column_config = {}
+    for seconds_col, display_col in columns.items():
+        if raw:
+            df[display_col] = df[seconds_col].round()
+            column_config[display_col] = st.column_config.NumberColumn(display_col, format="%d s")
+        else:
+            df[display_col] = format_hms(df[seconds_col])
+    return column_config
+
+
+def as_text(values):
+    """values as an object column of strings, NaN where missing."""
+    if values.dtype == object and infer_dtype(values, skipna=True) in ('string', 'empty'):
+        return values
+    present = values.notna()
+    if is_float_dtype(values.dtype) and (values[present] % 1 == 0).all():
+        values = values.astype('Int64')  # ids read as floats because of blanks: "123", not "123.0"
+    return values.astype(str).astype(object).where(present, np.nan)
+
+
+def normalize(raw, drop_unassigned=False):
+    """Build the canonical SRR frame from a raw sheet download.
+
+    The raw download is left untouched and its index (the sheet row position)
+    is kept, so frames built from different parts of the sheet can be merged. 'Date Created' is localized to
+    America/Los_Angeles and truncated to the day, the duration columns are parsed once (the original
+    strings are kept as '(Raw)' columns), the low-cardinality columns are
+    stored as categoricals and the text columns as strings. Rows without a
+    Service are dropped only with drop_unassigned, as the Agent View always did.
+    """
+    df = raw.rename(columns={'In process (On It SME)': 'SME (On It)'})
+    if drop_unassigned:
+        df = df.dropna(subset=['Service'])
+    # A date column: any time of day is dropped, so the date filters and the cube's day
+    # buckets (srr_cube.py) select the same whole days ('Creation Timestamp' has the time)
+    created = pd.to_datetime(df['Date Created'], errors='coerce').dt.normalize()
+    df['Date Created'] = created.dt.tz_localize(TIMEZONE, ambiguous='NaT', nonexistent='NaT')
+    for col in DURATION_COLUMNS:
+        df[f'{col} (Raw)'] = df[col]
+    df = parse_durations(df)
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            df[col] = as_text(df[col])
+    return df
+
+
+def _same_categories_dtype(pieces):
+    """The categoricals in pieces with one dtype of categories, as union_categoricals requires.
+
+    A piece with no categories (an all-blank column, read as float) takes the dtype
+    of the others; pieces that still disagree get object categories.
+    """
+    reference = next((piece.cat.categories for piece in pieces if len(piece.cat.categories)), None)
+    if reference is not None:
+        pieces = [piece if len(piece.cat.categories) else piece.cat.set_categories(reference[:0]) for piece in pieces]
+    if len({piece.cat.categories.dtype for piece in pieces}) > 1:
+        pieces = [piece.cat.set_categories(piece.cat.categories.astype(object)) for piece in pieces]
+    return pieces
+
+
+def concat_canonical(*frames):
+    """Append canonical frames, keeping the categorical columns categorical."""
+    df = pd.concat(frames)
+    for col in CATEGORY_COLUMNS:
+        if all(col in frame.columns for frame in frames):
+            pieces = _same_categories_dtype([frame[col] for frame in frames])
+            df[col] = union_categoricals(pieces, sort_categories=True)
+    return df
+
+
+class CsvSheet:
+    """The published CSV export of the sheet.
+
+    Google always serves the whole export, so read(start) only saves parsing
+    and normalizing the rows before `start`.
+    """
+
+    drop_unassigned = False  # the Management View counts rows without a Service too
+
+    def __init__(self, url=SHEET_CSV_URL):
+        self.url = url
+
+    def read(self, start=0):
+        df = pd.read_csv(self.url, skiprows=range(1, start + 1))
+        df.index += start
+        return df
+
+
+class GSheetsWorksheet:
+    """The worksheet behind st.connection("gsheets").
+
+    With a service account only the rows from `start` on are requested. Public
+    connections fall back to the CSV export, like CsvSheet.
+    """
+
+    drop_unassigned = True  # the Agent View only shows rows with a Service
+
+    def __init__(self, worksheet=WORKSHEET):
+        from streamlit_gsheets import GSheetsConnection
+        self.conn = st.connection("gsheets", type=GSheetsConnection)
+        self.worksheet = worksheet
+        self._header = None
+
+    def read(self, start=0):
+        client = self.conn.client
+        if start == 0 or not hasattr(client, '_select_worksheet'):
+            df = self.conn.read(worksheet=self.worksheet, usecols=list(range(SHEET_COLUMNS)), ttl=0, skiprows=range(1, start + 1))
+            df.index += start
+            return df
+
+        from pandas.io.parsers import TextParser
+        sheet = client._select_worksheet(worksheet=self.worksheet)
+        if self._header is None:
+            self._header = sheet.row_values(1)[:SHEET_COLUMNS]
+        # Row 1 is the header, so data row `start` is sheet row start + 2.
+        values = sheet.get(f"A{start + 2}:{_column_letter(len(self._header))}")
+        values = [row + [''] * (len(self._header) - len(row)) for row in values]
+        df = TextParser([self._header] + values).read() if values else pd.DataFrame(columns=self._header)
+        df.index += start
+        return df.dropna(how='all')
+
+
+def _column_letter(n):
+    letters = ''
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(ord('A') + rem) + letters
+    return letters
+
+
+def sheet_source(source="csv"):
+    return GSheetsWorksheet() if source == "gsheets" else CsvSheet()
+
+
+class IncrementalLoader:
+    """Keeps the canonical frame of one sheet up to date from its tail.
+
+    A refresh re-reads the sheet from the first row that can still change (an
+    open case, or a row without a Service yet) or from the last known row,
+    whichever comes first, and re-normalizes only those rows. If a closed row in
+    that range changed, or rows went missing, it falls back to a full reload, as
+    it does every FULL_RELOAD_EVERY refreshes, and after a tail refresh that failed.
+
+    The loader keeps the raw and the normalized rows of the whole sheet, for that
+    change check and the full reloads; only the published snapshot is limited to
+    the hot rows (see srr_archive.py).
+    """
+
+    def __init__(self, source, full_reload_every=FULL_RELOAD_EVERY):
+        self.source = source
+        self.full_reload_every = full_reload_every
+        self.raw = None
+        self.frame = None
+        self.refreshes = 0
+        self.changed_from = 0  # first sheet row the last refresh may have changed
+        self._reload_all = False  # set while a failed refresh has to be redone as a full reload
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        with self._lock:
+            if self.raw is None or self._reload_all or self.refreshes % self.full_reload_every == 0:
+                self._reload_all = True  # stays set if the reload fails
+                self._full_reload()
+            else:
+                try:
+                    self._tail_reload()
+                except Exception:
+                    logger.warning("Incremental sheet refresh failed; reloading the whole sheet", exc_info=True)
+                    self._reload_all = True
+                    self._full_reload()
+            self._reload_all = False
+            self.refreshes += 1
+            return self.frame
+
+    def _full_reload(self):
+        self.raw = self.source.read(0)
+        self.frame = normalize(self.raw, self.source.drop_unassigned)
+        self.changed_from = 0
+
+    def _tail_reload(self):
+        start = self._tail_start()
+        tail = self.source.read(start)
+        if not self._closed_rows_unchanged(self.raw[self.raw.index >= start], tail):
+            self._full_reload()
+            return
+        self.raw = pd.concat([self.raw[self.raw.index < start], tail])
+        self.frame = concat_canonical(self.frame[self.frame.index < start], normalize(tail, self.source.drop_unassigned))
+        self.changed_from = start
+
+    def _tail_start(self):
+        if self.raw.empty:
+            return 0
+        open_rows = self.raw.index[_is_open(self.raw)]
+        return int(min(open_rows.min(), self.raw.index.max())) if len(open_rows) else int(self.raw.index.max())
+
+    @staticmethod
+    def _closed_rows_unchanged(known, tail):
+        closed = known[~_is_open(known)]
+        if not closed.index.isin(tail.index).all() or not closed.columns.isin(tail.columns).all():
+            return False
+        try:
+            pd.testing.assert_frame_equal(closed, tail.loc[closed.index, closed.columns], check_dtype=False)
+        except AssertionError:
+            return False
+        return True
+
+
+def _is_open(raw):
+    return (raw['Status'].isin(OPEN_STATUSES) | raw['Service'].isna()).to_numpy()
@@ -0,0 +1,186 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from srr_archive import VIEW_CACHE_SIZE
+from srr_store import per_snapshot
+
+# Sidebar filter engine. Each snapshot gets packed per-value bitmasks for the filter
+# columns, built once; a filter chain is then a few bitwise ANDs over n/8 bytes, and
+# both the masks and the materialized frames are memoized per (snapshot, filter chain),
+# so every session with the same sidebar state shares one filtered frame (and the
+# tables derived from it).
+
+FILTER_COLUMNS = ['Service', 'Month', 'Weekend?', 'Working Hours?', 'SME (On It)', 'Status']
+
+MASK_CACHE_SIZE = 128
+# Filtered frames and the tables derived from them, a few per filter chain. Capped by their
+# shallow size too (the row copies; text values are shared with the snapshot): with up to
+# ENGINE_CACHE_SIZE engines alive, a count cap alone let ~1000 frame copies pile up.
+FRAME_CACHE_SIZE = 32
+FRAME_CACHE_BYTES = 16 * 2 ** 20  # per engine
+ENGINE_CACHE_SIZE = VIEW_CACHE_SIZE  # one per cached view, so switching Month options does not rebuild them
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Up to maxsize values, least recently used evicted first; with sizeof, also up to max_bytes of them."""
+
+    def __init__(self, maxsize, max_bytes=None, sizeof=None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.nbytes = 0
+        self._items = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key, create):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        value = create()
+        nbytes = self.sizeof(value) if self.sizeof else 0
+        with self._lock:
+            if key in self._items:  # created meanwhile by another thread; keep that one
+                self._items.move_to_end(key)
+                return self._items[key]
+            if self.max_bytes is not None and nbytes > self.max_bytes:
+                return value  # would evict everything else: hand it out uncached
+            self._items[key] = value
+            self._sizes[key] = nbytes
+            self.nbytes += nbytes
+            while len(self._items) > self.maxsize or (self.max_bytes is not None and self.nbytes > self.max_bytes):
+                evicted, _ = self._items.popitem(last=False)
+                self.nbytes -= self._sizes.pop(evicted)
+        return value
+
+
+class FilterEngine:
+    """Packed bitmask indexes over one snapshot's frame."""
+
+    def __init__(self, frame, columns=FILTER_COLUMNS):
+        self.frame = frame
+        self.n = len(frame)
+        self.masks = {}
+        for col in columns:
+            if col in frame.columns:
+                self._index(col)
+        self._selections = LRUCache(MASK_CACHE_SIZE)
+        self._frames = LRUCache(FRAME_CACHE_SIZE, FRAME_CACHE_BYTES, self._copied_bytes)
+
+    def _index(self, col):
+        values = self.frame[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes, uniques = values.cat.codes.to_numpy(), list(values.cat.categories)
+        else:
+            codes, uniques = pd.factorize(values)
+            uniques = list(uniques)
+        masks = {}
+        for code, value in [(-1, _MISSING)] + list(enumerate(uniques)):
+            hits = codes == code
+            if hits.any():
+                masks[value] = np.packbits(hits)
+        self.masks[col] = masks
+
+    def _copied_bytes(self, value):
+        if value is self.frame:  # a filter that kept every row shares the snapshot's frame
+            return 0
+        if isinstance(value, pd.DataFrame):
+            return int(value.memory_usage(index=True).sum())
+        if isinstance(value, (pd.Series, pd.Index)):
+            return int(value.memory_usage())
+        return 0
+
+    def everything(self):
+        """Selection of every row; start the sidebar filter chain here."""
+        return Selection(self, np.packbits(np.ones(self.n, dtype=bool)), ())
+
+    def _value_bits(self, col, value):
+        key = _MISSING if pd.isna(value) else value
+        return self.masks[col].get(key)
+
+
+class Selection:
+    """An immutable set of rows of a FilterEngine, identified by the filters that produced it."""
+
+    def __init__(self, engine, bits, key):
+        self.engine = engine
+        self.bits = bits
+        self.key = key
+
+    def _derive(self, key, make_bits):
+        key = self.key + (key,)
+        bits = self.engine._selections.get_or_create(key, lambda: self.bits & make_bits())
+        return Selection(self.engine, bits, key)
+
+    def isin(self, col, values):
+        values = tuple(values)
+
+        def make_bits():
+            combined = np.zeros_like(self.bits)
+            for value in values:
+                bits = self.engine._value_bits(col, value)
+                if bits is not None:
+                    combined |= bits
+            return combined
+        return self._derive(('isin', col, values), make_bits)
+
+    def between(self, col, start, end):
+        """Rows with start <= col <= end (NaN/NaT rows excluded)."""
+        def make_bits():
+            values = self.engine.frame[col]
+            return np.packbits(((values >= start) & (values <= end)).to_numpy())
+        return self._derive(('between', col, start, end), make_bits)
+
+    def on(self, engine):
+        """The same filter chain replayed on another engine, e.g. the aggregate cube of the same snapshot."""
+        selection = engine.everything()
+        for op, *args in self.key:
+            selection = getattr(selection, op)(*args)
+        return selection
+
+    def rows(self):
+        return np.flatnonzero(np.unpackbits(self.bits, count=self.engine.n))
+
+    def __len__(self):
+        return int(np.unpackbits(self.bits, count=self.engine.n).sum())
+
+    def options(self, col):
+        """Distinct values of col among the selected rows, in order of first appearance (like Series.unique())."""
+        found = []
+        for value, bits in self.engine.masks[col].items():
+            overlap = np.flatnonzero(bits & self.bits)
+            if overlap.size:
+                first = overlap[0] * 8 + int(np.unpackbits(bits[overlap[0]] & self.bits[overlap[0]]).argmax())
+                found.append((first, np.nan if value is _MISSING else value))
+        return [value for _, value in sorted(found, key=lambda item: item[0])]
+
+    def column(self, col):
+        """A single column of the selected rows, without materializing the frame."""
+        return self.engine.frame[col].iloc[self.rows()]
+
+    def frame(self):
+        """The selected rows as a DataFrame, shared by every session with the same filters: treat it as read-only."""
+        if not self.key:
+            return self.engine.frame
+        return self.engine._frames.get_or_create(self.key, self._materialize)
+
+    def _materialize(self):
+        rows = self.rows()
+        # Filters that keep every row (e.g. the full date range) share the snapshot's frame instead of copying it
+        return self.engine.frame if len(rows) == self.engine.n else self.engine.frame.iloc[rows]
+
+    def derived(self, name, build):
+        """build(frame()) under `name`, memoized like frame(): shared by every session with the same filters."""
+        return self.engine._frames.get_or_create((self.key, name), lambda: build(self.frame()))
+
+
+@per_snapshot(ENGINE_CACHE_SIZE)
+def filter_engine(snapshot):
+    """FilterEngine for a snapshot, built once per snapshot per process."""
+    return FilterEngine(snapshot.frame)
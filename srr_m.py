@@ -1,76 +1,52 @@
 import streamlit as st
 import pandas as pd
-import time
-import numpy as np
 import altair as alt
 from streamlit_lottie import st_lottie
-import requests
-import json
-from pygwalker.api.streamlit import StreamlitRenderer, init_streamlit_comm
-import streamlit.components.v1 as components
-import pygwalker as pyg
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
-from st_aggrid.shared import JsCode
 import plotly.express as px
+from srr_data import format_hms, duration_columns, TIMEZONE
+from srr_store import current_snapshot, prefetch_snapshot, refresh_data
+from srr_archive import date_bounds, months_between, service_options, snapshot_view
+from srr_ui import timings_panel, watch_snapshot
+from srr_assets import prefetch_lotties, FIVE9_LOGO
+from srr_filters import filter_engine
+from srr_cube import aggregate_cube
+from srr_charts import cached_chart, show_chart
+from srr_memory import memory_panel
+from srr_trace import trace_run
+from paged_table import paged_table
 
 st.set_page_config(page_title="SRR Management View", page_icon=":mag_right:", layout="wide")
 
+# Stage timings of this run (see srr_trace.py); each lap closes the stage since the previous one
+run = trace_run("srr_m")
+
 # # Establish communication between PygWalker and Streamlit -- A1 - START --This is working---
 # init_streamlit_comm()
 # # -- A1 - END --This is working--
 
-@st.cache_data(ttl=120, show_spinner=True)
-def load_data(url):
-    df = pd.read_csv(url)
-    df['Date Created'] = pd.to_datetime(df['Date Created'], errors='coerce')  # set 'Date Created' as datetime
-    df.rename(columns={'In process (On It SME)': 'SME (On It)'}, inplace=True)  # Renaming column
-    df['TimeTo: On It (Raw)'] = df['TimeTo: On It'].copy()
-    df['TimeTo: Attended (Raw)'] = df['TimeTo: Attended'].copy()
-    return df
-
 def calculate_metrics(df):
     unique_case_count = df['Service'].count()
     survey_avg = df['Survey'].mean()
     survey_count = df['Survey'].count()
     return unique_case_count, survey_avg, survey_count
 
-def convert_to_seconds(time_str):
-    if pd.isnull(time_str):
-        return 0
-    try:
-        h, m, s = map(int, time_str.split(':'))
-        return h * 3600 + m * 60 + s
-    except ValueError:
-        return 0
-
-def seconds_to_hms(seconds):
-    hours = seconds // 3600
-    minutes = (seconds % 3600) // 60
-    seconds = seconds % 60
-    return f"{int(hours):02d}:{int(minutes):02d}:{int(seconds):02d}"
-
-url = 'https://docs.google.com/spreadsheets/d/e/2PACX-1vSQVnfH-edbXqAXxlCb2FrhxxpsOHJhtqKMYsHWxf5SyLVpAPTSIWQeIGrBAGa16dE4CA59o2wyz59G/pub?gid=0&single=true&output=csv'
-df = load_data(url).copy()
-
-# Function to load a lottie animation from a URL
-def load_lottieurl(url: str):
-    r = requests.get(url)
-    if r.status_code != 200:
-        return None
-    return r.json()
-
-lottie_people = load_lottieurl("https://lottie.host/2ad92c27-a3c0-47cc-8882-9eb531ee1e0c/A9tbMxONxp.json")
-lottie_clap = load_lottieurl("https://lottie.host/af0a6ccc-a8ac-4921-8564-5769d8e09d1e/4Czx1gna6U.json")
-lottie_queuing = load_lottieurl("https://lottie.host/910429d2-a0a4-4668-a4d4-ee831f9ccecd/yOKbdL2Yze.json")
-lottie_inprogress = load_lottieurl("https://lottie.host/c5c6caea-922b-4b4e-b34a-41ecaafe2a13/mphMkSfOkR.json")
-lottie_chill = load_lottieurl("https://lottie.host/2acdde4d-32d7-44a8-aa64-03e1aa191466/8EG5a8ToOQ.json")
+# Start the sheet fetch and the animation downloads together; the page skeleton below renders while they run
+prefetch_snapshot("csv")
+lotties = prefetch_lotties([
+    "https://lottie.host/2ad92c27-a3c0-47cc-8882-9eb531ee1e0c/A9tbMxONxp.json",
+    "https://lottie.host/af0a6ccc-a8ac-4921-8564-5769d8e09d1e/4Czx1gna6U.json",
+    "https://lottie.host/910429d2-a0a4-4668-a4d4-ee831f9ccecd/yOKbdL2Yze.json",
+    "https://lottie.host/c5c6caea-922b-4b4e-b34a-41ecaafe2a13/mphMkSfOkR.json",
+    "https://lottie.host/2acdde4d-32d7-44a8-aa64-03e1aa191466/8EG5a8ToOQ.json",
+])
 
 # Button to refresh the data - align to upper right
 col1, col2 = st.columns([3, .350])
 with col2:
     if st.button('Refresh Data'):
         # st.experimental_memo.clear()
-        st.cache_data.clear()
+        refresh_data("csv")
         # st.experimental_rerun()
         st.rerun()
 
@@ -80,8 +56,8 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# Display Lottie animation
-st_lottie(lottie_people, speed=1, reverse=False, loop=True, quality="low", height=200, width=200, key=None)
+# Lottie animation, filled in once it has loaded
+header_lottie = st.empty()
 
 st.write(':wave: Welcome:exclamation:')
 # st.title('Five9 SRR Management View')
@@ -92,40 +68,62 @@ st.write(':wave: Welcome:exclamation:')
 #     st.experimental_rerun()
 
 # Insert Five9 logo
-five9logo_url = "https://raw.githubusercontent.com/mackensey31712/srr/main/five9log1.png"
 
-st.sidebar.image(five9logo_url, width=200)
+st.sidebar.image(FIVE9_LOGO, width=200)
 
 # Sidebar Title
 st.sidebar.markdown('# Select a **Filter:**')
+run.lap("skeleton")
 
-# Sidebar with a multi-select dropdown for 'Service' column filtering
-with st.sidebar:
-    all_services_options = ['All'] + list(df['Service'].unique())
+# Canonical SRR frame from the latest process-wide snapshot (see srr_store.py)
+with st.spinner("Loading SRR data..."):
+    snapshot = current_snapshot("csv")
+run.lap("snapshot", rows=len(snapshot.frame))
+
+# Lottie animations are loaded once per process and cached on disk (see srr_assets.py)
+lottie_people, lottie_clap, lottie_queuing, lottie_inprogress, lottie_chill = [future.result() for future in lotties]
+run.lap("lottie")
+
+# Display Lottie animation
+with header_lottie:
+    st_lottie(lottie_people, speed=1, reverse=False, loop=True, quality="low", height=200, width=200, key=None)
+
+# Sidebar with a multi-select dropdown for 'Service' column filtering. The options span the
+# archived months too, so the selection survives changing the dates; it is applied below,
+# once the dates have picked the view
+service_slot = st.sidebar.container()
+with service_slot:
+    all_services_options = ['All'] + service_options(snapshot)
     selected_service = st.multiselect('Service - (Multi-Select)', all_services_options, default='All')
 
+# Create a date_input widget for 'Date Created' column filtering.
+# The range spans the archived months too (see srr_archive.py)
+# and opens on the month of the latest case, so the first render loads no archived history
+first_date, last_date = date_bounds(snapshot)
+month_start = max(first_date, last_date.replace(day=1)) if pd.notna(last_date) else first_date
+start_date = st.sidebar.date_input('Start Date', value=month_start, min_value=first_date, max_value=last_date)
+end_date = st.sidebar.date_input('End Date', value=last_date, min_value=first_date, max_value=last_date)
+
+# Convert start_date and end_date to datetime objects in the same timezone as 'Date Created'
+start_date = pd.to_datetime(start_date).tz_localize(TIMEZONE)
+end_date = pd.to_datetime(end_date).tz_localize(TIMEZONE)
+
+# Only the archived months in the date range are loaded
+view = snapshot_view(snapshot, months_between(snapshot, start_date, end_date))
+rows = filter_engine(view).everything()
+
 # Apply filtering
 if 'All' in selected_service:
-    df_filtered = df
+    pass
 
 elif not selected_service:
     # If nothing is selected, display a message indicating all services are being displayed
-    st.sidebar.markdown("<h3 style='color: red;'>Displaying All Services</h1>", unsafe_allow_html=True)
-    df_filtered = df
+    service_slot.markdown("<h3 style='color: red;'>Displaying All Services</h1>", unsafe_allow_html=True)
 else:
-    df_filtered = df[df['Service'].isin(selected_service)]
-    
-
-# Create a date_input widget for 'Date Created' column filtering.
-start_date = st.sidebar.date_input('Start Date', value=df_filtered['Date Created'].min(), min_value=df_filtered['Date Created'].min(), max_value=df_filtered['Date Created'].max())
-end_date = st.sidebar.date_input('End Date', value=df_filtered['Date Created'].max(), min_value=df_filtered['Date Created'].min(), max_value=df_filtered['Date Created'].max())
-
-# Convert start_date and end_date to datetime objects
-start_date = pd.to_datetime(start_date)
-end_date = pd.to_datetime(end_date)
+    rows = rows.isin('Service', selected_service)
 
 # Apply filtering
-df_filtered = df_filtered[(df_filtered['Date Created'] >= start_date) & (df_filtered['Date Created'] <= end_date)]
+rows = rows.between('Date Created', start_date, end_date)
 
 # Sidebar with a dropdown for 'Weekend?' column filtering
 with st.sidebar:
@@ -133,9 +131,7 @@ with st.sidebar:
 
 # Apply filtering
 if selected_weekend != 'All':
-    df_filtered = df_filtered[df_filtered['Weekend?'] == selected_weekend]
-else:
-    df_filtered = df_filtered
+    rows = rows.isin('Weekend?', [selected_weekend])
 
 # Sidebar with a dropdown for 'Working Hours?' column filtering
 with st.sidebar:
@@ -143,13 +139,11 @@ with st.sidebar:
 
 # Apply filtering
 if selected_working_hours != 'All':
-    df_filtered = df_filtered[df_filtered['Working Hours?'] == selected_working_hours]
-else:
-    df_filtered = df_filtered
+    rows = rows.isin('Working Hours?', [selected_working_hours])
 
 # Sidebar with a multi-select dropdown for 'SME (On It)' column filtering
 with st.sidebar:
-    all_sme_options = ['All'] + list(df_filtered['SME (On It)'].unique())
+    all_sme_options = ['All'] + rows.options('SME (On It)')
     selected_sme_on_it = st.multiselect('SME (On It) - (Multi-Select)', all_sme_options, default='All')
 
 # # Apply filtering
@@ -166,24 +160,29 @@ elif not selected_sme_on_it:
     
 else:
     # If specific SMEs are selected, filter the dataframe and display the result
-    df_filtered = df_filtered[df_filtered['SME (On It)'].isin(selected_sme_on_it)]
+    rows = rows.isin('SME (On It)', selected_sme_on_it)
     st.sidebar.markdown(
         "<h3 style='color: red;'>Displaying Selected SMEs</h1>",
         unsafe_allow_html=True)
-    df_filtered = df_filtered
 
+# The filters above only narrow a precomputed bitmask selection; materialize the frame once
+df_filtered = rows.frame()
+run.lap("filters", rows=len(df_filtered))
+
+# Charts and summary tables are rolled up from the view's aggregate cube
+cube = aggregate_cube(view)
 
 
-# DataFrames for "In Queue" and "In Progress"
-df_inqueue = df_filtered[df_filtered['Status'] == 'In Queue']
-df_inqueue = df_inqueue[['Case #', 'Requestor','Service','Creation Timestamp', 'Message Link']]
-df_inprogress = df_filtered[df_filtered['Status'] == 'In Progress']
-df_inprogress = df_inprogress[['Case #', 'Requestor','Service','Creation Timestamp', 'SME (On It)', 'TimeTo: On It', 'Message Link']]
+
+# DataFrames for "In Queue" and "In Progress", built once per filter chain and shared by every session
+df_inqueue = rows.derived('inqueue', lambda frame: frame.loc[
+    frame['Status'] == 'In Queue', ['Case #', 'Requestor','Service','Creation Timestamp', 'Message Link']])
+df_inprogress = rows.derived('inprogress', lambda frame: frame.loc[
+    frame['Status'] == 'In Progress', ['Case #', 'Requestor','Service','Creation Timestamp', 'SME (On It)', 'TimeTo: On It (Raw)', 'Message Link']
+].rename(columns={'TimeTo: On It (Raw)': 'TimeTo: On It'}))
 
 
 # Metrics
-df_filtered['TimeTo: On It Sec'] = df_filtered['TimeTo: On It'].apply(convert_to_seconds)
-df_filtered['TimeTo: Attended Sec'] = df_filtered['TimeTo: Attended'].apply(convert_to_seconds)
 # overall_avg_on_it = df_filtered['TimeTo: On It Sec'].mean()
 # overall_avg_attended = df_filtered['TimeTo: Attended Sec'].mean()
 # unique_case_count, survey_avg, survey_count = calculate_metrics(df_filtered)
@@ -202,17 +201,13 @@ df_filtered['TimeTo: Attended Sec'] = df_filtered['TimeTo: Attended'].apply(conv
 #     st.metric("Overall Avg. TimeTo: Attended", seconds_to_hms(overall_avg_attended))
 
 
-# Ensure 'TimeTo: On It' and 'TimeTo: Attended' are in timedelta format
-df_filtered['TimeTo: On It'] = pd.to_timedelta(df_filtered['TimeTo: On It'])
-df_filtered['TimeTo: Attended'] = pd.to_timedelta(df_filtered['TimeTo: Attended'])
-
 # Calculate the average seconds directly from 'TimeTo: On It' and 'TimeTo: Attended', and convert to 'hh:mm:ss'
 overall_avg_on_it_sec = df_filtered['TimeTo: On It'].dt.total_seconds().mean()
 overall_avg_attended_sec = df_filtered['TimeTo: Attended'].dt.total_seconds().mean()
 unique_case_count, survey_avg, survey_count = calculate_metrics(df_filtered)
 
-overall_avg_on_it_hms = seconds_to_hms(overall_avg_on_it_sec)
-overall_avg_attended_hms = seconds_to_hms(overall_avg_attended_sec)
+overall_avg_on_it_hms = format_hms(overall_avg_on_it_sec)
+overall_avg_attended_hms = format_hms(overall_avg_attended_sec)
 
 
 # Display metrics
@@ -240,7 +235,7 @@ if in_queue_count == 0:
         # Display Lottie animation if count is 0
         st_lottie(lottie_clap, speed=1, height=100, width=200)  # Adjust height as needed
     with st.expander("Show Data", expanded=False):
-        st.dataframe(df_inqueue, use_container_width=True)
+        paged_table(df_inqueue, key="inqueue", use_container_width=True)
 else:
     col1, col2 = st.columns([0.3, 1.2])  # Adjust the ratio as needed for your layout
     with col1:
@@ -249,7 +244,7 @@ else:
         # Display Lottie animation if count is not 0
         st_lottie(lottie_queuing, speed=1, height=100, width=200)  # Adjust height as needed
     with st.expander("Show Data", expanded=False):
-        st.dataframe(df_inqueue, use_container_width=True)
+        paged_table(df_inqueue, key="inqueue", use_container_width=True)
 
 
 # Display "In Progress" DataFrame with count
@@ -262,7 +257,7 @@ if in_progress_count == 0:
         # Display Lottie animation if count is 0
         st_lottie(lottie_chill, speed=1, height=100, width=200)  # Adjust height as needed
     with st.expander("Show Data", expanded=False):
-        st.dataframe(df_inprogress, use_container_width=True)
+        paged_table(df_inprogress, key="inprogress", use_container_width=True)
 else:
     col1, col2 = st.columns([0.4, 1.2])  # Adjust the ratio as needed for your layout
     with col1:
@@ -271,7 +266,7 @@ else:
         # Display Lottie animation if count is not 0
         st_lottie(lottie_inprogress, speed=1, height=100, width=200)  # Adjust height as needed
     with st.expander("Show Data", expanded=False):
-        st.dataframe(df_inprogress, use_container_width=True)
+        paged_table(df_inprogress, key="inprogress", use_container_width=True)
 
 filtered_columns = ['Case #', 'Service', 'Inquiry', 'Requestor', 'Creation Timestamp',
        'SME (On It)', 'On It Time', 'Attendee', 'Attended Timestamp',
@@ -283,23 +278,25 @@ filtered_columns = ['Case #', 'Service', 'Inquiry', 'Requestor', 'Creation Times
 # Display the filtered dataframe
 st.title('Data')
 with st.expander('Show Data', expanded=False):
-    st.dataframe(df_filtered[filtered_columns])
+    # Columns are picked per page, so the shared frame is not copied
+    paged_table(df_filtered, key="data", columns=filtered_columns)
 
-agg_month = df_filtered.groupby('Month').agg({
-    'TimeTo: On It Sec': 'mean',
-    'TimeTo: Attended Sec': 'mean'
+run.lap("metrics")
+agg_month = cube.rollup(rows, 'Month', {
+    'TimeTo: On It Sec': ('TimeTo: On It Sec', 'mean'),
+    'TimeTo: Attended Sec': ('TimeTo: Attended Sec', 'mean')
 }).reset_index()
 
-agg_month['TimeTo: On It'] = agg_month['TimeTo: On It Sec'].apply(seconds_to_hms)
-agg_month['TimeTo: Attended'] = agg_month['TimeTo: Attended Sec'].apply(seconds_to_hms)
+agg_month['TimeTo: On It'] = format_hms(agg_month['TimeTo: On It Sec'])
+agg_month['TimeTo: Attended'] = format_hms(agg_month['TimeTo: Attended Sec'])
 
-agg_service = df_filtered.groupby('Service').agg({
-    'TimeTo: On It Sec': 'mean',
-    'TimeTo: Attended Sec': 'mean'
+agg_service = cube.rollup(rows, 'Service', {
+    'TimeTo: On It Sec': ('TimeTo: On It Sec', 'mean'),
+    'TimeTo: Attended Sec': ('TimeTo: Attended Sec', 'mean')
 }).reset_index()
 
-agg_service['TimeTo: On It'] = agg_service['TimeTo: On It Sec'].apply(seconds_to_hms)
-agg_service['TimeTo: Attended'] = agg_service['TimeTo: Attended Sec'].apply(seconds_to_hms)
+agg_service['TimeTo: On It'] = format_hms(agg_service['TimeTo: On It Sec'])
+agg_service['TimeTo: Attended'] = format_hms(agg_service['TimeTo: Attended Sec'])
 
 # st.set_option('deprecation.showPyplotGlobalUse', False)
 
@@ -325,7 +322,8 @@ agg_month_long = agg_month.melt(id_vars=['Month'],
 month_order = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November', 'December']
 
 # Create a stacked bar chart with months ordered as specified
-chart = alt.Chart(agg_month_long).mark_bar().encode(
+# Chart specs are cached per snapshot and sidebar filters (see srr_charts.py)
+chart = cached_chart("srr_m", view, rows, 'monthly_response_times', lambda: alt.Chart(agg_month_long).mark_bar().encode(
     x=alt.X('Month', sort=month_order),  # Use the 'sort' argument to order months
     y=alt.Y('Minutes', stack='zero'),  # Use stack='zero' for stacking
     color='Category',  # Color distinguishes the categories
@@ -334,11 +332,11 @@ chart = alt.Chart(agg_month_long).mark_bar().encode(
     title='Monthly Response Times',
     width=600,
     height=400
-)
+))
 
 # Display the 'Monthly Response Times' chart
 with col1:
-    st.write(chart)
+    show_chart(chart)
 
 # Convert seconds to minutes directly for 'agg_service'
 agg_service['TimeTo_On_It_Minutes'] = agg_service['TimeTo: On It Sec'] / 60
@@ -351,7 +349,7 @@ agg_service_long = agg_service.melt(id_vars=['Service'],
                                     value_name='Minutes')
 
 # Create a grouped bar chart
-chart2 = alt.Chart(agg_service_long).mark_bar().encode(
+chart2 = cached_chart("srr_m", view, rows, 'group_response_times', lambda: alt.Chart(agg_service_long).mark_bar().encode(
     x='Service',
     y=alt.Y('Minutes', stack='zero'),  # Use stack='zero' for stacking
     color='Category',  # Color distinguishes the categories
@@ -360,65 +358,71 @@ chart2 = alt.Chart(agg_service_long).mark_bar().encode(
     title='Group Response Times',
     width=600,
     height=400
-)
+))
 
 # Display 'Group Response Times'
 with col5:
-    st.write(chart2)
+    show_chart(chart2)
+
+# Case counts are rolled up server-side, so the charts carry one row per bar instead of every case.
+# Missing values keep their own bar, as count() over the rows gave them.
+service_counts = cube.rollup(rows, 'Service', {'Count': ('Service', 'size')}, dropna=False).reset_index()
+sme_counts = cube.rollup(rows, 'SME (On It)', {'Count': ('SME (On It)', 'size')}, dropna=False).reset_index()
 
 # Create an interactive bar chart to show the 'unique case count' for each unique 'Service'
-chart3 = alt.Chart(df_filtered).mark_bar().encode(
-    x='Service',
-    y='count()',
-    tooltip=['Service', 'count()']
+chart3 = cached_chart("srr_m", view, rows, 'interaction_count', lambda: alt.Chart(service_counts).mark_bar().encode(
+    x='Service:N',
+    y=alt.Y('Count:Q', title='Count of Records'),
+    tooltip=['Service:N', alt.Tooltip('Count:Q', title='Count of Records')]
 ).properties(
     title='Interaction Count',
     width=600,
     height=600
-)
+))
 
 # Display 'Interaction Count' chart
 with col1:
-    st.write(chart3)
+    show_chart(chart3)
 
 # Create an interactive bar chart to show the 'unique case count' for each 'SME (On It)'
-chart4 = alt.Chart(df_filtered).mark_bar().encode(
+chart4 = cached_chart("srr_m", view, rows, 'interactions_handled', lambda: alt.Chart(sme_counts).mark_bar().encode(
     y=alt.Y('SME (On It):N', sort='-x'),  # Sorting based on the count in descending order, ensure to specify ':N' for nominal data
-    x=alt.X('count()', title='Unique Case Count'),
-    tooltip=['SME (On It)', 'count()']
+    x=alt.X('Count:Q', title='Unique Case Count'),
+    tooltip=['SME (On It):N', alt.Tooltip('Count:Q', title='Count of Records')]
 ).properties(
     title='Interactions Handled',
     width=600,
     height=600
-)
+))
 
 # Display 'Interactions Handled' chart
 with col5:
-    st.write(chart4)
+    show_chart(chart4)
 
 
 # Filter out rows where "Case Reason" or "Case #" is null (adjust column names as necessary)
 # df_filtered = df.dropna(subset=['Case #', 'Case Reason'])
 
 # Group by "Case Reason" and count "Case #" occurrences
-case_counts = df_filtered.groupby('Case Reason')['Service'].count().reset_index()
+case_counts = cube.rollup(rows, 'Case Reason', {'Service': ('Service', 'count')}).reset_index()
 
 # Sort the DataFrame by counts in ascending order
 case_counts_sorted = case_counts.sort_values(by='Service', ascending=True)
 
 # Generate a pie chart
-fig = px.pie(case_counts_sorted, values='Service', names='Case Reason', title='Distribution of Case Reasons')
+fig = cached_chart("srr_m", view, rows, 'case_reasons', lambda: px.pie(case_counts_sorted, values='Service', names='Case Reason', title='Distribution of Case Reasons'))
 
 # Show the pie chart in the Streamlit app
-st.plotly_chart(fig)
+show_chart(fig)
 
 
+run.lap("charts")
 st.subheader('Interaction Count by Requestor')
 
 # Display a Dataframe where the rows are the 'Requestor', the columns would be the 'Service', and the values would be the count of each 'Service'
 
-# Create a pivot table using pandas
-pivot_df = df_filtered.pivot_table(index='Requestor', columns='Service', aggfunc='size', fill_value=0)
+# Pivot the Requestor x Service counts from the cube
+pivot_df = cube.rollup(rows, ['Requestor', 'Service'], {'count': ('Service', 'size')})['count'].unstack(fill_value=0)
 
 # Reset the index so 'Requestor' becomes a regular column
 pivot_df.reset_index(inplace=True)
@@ -438,27 +442,29 @@ AgGrid(pivot_df, gridOptions=gridOptions, update_mode=GridUpdateMode.MODEL_CHANG
 # and then by the highest average survey.
 
 # Group by 'SME (On It)' and calculate the required metrics including average survey
-df_grouped = df_filtered.groupby('SME (On It)').agg(
-    Avg_On_It_Sec=pd.NamedAgg(column='TimeTo: On It Sec', aggfunc='mean'),
-    Avg_Attended_Sec=pd.NamedAgg(column='TimeTo: Attended Sec', aggfunc='mean'),
-    Number_of_Interactions=pd.NamedAgg(column='SME (On It)', aggfunc='count'),
-    Avg_Survey=pd.NamedAgg(column='Survey', aggfunc='mean')  # Calculate the average survey score
-).reset_index()
+run.lap("requestors")
+df_grouped = cube.rollup(rows, 'SME (On It)', {
+    'Avg_On_It_Sec': ('TimeTo: On It Sec', 'mean'),
+    'Avg_Attended_Sec': ('TimeTo: Attended Sec', 'mean'),
+    'Number_of_Interactions': ('SME (On It)', 'count'),
+    'Avg_Survey': ('Survey', 'mean')  # Calculate the average survey score
+}).reset_index()
 
 df_grouped['Total_Avg_Sec'] = df_grouped['Avg_On_It_Sec'] + df_grouped['Avg_Attended_Sec']
 
 # Sort by Total_Avg_Sec, Number_of_Interactions, and then by Avg_Survey in descending order
 df_sorted = df_grouped.sort_values(by=['Total_Avg_Sec', 'Number_of_Interactions', 'Avg_Survey'], ascending=[True, False, False])
 
-df_sorted['Avg_On_It'] = df_sorted['Avg_On_It_Sec'].apply(seconds_to_hms)
-df_sorted['Avg_Attended'] = df_sorted['Avg_Attended_Sec'].apply(seconds_to_hms)
+duration_config = duration_columns(df_sorted, {'Avg_On_It_Sec': 'Avg_On_It', 'Avg_Attended_Sec': 'Avg_Attended'})
 
 # Rename 'SME (On It)' column to 'SME'
 df_sorted.rename(columns={'SME (On It)': 'SME'}, inplace=True)
 
 # Display "Summary Table"
 st.subheader('SME Summary Table')
-st.dataframe(df_sorted[['SME', 'Avg_On_It', 'Avg_Attended', 'Number_of_Interactions', 'Avg_Survey']].reset_index(drop=True))
+paged_table(df_sorted[['SME', 'Avg_On_It', 'Avg_Attended', 'Number_of_Interactions', 'Avg_Survey']].reset_index(drop=True),
+            key="sme_summary", column_config=duration_config)
+run.lap("summary", rows=len(df_sorted))
 
 # st.subheader('Create Your Own Visualization Below')
 # # ----- A2 -This is working - START-----
@@ -486,7 +492,10 @@ st.dataframe(df_sorted[['SME', 'Avg_On_It', 'Avg_Attended', 'Number_of_Interacti
 # # B2 - This is working - END-----
 
 
-# Auto-update every 5 minutes
-refresh_rate = 120  # 300 seconds = 5 minutes
-time.sleep(refresh_rate)
-st.rerun()
+# Auto-update whenever a newer snapshot is published (every 2 minutes), without holding the script thread
+watch_snapshot("csv", snapshot.version)
+run.end(rows=len(df_filtered))
+# Memory held by the shared caches and by each session: /_stcore/metrics, or the sidebar with ?debug=memory
+memory_panel("csv")
+# Stage timings: Prometheus text on SRR_METRICS_PORT, or the sidebar with ?debug=timings
+timings_panel()
@@ -0,0 +1,152 @@
+import logging
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import srr_archive
+from srr_store import derived_caches, get_store
+from srr_ui import debug_requested
+
+# Memory accounting for the SRR dashboards. Snapshots, their views and everything
+# derived from them (filter engines, aggregate cubes, chart specs) are shared by all
+# sessions, so they should not grow with the number of open dashboards; what each
+# session holds on its own is just its session state. cache_stats() and session_stats()
+# size both, and the same numbers are served at Streamlit's /_stcore/metrics endpoint
+# (cache_memory_bytes{cache_type="srr",...}) and, with ?debug=memory in the URL, in a
+# sidebar panel (see srr_trace.py for the stage timings).
+
+logger = logging.getLogger(__name__)
+
+CATEGORY = "srr"
+# Objects of these modules are walked attribute by attribute; others count their own size only
+WALKED_MODULES = ("srr_", "eda_", "paged_table")
+
+
+def deep_bytes(value, seen):
+    """Approximate bytes reachable from value, skipping (and recording in seen) objects already counted."""
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        return size + sum(deep_bytes(k, seen) + deep_bytes(v, seen) for k, v in list(value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(deep_bytes(item, seen) for item in list(value))
+    if type(value).__module__.startswith(WALKED_MODULES) and hasattr(value, "__dict__"):
+        return size + deep_bytes(vars(value), seen)
+    return size
+
+
+def _short(session_id):
+    return session_id[:8]
+
+
+def session_stats():
+    """(session, bytes of session state) per connected session."""
+    try:
+        from streamlit.runtime import Runtime
+        sessions = Runtime.instance()._session_mgr.list_active_sessions()
+    except Exception:  # not running under `streamlit run`, or the runtime internals moved
+        return []
+    stats = []
+    for info in sessions:
+        state = info.session.session_state
+        stats.append((_short(info.session.id), sum(stat.byte_length for stat in state.get_stats())))
+    return stats
+
+
+def cache_stats(stores):
+    """(cache, entry, bytes) for the shared SRR structures, given {sheet source: SnapshotStore}.
+
+    Each object is counted once, to the first entry that reaches it: a view's rows
+    already in its snapshot, or the snapshot frame a filter engine indexes, are not
+    counted again.
+    """
+    seen = set()
+    stats = []
+    for source, store in stores.items():
+        snapshot = store.latest(timeout=0)
+        if snapshot is not None:
+            stats.append(("snapshot", f"{source} v{snapshot.version}", deep_bytes(snapshot, seen)))
+        loader = store.loader
+        stats.append(("loader", source, deep_bytes(getattr(loader, "raw", None), seen)
+                      + deep_bytes(getattr(loader, "frame", None), seen)))
+    for snapshot, months, view in srr_archive.cached_views():
+        stats.append(("view", f"v{snapshot.version} {len(months)} months", deep_bytes(view.frame, seen)))
+    for cache in derived_caches:
+        for snapshot, value in cache.entries():
+            stats.append((cache.__name__, f"v{snapshot.version}", deep_bytes(value, seen)))
+    return stats
+
+
+def process_rss():
+    """Resident set size of this process in bytes (Linux), or None."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class MemoryStatsProvider:
+    """Streamlit cache stats provider for the SRR caches, served at /_stcore/metrics."""
+
+    def __init__(self):
+        self.stores = {}  # source -> SnapshotStore
+        self._lock = threading.Lock()
+
+    def track(self, source):
+        # get_store is only reliable in a script run: outside one, st.cache_resource always misses
+        with self._lock:
+            self.stores[source] = get_store(source)
+
+    def tracked(self):
+        with self._lock:
+            return dict(sorted(self.stores.items()))
+
+    def get_stats(self):
+        from streamlit.runtime.stats import CacheStat
+        try:
+            stats = cache_stats(self.tracked())
+        except Exception:
+            logger.exception("Could not size the SRR caches")
+            return []
+        return [CacheStat(CATEGORY, f"{cache} {entry}", size) for cache, entry, size in stats]
+
+
+@st.cache_resource
+def _provider():
+    provider = MemoryStatsProvider()
+    try:
+        from streamlit.runtime import Runtime
+        Runtime.instance().stats_mgr.register_provider(provider)
+    except Exception:  # e.g. no runtime under bare `python`
+        logger.info("SRR memory stats are not served at /_stcore/metrics")
+    return provider
+
+
+def memory_panel(source):
+    """Register source's caches for /_stcore/metrics; with ?debug=memory, show the sizes in the sidebar."""
+    _provider().track(source)
+    if not debug_requested("memory"):
+        return
+    with st.sidebar.expander("Memory", expanded=True):
+        rss = process_rss()
+        if rss is not None:
+            st.metric("Process RSS", f"{rss / 2**20:,.1f} MiB")
+        caches = pd.DataFrame(cache_stats(_provider().tracked()), columns=["Cache", "Entry", "Bytes"])
+        sessions = pd.DataFrame(session_stats(), columns=["Session", "Bytes"])
+        st.caption(f"Shared: {caches['Bytes'].sum():,} bytes in {len(caches)} entries")
+        st.dataframe(caches, hide_index=True, use_container_width=True)
+        st.caption(f"Per session: {sessions['Bytes'].sum():,} bytes across {len(sessions)} sessions")
+        st.dataframe(sessions, hide_index=True, use_container_width=True)
@@ -0,0 +1,109 @@
+import contextlib
+import json
+import logging
+import os
+import tempfile
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pyarrow as pa
+
+from srr_data import TEXT_COLUMNS
+
+# Local copies of the published SRR snapshots. Every snapshot the store publishes is
+# written as an Arrow IPC file, one per version, with the text columns fixed to
+# strings so each file has the same schema (archived months, srr_archive.py, use the
+# same format). On process start the store publishes the
+# newest file at once, so dashboards render while (or even if) the first sheet fetch
+# is slow or failing. Files are memory-mapped on load: numeric, datetime and duration
+# columns are read without copying.
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = os.environ.get("SRR_SNAPSHOT_DIR", os.path.join(tempfile.gettempdir(), "srr_snapshots"))
+KEEP_SNAPSHOTS = 3
+# Bump when the canonical frame changes shape, so older files are not loaded
+SNAPSHOT_FORMAT = 1
+
+
+def write_frame(path, frame, info):
+    """Write a canonical frame as an Arrow IPC file at path, atomically, with info (JSON) in its metadata."""
+    table = pa.Table.from_pandas(frame, preserve_index=True)
+    # Text columns stay strings even when a download leaves one empty (Arrow's null type)
+    schema = pa.schema([field.with_type(pa.string()) if field.name in TEXT_COLUMNS else field for field in table.schema],
+                       metadata={**table.schema.metadata, b"srr": json.dumps({"format": SNAPSHOT_FORMAT, **info}).encode()})
+    table = table.cast(schema)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    tmp = os.path.join(directory, f".{uuid.uuid4().hex}.tmp")
+    try:
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp, path)
+    finally:
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+
+
+def read_frame(path):
+    """(frame, info) from a file written by write_frame, memory-mapped; None if it has another format."""
+    with pa.memory_map(path) as source:
+        table = pa.ipc.open_file(source).read_all()
+    info = json.loads(table.schema.metadata[b"srr"])
+    if info.pop("format") != SNAPSHOT_FORMAT:
+        return None
+    frame = table.to_pandas(split_blocks=True)
+    for col in TEXT_COLUMNS:
+        if col in frame.columns:
+            frame[col] = frame[col].where(frame[col].notna(), np.nan)  # None back to NaN, as read_csv gives
+    return frame, info
+
+
+class SnapshotFiles:
+    """Versioned snapshot files of one sheet source: <source>-<version>.arrow in directory."""
+
+    def __init__(self, source, directory=SNAPSHOT_DIR, keep=KEEP_SNAPSHOTS):
+        self.source = source
+        self.directory = directory
+        self.keep = keep
+
+    def _path(self, version):
+        return os.path.join(self.directory, f"{self.source}-{version:08d}.arrow")
+
+    def _versions(self):
+        prefix, suffix = f"{self.source}-", ".arrow"
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(int(name[len(prefix):-len(suffix)]) for name in names
+                      if name.startswith(prefix) and name.endswith(suffix) and name[len(prefix):-len(suffix)].isdigit())
+
+    def latest_version(self):
+        """Highest version on disk, readable or not (0 if none): new versions must go above it."""
+        versions = self._versions()
+        return versions[-1] if versions else 0
+
+    def save(self, version, frame, fetched_at, extra=None):
+        """Write one snapshot, with extra (JSON) details, and remove all but the newest `keep` files."""
+        write_frame(self._path(version), frame,
+                    {"version": version, "fetched_at": fetched_at.isoformat(), "extra": extra})
+        for old in self._versions()[:-self.keep]:
+            with contextlib.suppress(OSError):
+                os.remove(self._path(old))
+
+    def load_latest(self):
+        """(version, frame, fetched_at, extra) of the newest readable snapshot file, or None."""
+        for version in reversed(self._versions()):
+            path = self._path(version)
+            try:
+                loaded = read_frame(path)
+            except (OSError, pa.ArrowInvalid, KeyError, ValueError):
+                logger.warning("Ignoring unreadable snapshot file %s", path)
+                continue
+            if loaded is None:
+                continue
+            frame, info = loaded
+            return info["version"], frame, datetime.fromisoformat(info["fetched_at"]), info.get("extra")
+        return None
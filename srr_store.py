@@ -0,0 +1,233 @@
+import functools
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from srr_data import IncrementalLoader, sheet_source, TIMEZONE, REFRESH_SECONDS
+from srr_archive import CaseArchive, Partition
+from srr_persist import SnapshotFiles
+from srr_trace import span
+
+# Process-wide snapshot store. One background thread per sheet source fetches on a
+# schedule and publishes versioned snapshots; sessions only ever read the latest
+# one, so N open dashboards cost one fetch per refresh window instead of N.
+# Published snapshots are also written to disk (srr_persist.py); after a restart the
+# newest one is published before the first fetch, so a slow sheet does not block startup.
+# Closed cases of past months are moved to a month-partitioned archive (srr_archive.py):
+# a snapshot's frame holds the hot rows, and its partitions the rest.
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """A published version of the canonical frame. The frame is shared by every session: treat it as read-only.
+
+    With an archive, frame holds only the hot rows and partitions the archived months;
+    srr_archive.snapshot_view loads the months a view needs back in.
+    """
+    version: int
+    frame: pd.DataFrame
+    fetched_at: datetime
+    partitions: tuple = ()
+
+
+class SnapshotStore:
+    """Single-flight refresher that publishes immutable, versioned snapshots."""
+
+    def __init__(self, loader, interval=REFRESH_SECONDS, files=None, archive=None):
+        self.loader = loader
+        self.interval = interval
+        self.files = files
+        self.archive = archive
+        self._snapshot = None
+        self._last_version = 0
+        self._error = None
+        self._fetching = False
+        self._fetches = 0  # finished fetches, published or failed
+        self._next_fetch = None  # time.monotonic() of the next scheduled fetch, set as a fetch finishes
+        self._fetch_seconds = 0.0  # duration of the last published fetch
+        self._wake = threading.Event()
+        self._published = threading.Condition()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def latest(self, timeout=None):
+        """Latest snapshot, waiting for the first fetch if nothing has been published yet."""
+        self._ensure_started()
+        with self._published:
+            self._published.wait_for(lambda: self._snapshot is not None or self._error is not None, timeout)
+            if self._snapshot is None and self._error is not None:
+                raise self._error
+            return self._snapshot
+
+    def request_refresh(self, wait=True, timeout=60):
+        """Ask for a fresh snapshot; a fetch already in flight satisfies the request.
+
+        With wait=True, blocks until that fetch has finished (or the timeout passes)
+        and returns the latest snapshot: the previous one if the fetch failed.
+        """
+        self._ensure_started()
+        with self._published:
+            target = self._fetches + 1
+            if not self._fetching:
+                self._wake.set()
+            if wait:
+                self._published.wait_for(lambda: self._fetches >= target, timeout)
+            return self._snapshot
+
+    def next_publish_in(self):
+        """Seconds until the next scheduled fetch should have published a snapshot (0 if due or running)."""
+        with self._published:
+            if self._next_fetch is None or self._fetching:
+                return 0.0
+            return max(0.0, self._next_fetch + self._fetch_seconds - time.monotonic())
+
+    def _ensure_started(self):
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="srr-snapshot-refresher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        self._recover()
+        while True:
+            self._fetch()
+            with self._published:
+                wait = self._next_fetch - time.monotonic()
+            self._wake.wait(max(0.0, wait))
+            self._wake.clear()
+
+    def _recover(self):
+        """Publish the newest snapshot on disk, if nothing has been published yet."""
+        if self.files is None or self._snapshot is not None:
+            return
+        try:
+            self._last_version = self.files.latest_version()
+            saved = self.files.load_latest()
+        except Exception:
+            logger.exception("Could not recover an SRR snapshot from %s", self.files.directory)
+            return
+        if saved is None:
+            return
+        version, frame, fetched_at, extra = saved
+        partitions = tuple(Partition.from_json(info) for info in (extra or {}).get("partitions", []))
+        if self.archive is not None:
+            self.archive.restore(partitions)
+        with self._published:
+            if self._snapshot is None:
+                self._snapshot = Snapshot(version, frame, fetched_at, partitions)
+                self._published.notify_all()
+        logger.info("Recovered SRR snapshot v%d (%d rows) fetched at %s", version, len(frame), fetched_at)
+
+    def _fetch(self):
+        with self._published:
+            self._fetching = True
+        started = time.monotonic()
+        try:
+            with span("store", "sheet_fetch") as fetched:
+                frame = self.loader.refresh()
+                fetched.rows = len(frame)
+            partitions = ()
+            if self.archive is not None:
+                with span("store", "archive_sync") as synced:
+                    frame, partitions = self.archive.sync(frame, getattr(self.loader, "changed_from", 0))
+                    synced.rows = len(frame)
+        except Exception as e:
+            logger.exception("SRR sheet refresh failed")
+            with self._published:
+                self._error = e
+                self._fetching = False
+                self._fetches += 1
+                self._next_fetch = time.monotonic() + self.interval
+                self._published.notify_all()
+            return
+        with self._published:
+            version = max(self._snapshot.version if self._snapshot else 0, self._last_version) + 1
+            self._last_version = version
+            snapshot = self._snapshot = Snapshot(version, frame, datetime.now(TIMEZONE), partitions)
+            self._error = None
+            self._fetching = False
+            self._fetches += 1
+            self._fetch_seconds = time.monotonic() - started
+            self._next_fetch = time.monotonic() + self.interval
+            self._published.notify_all()
+        logger.info("Published SRR snapshot v%d (%d rows) in %.2fs", version, len(frame), time.monotonic() - started)
+        if self.files is not None:
+            try:
+                with span("store", "snapshot_save", rows=len(frame)):
+                    self.files.save(snapshot.version, snapshot.frame, snapshot.fetched_at,
+                                    {"partitions": [partition.to_json() for partition in partitions]})
+            except Exception:
+                logger.exception("Could not save SRR snapshot v%d to %s", version, self.files.directory)
+
+
+@st.cache_resource(show_spinner=False)  # called on every fragment tick: no spinner thread or delta
+def get_store(source="csv"):
+    """One SnapshotStore per sheet source, shared by every session of the process."""
+    return SnapshotStore(IncrementalLoader(sheet_source(source)), files=SnapshotFiles(source), archive=CaseArchive(source))
+
+
+# Every per_snapshot cache, for memory accounting (srr_memory.py)
+derived_caches = []
+
+
+def per_snapshot(maxsize=4):
+    """Decorator for structures derived from a snapshot: built once per snapshot, keeping the last `maxsize`.
+
+    Snapshots are matched by identity, so a structure is shared by every
+    session rendering that snapshot and dropped once `maxsize` more recently
+    used ones replace it. The wrapper's entries() lists the cached
+    (snapshot, structure) pairs.
+    """
+    def decorate(build):
+        cached = []  # most recently used last
+        lock = threading.Lock()
+
+        @functools.wraps(build)
+        def wrapper(snapshot):
+            with lock:
+                for i, (seen, value) in enumerate(cached):
+                    if seen is snapshot:
+                        cached.append(cached.pop(i))
+                        return value
+            value = build(snapshot)
+            with lock:
+                for seen, built in cached:
+                    if seen is snapshot:  # another session built it meanwhile; share that one
+                        return built
+                cached.append((snapshot, value))
+                del cached[:-maxsize]
+            return value
+
+        def entries():
+            with lock:
+                return list(cached)
+        wrapper.entries = entries
+        derived_caches.append(wrapper)
+        return wrapper
+    return decorate
+
+
+def prefetch_snapshot(source="csv"):
+    """Start the store's first fetch (or disk recovery) without waiting for it."""
+    get_store(source)._ensure_started()
+
+
+def current_snapshot(source="csv"):
+    return get_store(source).latest()
+
+
+def load_data(source="csv"):
+    """Canonical SRR frame from the latest snapshot. Shared across sessions: do not modify it in place."""
+    return current_snapshot(source).frame
+
+
+def refresh_data(source="csv"):
+    """Refresh Data button: coalesces with any fetch already in flight and waits for the result."""
+    return get_store(source).request_refresh(wait=True)
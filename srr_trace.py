@@ -0,0 +1,196 @@
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Stage timings for the SRR dashboards. Each script run is split into named stages
+# (trace_run / lap), and the background work (sheet fetches, archive syncs, asset
+# downloads) is wrapped in spans. Every finished span goes into a process-wide ring
+# buffer, with running totals per stage. The timings are served as Prometheus text
+# on SRR_METRICS_PORT (when set) and, with ?debug=timings in the URL, in a sidebar
+# panel (srr_ui.timings_panel). SRR_TRACE=0 turns recording off: spans and laps are
+# then no-ops.
+
+logger = logging.getLogger(__name__)
+
+TRACE_ENABLED = os.environ.get("SRR_TRACE", "1") != "0"
+TRACE_BUFFER_SIZE = 4096  # spans kept for the quantiles
+METRICS_PORT = int(os.environ.get("SRR_METRICS_PORT", 0))  # 0: no metrics server
+QUANTILES = (0.5, 0.9, 0.99)
+
+Span = namedtuple("Span", "app stage started seconds rows")
+
+
+class SpanBuffer:
+    """The last `size` spans, plus count / total seconds per (app, stage) since the process started."""
+
+    def __init__(self, size=TRACE_BUFFER_SIZE):
+        self.spans = deque(maxlen=size)
+        self.totals = {}  # (app, stage) -> [count, seconds]
+        self._lock = threading.Lock()
+
+    def record(self, span):
+        with self._lock:
+            self.spans.append(span)
+            totals = self.totals.setdefault((span.app, span.stage), [0, 0.0])
+            totals[0] += 1
+            totals[1] += span.seconds
+
+    def snapshot(self):
+        """(spans, totals) as of now, safe to read without the lock."""
+        with self._lock:
+            return list(self.spans), {key: tuple(value) for key, value in self.totals.items()}
+
+
+buffer = SpanBuffer()
+
+
+class _Span:
+    def __init__(self, rows):
+        self.rows = rows
+
+
+@contextmanager
+def span(app, stage, rows=None):
+    """Time the block as (app, stage); set .rows on the yielded object to record a row count."""
+    if not TRACE_ENABLED:
+        yield _Span(rows)
+        return
+    current = _Span(rows)
+    started, wall = time.perf_counter(), time.time()
+    try:
+        yield current
+    finally:
+        buffer.record(Span(app, stage, wall, time.perf_counter() - started, current.rows))
+
+
+class ScriptRun:
+    """Stage timer for one run of a dashboard script: lap(stage) closes the stage that ran since the last lap."""
+
+    def __init__(self, app):
+        self.app = app
+        self.started = self._last = time.perf_counter()
+        self._wall = time.time()
+
+    def lap(self, stage, rows=None):
+        now = time.perf_counter()
+        buffer.record(Span(self.app, stage, self._wall + (self._last - self.started), now - self._last, rows))
+        self._last = now
+
+    def end(self, rows=None):
+        """Record the whole run as the "script" stage."""
+        buffer.record(Span(self.app, "script", self._wall, time.perf_counter() - self.started, rows))
+
+
+class _NoRun:
+    def lap(self, stage, rows=None):
+        pass
+
+    def end(self, rows=None):
+        pass
+
+
+_NO_RUN = _NoRun()
+
+
+def trace_run(app):
+    """ScriptRun for the script run starting now (a no-op one with SRR_TRACE=0)."""
+    if not TRACE_ENABLED:
+        return _NO_RUN
+    if METRICS_PORT:
+        serve_metrics(METRICS_PORT)
+    return ScriptRun(app)
+
+
+def _quantile(ordered, q):
+    # Nearest rank: the smallest span with at least q of the spans at or below it
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def _by_stage(spans):
+    by_stage = {}
+    for item in spans:
+        by_stage.setdefault((item.app, item.stage), []).append(item)
+    return by_stage
+
+
+def stage_summary():
+    """(app, stage, runs, last seconds, quantile seconds..., max seconds, last rows) per stage in the ring buffer."""
+    spans, totals = buffer.snapshot()
+    rows = []
+    for (app, stage), items in sorted(_by_stage(spans).items()):
+        ordered = sorted(item.seconds for item in items)
+        rows.append((app, stage, totals[(app, stage)][0], items[-1].seconds,
+                     *(_quantile(ordered, q) for q in QUANTILES), ordered[-1], items[-1].rows))
+    return rows
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text():
+    """The stage timings in the Prometheus text exposition format."""
+    spans, totals = buffer.snapshot()
+    by_stage = _by_stage(spans)
+    lines = [
+        "# HELP srr_stage_seconds Time spent in each dashboard stage (quantiles over the most recent spans).",
+        "# TYPE srr_stage_seconds summary",
+    ]
+    for (app, stage), (count, seconds) in sorted(totals.items()):
+        labels = f'app="{_label(app)}",stage="{_label(stage)}"'
+        ordered = sorted(item.seconds for item in by_stage.get((app, stage), ()))
+        if ordered:
+            for q in QUANTILES:
+                lines.append(f'srr_stage_seconds{{{labels},quantile="{q}"}} {_quantile(ordered, q):.6f}')
+        lines.append(f"srr_stage_seconds_sum{{{labels}}} {seconds:.6f}")
+        lines.append(f"srr_stage_seconds_count{{{labels}}} {count}")
+    lines += [
+        "# HELP srr_stage_rows Rows handled by the latest span of each stage.",
+        "# TYPE srr_stage_rows gauge",
+    ]
+    for (app, stage), items in sorted(by_stage.items()):
+        if items[-1].rows is not None:
+            lines.append(f'srr_stage_rows{{app="{_label(app)}",stage="{_label(stage)}"}} {items[-1].rows}')
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # scrapes would flood the Streamlit log
+        pass
+
+
+_server_started = False
+_server_lock = threading.Lock()
+
+
+def serve_metrics(port=METRICS_PORT):
+    """Serve prometheus_text() at http://<host>:port/metrics from a daemon thread; only the first call starts it."""
+    global _server_started
+    with _server_lock:
+        if _server_started:
+            return
+        _server_started = True  # also after a failure, so a taken port is not retried on every run
+        try:
+            server = ThreadingHTTPServer(("", port), _MetricsHandler)
+        except OSError:
+            logger.exception("Could not serve SRR metrics on port %d", port)
+            return
+        threading.Thread(target=server.serve_forever, name="srr-metrics", daemon=True).start()
+        logger.info("Serving SRR stage metrics at http://localhost:%d/metrics", port)
+
@@ -0,0 +1,72 @@
+import pandas as pd
+import streamlit as st
+import streamlit.components.v1 as components
+
+from srr_store import get_store
+from srr_trace import METRICS_PORT, QUANTILES, TRACE_ENABLED, buffer, stage_summary
+
+# An open tab asks the store whether a newer snapshot exists once, just after the store's
+# next fetch should have published one (the countdown's deadline), rather than on a short
+# fixed period: every fragment run costs the server a script run. The question is a
+# version comparison, not a fetch; the fetch itself happens once per process in srr_store.
+PUBLISH_GRACE_SECONDS = 5  # ask this long after the expected publish
+MIN_POLL_SECONDS = 15  # while a fetch is due, running or late, ask at most this often
+
+
+def debug_requested(panel):
+    """Whether the URL asks for a debug panel, e.g. ?debug=memory or ?debug=memory,timings."""
+    return panel in st.query_params.get("debug", "").split(",")
+
+
+def watch_snapshot(source, rendered_version):
+    """Rerun the app once the store has published a newer snapshot than the one on screen.
+
+    The browser reruns the check on its own timer, set from the store's schedule on
+    every full run of the app, so between snapshots the server does no work for the tab.
+    """
+    wait = max(MIN_POLL_SECONDS, get_store(source).next_publish_in() + PUBLISH_GRACE_SECONDS)
+    st.experimental_fragment(_check_snapshot, run_every=wait)(source, rendered_version)
+
+
+def _check_snapshot(source, rendered_version):
+    if get_store(source).latest().version != rendered_version:
+        st.rerun()
+
+
+def countdown(source):
+    """Sidebar "Time to refresh" countdown to the store's next publish, ticking in the browser."""
+    remaining = int(get_store(source).next_publish_in())
+    with st.sidebar:
+        components.html(f"""
+            <p id="countdown" style="color:red; font-family:'Source Sans Pro', sans-serif; margin:0;"></p>
+            <script>
+            const deadline = Date.now() + {remaining} * 1000;
+            const label = document.getElementById("countdown");
+            function tick() {{
+                const left = Math.max(0, Math.round((deadline - Date.now()) / 1000));
+                const mins = String(Math.floor(left / 60)).padStart(2, "0");
+                const secs = String(left % 60).padStart(2, "0");
+                label.textContent = left > 0 ? `Time to refresh: ${{mins}}:${{secs}}` : "Refreshing...";
+            }}
+            tick();
+            setInterval(tick, 1000);
+            </script>
+            """, height=30)
+
+
+def timings_panel():
+    """With ?debug=timings in the URL, a sidebar table of the stage timings in the ring buffer."""
+    if not debug_requested("timings"):
+        return
+    with st.sidebar.expander("Timings", expanded=True):
+        if not TRACE_ENABLED:
+            st.caption("Tracing is off (SRR_TRACE=0).")
+            return
+        columns = ["App", "Stage", "Runs", "Last"] + [f"p{round(q * 100)}" for q in QUANTILES] + ["Max", "Rows"]
+        summary = pd.DataFrame(stage_summary(), columns=columns)
+        for col in ["Last", *columns[4:-1]]:
+            summary[col] = (summary[col] * 1000).round(1)  # milliseconds
+        summary["Rows"] = summary["Rows"].astype("Int64")
+        st.caption(f"Milliseconds over the last {len(buffer.spans):,} spans"
+                   + (f"; Prometheus text at :{METRICS_PORT}/metrics" if METRICS_PORT else ""))
+        st.dataframe(summary, hide_index=True, use_container_width=True)
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The dashboards are flat modules at the repository root, as `streamlit run` sees them
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "benchmarks")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
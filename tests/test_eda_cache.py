@@ -0,0 +1,83 @@
+import io
+import os
+import pickle
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from eda_cache import SizedLRUCache, UploadCache, private_dir, upload_key
+from eda_ingest import read_upload
+from eda_profile import profile_frame
+
+
+def csv_file(rows=500):
+    frame = pd.DataFrame({"id": np.arange(rows), "kind": np.where(np.arange(rows) % 3, "a", None),
+                          "value": np.arange(rows) % 7 * 1.5})
+    return io.BytesIO(frame.to_csv(index=False).encode())
+
+
+def test_sized_cache_evicts_the_least_recently_used_beyond_its_bytes():
+    cache = SizedLRUCache(100)
+    cache.put("a", "A", 40)
+    cache.put("b", "B", 40)
+    assert cache.get("a") == "A"  # now the most recent
+    cache.put("c", "C", 40)
+    assert cache.get("b") is None and cache.get("a") == "A" and cache.get("c") == "C"
+    assert cache.nbytes == 80
+    cache.put("a", "A2", 70)  # replacing an entry frees its old size first
+    assert cache.get("c") is None and cache.get("a") == "A2" and cache.nbytes == 70
+    cache.put("big", "X", 101)  # larger than the whole cache: not kept
+    assert cache.get("big") is None and cache.nbytes == 70
+
+
+def test_cache_directory_is_private(tmp_path):
+    directory = tmp_path / "cache"
+    assert private_dir(str(directory)) == str(directory)
+    assert os.stat(directory).st_mode & 0o777 == 0o700
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")
+def test_shared_cache_directory_is_not_read(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))  # where the fallback directory goes
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o777)
+    key = upload_key("0" * 64, True)
+    (shared / key).mkdir()
+    (shared / key / "profile-exact.pkl").write_bytes(pickle.dumps("planted"))
+
+    cache = UploadCache(str(shared))
+    assert cache.directory != str(shared)
+    assert os.stat(cache.directory).st_mode & 0o777 == 0o700
+    profile = profile_frame(pd.read_csv(csv_file()))
+    assert cache.profile(key, "exact", lambda: profile) is profile
+
+
+def test_symlinked_cache_directory_is_not_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    target = tmp_path / "target"
+    target.mkdir(mode=0o700)
+    (tmp_path / "link").symlink_to(target)
+    assert private_dir(str(tmp_path / "link")) != str(tmp_path / "link")
+
+
+def test_profiles_are_sized_by_their_arrays():
+    frame = pd.read_csv(csv_file())
+    profile = profile_frame(frame)
+    rows = sum(rows.nbytes for col in profile.columns for rows in (col.null_rows, col.duplicate_rows))
+    assert rows <= profile.memory_bytes() < rows + 20_000
+
+
+def test_uploads_and_profiles_survive_a_restart(tmp_path):
+    directory = str(tmp_path / "cache")
+    key = upload_key("1" * 64, True)
+    upload = UploadCache(directory).upload(key, lambda: read_upload(csv_file(), "data.csv"))
+    profile = UploadCache(directory).profile(key, "exact", lambda: profile_frame(upload.frame))
+
+    restarted = UploadCache(directory)
+    cached = restarted.upload(key, lambda: pytest.fail("read again"))
+    pd.testing.assert_frame_equal(cached.frame, upload.frame)
+    again = restarted.profile(key, "exact", lambda: pytest.fail("profiled again"))
+    pd.testing.assert_frame_equal(again.describe(), profile.describe())
@@ -0,0 +1,56 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import eda_ingest
+from eda_ingest import read_upload
+from eda_profile import profile_frame, row_indexes
+
+
+@pytest.fixture(scope="module")
+def frame():
+    rng = np.random.default_rng(4)
+    n = 3000
+    return pd.DataFrame({
+        "int": rng.integers(0, 2000, n),
+        "float": np.where(rng.random(n) < 0.1, np.nan, rng.integers(0, 500, n) / 4),
+        "text": pd.Series(np.where(rng.random(n) < 0.2, None, rng.choice(["b", "a", "c"], n)), dtype=object),
+        "category": pd.Categorical(rng.choice(["y", "x", "z"], n)),
+        "mixed": pd.Series([1, "1", 2.5, None] * (n // 4), dtype=object),  # values that do not sort together
+        "unique": np.arange(n),
+    })
+
+
+def expected_rows(series):
+    nulls = np.flatnonzero(series.isnull().to_numpy())
+    duplicated = series[series.duplicated(keep=False)]
+    try:
+        duplicated = duplicated.sort_values(kind="stable", na_position="last")
+    except TypeError:  # unsortable: first appearance, as the profiler keeps it
+        order = pd.factorize(duplicated)[0]
+        duplicated = duplicated.iloc[np.argsort(np.where(order < 0, order.max() + 1, order), kind="stable")]
+    return nulls, series.index.get_indexer(duplicated.index)
+
+
+@pytest.mark.parametrize("col", ["int", "float", "text", "category", "mixed", "unique"])
+def test_drilldown_rows_match_the_pandas_selection(frame, col):
+    nulls, duplicates = expected_rows(frame[col])
+    profile = profile_frame(frame).column(col)
+    np.testing.assert_array_equal(profile.null_rows, nulls)
+    np.testing.assert_array_equal(profile.duplicate_rows, duplicates)
+    got_nulls, got_duplicates = row_indexes(frame[col])
+    np.testing.assert_array_equal(got_nulls, nulls)
+    np.testing.assert_array_equal(got_duplicates, duplicates)
+
+
+def test_pages_of_a_spilled_upload_match_the_frame(frame, tmp_path, monkeypatch):
+    monkeypatch.setattr(eda_ingest, "SPILL_DIR", str(tmp_path))
+    monkeypatch.setattr(eda_ingest, "ROW_GROUP_ROWS", 256)
+    data = frame.drop(columns=["category", "mixed"]).to_csv(index=False).encode()
+    upload = read_upload(io.BytesIO(data), "data.csv", compact=False, chunk_rows=1000, spill_bytes=0)
+    expected = pd.read_csv(io.BytesIO(data))
+    duplicates = profile_frame(expected).column("float").duplicate_rows
+    for page in (duplicates[:50], duplicates[-50:]):
+        pd.testing.assert_frame_equal(upload.take(page), expected.iloc[page])
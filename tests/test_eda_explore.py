@@ -0,0 +1,103 @@
+import gc
+import types
+import weakref
+
+from pygwalker.api.streamlit import StreamlitRenderer
+from pygwalker.communications.streamlit_comm import streamlit_comm_map
+
+from eda_explore import RendererRegistry, dispose_renderer
+
+
+class Renderer:
+    def __init__(self, key):
+        self.key = key
+        self.walker = types.SimpleNamespace(gid=key)  # as pygwalker's renderers carry their gid
+
+
+def registry(active=None, **kwargs):
+    disposed = []
+    renderers = RendererRegistry(dispose=lambda renderer: disposed.append(renderer.key),
+                                 is_active=lambda session: active is None or session in active, **kwargs)
+    created = []
+
+    def acquire(key, session, nbytes=1):
+        def create():
+            created.append(key)
+            return Renderer(key), nbytes
+        return renderers.acquire(key, session, create)
+
+    return renderers, acquire, created, disposed
+
+
+def test_sessions_share_a_renderer_per_key():
+    renderers, acquire, created, disposed = registry()
+    assert acquire("a", "s1") is acquire("a", "s2")
+    assert created == ["a"] and len(renderers) == 1 and not disposed
+
+
+def test_switching_files_disposes_of_the_renderer_nobody_shows():
+    renderers, acquire, created, disposed = registry()
+    acquire("a", "s1")
+    acquire("a", "s2")
+    acquire("b", "s1")
+    assert not disposed  # s2 still shows a
+    acquire("b", "s2")
+    assert disposed == ["a"] and len(renderers) == 1
+
+
+def test_release_disposes_once_the_last_session_lets_go():
+    renderers, acquire, created, disposed = registry()
+    acquire("a", "s1")
+    acquire("a", "s2")
+    renderers.release("s1")
+    assert not disposed
+    renderers.release("s2")
+    assert disposed == ["a"] and len(renderers) == 0
+    renderers.release("s2")  # nothing left to release
+    assert disposed == ["a"]
+
+
+def test_closed_sessions_stop_holding_renderers():
+    active = {"s1", "s2"}
+    renderers, acquire, created, disposed = registry(active)
+    acquire("a", "s1")
+    acquire("b", "s2")
+    active.discard("s1")  # the browser tab was closed without clearing the upload
+    acquire("c", "s2")
+    assert disposed == ["a", "b"] and len(renderers) == 1
+
+
+def test_least_recently_used_renderers_go_beyond_the_count():
+    renderers, acquire, created, disposed = registry(max_renderers=2)
+    for key, session in [("a", "s1"), ("b", "s2"), ("a", "s3"), ("c", "s4")]:
+        acquire(key, session)
+    assert disposed == ["b"] and len(renderers) == 2
+
+
+def test_renderers_go_beyond_the_byte_budget_but_not_the_one_asked_for():
+    renderers, acquire, created, disposed = registry(max_bytes=100)
+    acquire("a", "s1", nbytes=60)
+    acquire("b", "s2", nbytes=60)
+    assert disposed == ["a"]
+    assert acquire("huge", "s3", nbytes=500).key == "huge"
+    assert disposed == ["a", "b"] and len(renderers) == 1
+
+
+def test_dispose_unregisters_the_renderer_from_pygwalker():
+    renderer, other = Renderer("upload-key"), Renderer("other-key")
+    html_cache = StreamlitRenderer._get_html_with_params_str_cache.cache
+    streamlit_comm_map["upload-key"] = renderer
+    streamlit_comm_map["other-key"] = other
+    html_cache[(renderer, "params")] = "<html>"
+    html_cache[(other, "params")] = "<html>"
+    try:
+        alive = weakref.ref(renderer)
+        dispose_renderer(renderer)
+        assert "upload-key" not in streamlit_comm_map and (renderer, "params") not in html_cache
+        assert streamlit_comm_map["other-key"] is other and (other, "params") in html_cache
+        del renderer
+        gc.collect()
+        assert alive() is None
+    finally:
+        streamlit_comm_map.pop("other-key", None)
+        html_cache.pop((other, "params"), None)
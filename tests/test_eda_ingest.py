@@ -0,0 +1,83 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import eda_ingest
+from eda_ingest import read_upload
+
+CHUNK_ROWS = 300
+
+
+@pytest.fixture(autouse=True)
+def spill_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(eda_ingest, "SPILL_DIR", str(tmp_path / "spill"))
+
+
+def csv_bytes(n=1000):
+    rng = np.random.default_rng(1)
+    return pd.DataFrame({
+        "id": np.arange(n),
+        "late_nan": np.r_[np.arange(n - 10), [np.nan] * 10],  # int in the first chunks, float in the last
+        "late_text": [f"{i:03d}" for i in range(n - 1)] + ["x"],  # numbers until the last row
+        "repeated": rng.choice(["a", "b", None], n),
+        "unique": [f"u{i}" for i in range(n)],
+        "float": rng.random(n),
+        "flag": rng.random(n) < 0.5,
+    }).to_csv(index=False).encode()
+
+
+def read(data, compact, spill):
+    return read_upload(io.BytesIO(data), "data.csv", compact=compact, chunk_rows=CHUNK_ROWS,
+                       spill_bytes=0 if spill else len(data) + 1)
+
+
+def whole(upload):
+    return pd.DataFrame({col: upload.column(col) for col in upload.columns}, columns=upload.columns)
+
+
+@pytest.mark.parametrize("spill", [False, True])
+def test_chunked_read_equals_read_csv(spill):
+    data = csv_bytes()
+    expected = pd.read_csv(io.BytesIO(data))
+    upload = read(data, compact=False, spill=spill)
+    assert upload.spilled == spill and upload.shape == expected.shape
+    pd.testing.assert_frame_equal(whole(upload), expected)
+    pd.testing.assert_frame_equal(upload.head, expected.head(eda_ingest.PREVIEW_ROWS))
+    pd.testing.assert_frame_equal(upload.tail, expected.tail(eda_ingest.PREVIEW_ROWS))
+
+
+@pytest.mark.parametrize("spill", [False, True])
+def test_compact_read_keeps_the_values(spill):
+    data = csv_bytes()
+    expected = pd.read_csv(io.BytesIO(data))
+    frame = whole(read(data, compact=True, spill=spill))
+    assert isinstance(frame["repeated"].dtype, pd.CategoricalDtype) and frame["unique"].dtype == object
+    assert frame["id"].dtype == np.int16
+    pd.testing.assert_frame_equal(frame.astype(object), expected.astype(object))
+
+
+@pytest.mark.parametrize("spill", [False, True])
+@pytest.mark.parametrize("compact", [False, True])
+def test_header_only_file(compact, spill):
+    upload = read(b"a,b\n", compact=compact, spill=spill)
+    assert upload.shape == (0, 2)
+    frame = whole(upload)
+    assert list(frame.columns) == ["a", "b"] and frame.empty
+    assert upload.take([]).empty and upload.sample().empty
+
+
+def test_spilled_rows_are_taken_in_the_order_asked():
+    data = csv_bytes()
+    expected = pd.read_csv(io.BytesIO(data))
+    upload = read(data, compact=False, spill=True)
+    positions = [999, 0, 301, 300, 5]
+    pd.testing.assert_frame_equal(upload.take(positions), expected.iloc[positions])
+
+
+def test_spill_is_removed_on_close(tmp_path):
+    upload = read(csv_bytes(), compact=True, spill=True)
+    assert len(upload.parts) == 4 and (tmp_path / "spill").exists()
+    upload.close()
+    assert not any((tmp_path / "spill").iterdir())
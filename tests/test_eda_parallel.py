@@ -0,0 +1,70 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import eda_ingest
+import eda_parallel
+from eda_ingest import read_upload
+from eda_parallel import profile_upload
+from eda_profile import profile_frame
+
+
+@pytest.fixture(autouse=True)
+def small_uploads_in_parallel(tmp_path, monkeypatch):
+    monkeypatch.setattr(eda_ingest, "SPILL_DIR", str(tmp_path))
+    monkeypatch.setattr(eda_parallel, "PARALLEL_MIN_CELLS", 0)
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(5)
+    n = 5000
+    return pd.DataFrame({
+        "int": rng.integers(0, 300, n),
+        "float": np.where(rng.random(n) < 0.1, np.nan, rng.normal(size=n).round(2)),
+        "text": rng.choice(["a", "b", "c", None], n),
+        "mixed": [1, "one", 2.5, None] * (n // 4),  # stays in memory as objects Arrow cannot store
+        "unique": [f"u{i}" for i in range(n)],
+    }).to_csv(index=False).encode()
+
+
+def assert_same_profile(got, expected):
+    pd.testing.assert_frame_equal(got.describe(), expected.describe())
+    pd.testing.assert_series_equal(got.unique_counts(), expected.unique_counts())
+    pd.testing.assert_series_equal(got.null_counts(), expected.null_counts())
+    pd.testing.assert_series_equal(got.duplicate_counts(), expected.duplicate_counts())
+    for mine, theirs in zip(got.columns, expected.columns):
+        np.testing.assert_array_equal(mine.null_rows, theirs.null_rows)
+        np.testing.assert_array_equal(mine.duplicate_rows, theirs.duplicate_rows)
+
+
+@pytest.mark.parametrize("spill", [False, True])
+def test_parallel_profile_matches_the_serial_one(data, spill):
+    upload = read_upload(io.BytesIO(data), "data.csv", chunk_rows=2000, spill_bytes=0 if spill else len(data) + 1)
+    assert upload.spilled == spill
+    expected = profile_frame(pd.DataFrame({col: upload.column(col) for col in upload.columns}))
+    reported = []
+    got = profile_upload(upload, workers=2, progress=lambda fraction, text: reported.append(fraction))
+    assert_same_profile(got, expected)
+    assert got.shape == upload.shape and reported[-1] == 1
+    assert eda_parallel._pool is not None  # profiled by the workers, not the serial fallback
+
+
+def test_spilled_parallel_profile_matches_pandas(data):
+    upload = read_upload(io.BytesIO(data), "data.csv", compact=False, chunk_rows=2000, spill_bytes=0)
+    frame = pd.read_csv(io.BytesIO(data))
+    got = profile_upload(upload, workers=2)
+    pd.testing.assert_frame_equal(got.describe(), frame.describe(include="all"))
+    pd.testing.assert_series_equal(got.unique_counts(), frame.nunique())
+    pd.testing.assert_series_equal(got.null_counts(), frame.isnull().sum())
+
+
+@pytest.mark.parametrize("spill", [False, True])
+def test_parallel_sketches_match_the_serial_ones(data, spill):
+    upload = read_upload(io.BytesIO(data), "data.csv", chunk_rows=2000, spill_bytes=0 if spill else len(data) + 1)
+    got = profile_upload(upload, approximate=True, workers=2)
+    expected = profile_upload(upload, approximate=True, workers=1)
+    pd.testing.assert_frame_equal(got.describe(), expected.describe())
+    pd.testing.assert_frame_equal(got.error_bounds(), expected.error_bounds())
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from eda_profile import profile_frame
+
+
+@pytest.fixture(scope="module")
+def frame():
+    rng = np.random.default_rng(0)
+    n = 2000
+    return pd.DataFrame({
+        "int": rng.integers(0, 50, n),
+        "float": np.where(rng.random(n) < 0.1, np.nan, rng.normal(10, 3, n)),
+        "text": pd.Series(rng.choice(["a", "b", "c", None], n), dtype=object),
+        "flag": rng.random(n) < 0.3,
+        "when": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 90, n), unit="D"),
+        "category": pd.Categorical(rng.choice(["x", "y"], n)),
+        "nullable": pd.array(np.where(rng.random(n) < 0.2, None, rng.integers(0, 5, n)), dtype="Int64"),
+        "empty": pd.Series([np.nan] * n, dtype=object),
+    })
+
+
+@pytest.mark.filterwarnings("ignore:Treating datetime data:FutureWarning")
+def test_profile_matches_pandas(frame):
+    profile = profile_frame(frame)
+    pd.testing.assert_frame_equal(profile.describe(), frame.describe(include="all"))
+    pd.testing.assert_series_equal(profile.unique_counts(), frame.nunique())
+    pd.testing.assert_series_equal(profile.null_counts(), frame.isnull().sum())
+    pd.testing.assert_series_equal(profile.duplicate_counts(),
+                                   pd.Series({col: frame.duplicated(subset=[col]).sum() for col in frame}))
+    for col in frame:
+        pd.testing.assert_series_equal(profile.column(col).top_values, frame[col].value_counts().head(10),
+                                       check_names=False, check_index_type=False, check_dtype=False)
+
+
+def test_profile_of_an_empty_frame_matches_pandas():
+    frame = pd.DataFrame({"int": pd.Series([], dtype=np.int64), "text": pd.Series([], dtype=object)})
+    profile = profile_frame(frame)
+    pd.testing.assert_frame_equal(profile.describe(), frame.describe(include="all"))
+    assert profile.null_counts().tolist() == [0, 0] and profile.shape == (0, 2)
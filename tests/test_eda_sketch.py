@@ -0,0 +1,91 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from eda_profile import profile_column, sketch_column
+from eda_sketch import CMS_DEPTH, CountMinSketch, HyperLogLog, KLLSketch, hash_values
+
+
+def chunks(values, size=50_000):
+    return [values[start:start + size] for start in range(0, len(values), size)]
+
+
+def test_equal_values_hash_equally_across_dtypes():
+    ints = hash_values(pd.Series([1, 2, 3]))
+    floats = hash_values(pd.Series([1.0, 2.0, 3.0, np.nan]).dropna())
+    categories = hash_values(pd.Series(["a", "b"], dtype="category"))
+    assert (ints == floats).all()
+    assert (categories == hash_values(pd.Series(["a", "b"], dtype=object))).all()
+
+
+def test_hyperloglog_is_exact_for_few_values():
+    sketch = HyperLogLog()
+    for piece in chunks(np.arange(5000) % 1000):
+        sketch.update(hash_values(pd.Series(piece)))
+    assert sketch.count() == 1000 and sketch.error() == 0
+
+
+@pytest.mark.parametrize("distinct", [20_000, 300_000])
+def test_hyperloglog_stays_within_its_bound(distinct):
+    rng = np.random.default_rng(distinct)
+    values = rng.permutation(np.tile(np.arange(distinct), 2))  # every value twice
+    sketch = HyperLogLog()
+    for piece in chunks(values):
+        sketch.update(hash_values(pd.Series(piece)))
+    assert not sketch.exact
+    assert abs(sketch.count() - distinct) <= sketch.error()
+    assert sketch.error() < 0.02 * distinct
+
+
+def test_kll_is_exact_for_few_values():
+    values = np.random.default_rng(0).normal(size=5000)
+    sketch = KLLSketch()
+    sketch.update(values)
+    q = [0.25, 0.5, 0.75]
+    np.testing.assert_array_equal(sketch.quantile(q), np.quantile(values, q))
+    assert sketch.rank_error() == 0
+
+
+def test_kll_ranks_stay_within_its_bound():
+    values = np.random.default_rng(1).exponential(size=1_000_000)
+    sketch = KLLSketch()
+    for piece in chunks(values):
+        sketch.update(piece)
+    assert not sketch.exact and sum(len(level) for level in sketch.levels) < 5000
+    ordered = np.sort(values)
+    q = np.array([0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99])
+    ranks = np.searchsorted(ordered, sketch.quantile(q)) / len(values)
+    assert (np.abs(ranks - q) <= sketch.rank_error()).all()
+
+
+def test_count_min_never_undercounts_and_stays_within_its_bound():
+    rng = np.random.default_rng(2)
+    values = rng.zipf(1.3, 500_000) % 50_000
+    sketch = CountMinSketch()
+    for piece in chunks(values):
+        hashes, counts = np.unique(hash_values(pd.Series(piece)), return_counts=True)
+        sketch.update(hashes, counts)
+    truth = pd.Series(values).value_counts()
+    over = sketch.estimate(hash_values(pd.Series(truth.index))) - truth.to_numpy()
+    assert (over >= 0).all()
+    assert (over > sketch.error()).mean() <= math.exp(-CMS_DEPTH)
+
+
+def test_sketched_column_is_within_its_bounds_of_the_exact_profile():
+    rng = np.random.default_rng(3)
+    series = pd.Series(np.where(rng.random(400_000) < 0.05, np.nan, rng.zipf(1.5, 400_000) % 100_000), name="x")
+    exact = profile_column(series)
+    sketched = sketch_column("x", chunks(series))
+    assert (sketched.count, sketched.nulls, sketched.min, sketched.max) == (exact.count, exact.nulls, exact.min, exact.max)
+    assert sketched.mean == pytest.approx(exact.mean) and sketched.std == pytest.approx(exact.std)
+    assert abs(sketched.distinct - exact.distinct) <= sketched.errors["distinct"]
+    assert abs(sketched.duplicates - exact.duplicates) <= sketched.errors["duplicates"]
+    assert list(sketched.top_values.index[:3]) == list(exact.top_values.index[:3])
+    assert 0 <= sketched.top_values.iloc[0] - exact.top_values.iloc[0] <= sketched.errors["freq"]
+    ordered = np.sort(series.dropna().to_numpy())
+    for q, value in zip([0.25, 0.5, 0.75], sketched.quantiles.values()):
+        low, high = np.searchsorted(ordered, value, "left"), np.searchsorted(ordered, value, "right")
+        rank = np.clip(q * len(ordered), low, high) / len(ordered)
+        assert abs(rank - q) <= sketched.errors["percentile"]
@@ -0,0 +1,127 @@
+import pandas as pd
+import pytest
+
+from srr_data import CsvSheet, IncrementalLoader, normalize
+from synthetic import make_sheet
+
+
+@pytest.fixture
+def sheet(tmp_path):
+    """A local copy of the published CSV export: (path, raw sheet)."""
+    path = tmp_path / "sheet.csv"
+    raw = make_sheet(400)
+    raw.to_csv(path, index=False)
+    return path, raw
+
+
+def full_frame(path):
+    return normalize(pd.read_csv(path))
+
+
+def write(path, raw):
+    raw.to_csv(path, index=False)
+
+
+class FlakySheet(CsvSheet):
+    """CsvSheet whose tail reads (start > 0) fail while tail_fails is set, and every read while down is."""
+
+    tail_fails = True
+    down = False
+
+    def read(self, start=0):
+        if self.down or (start and self.tail_fails):
+            raise OSError("sheet unavailable")
+        return super().read(start)
+
+
+def test_unchanged_sheet_refreshes_to_the_same_frame(sheet):
+    path, _ = sheet
+    loader = IncrementalLoader(CsvSheet(str(path)))
+    for _ in range(3):
+        frame = loader.refresh()
+        pd.testing.assert_frame_equal(frame, full_frame(path))
+    assert loader.refreshes == 3
+    assert loader.changed_from > 0
+
+
+def test_tail_of_only_open_cases(sheet):
+    # No SME on any open case: the tail's SME columns are all blank and read as float
+    path, raw = sheet
+    open_rows = raw['Status'] != 'Closed'
+    raw.loc[open_rows, 'Status'] = 'In Queue'
+    raw.loc[open_rows, ['SME', 'In process (On It SME)']] = None
+    write(path, raw)
+
+    loader = IncrementalLoader(CsvSheet(str(path)))
+    for _ in range(3):
+        frame = loader.refresh()
+    assert loader.refreshes == 3
+    assert loader.changed_from == open_rows.to_numpy().argmax()
+    pd.testing.assert_frame_equal(frame, full_frame(path))
+
+
+def test_appended_and_closed_cases(sheet):
+    path, raw = sheet
+    loader = IncrementalLoader(CsvSheet(str(path)))
+    loader.refresh()
+
+    first_open = int((raw['Status'] != 'Closed').to_numpy().argmax())
+    raw.loc[first_open, 'Status'] = 'Closed'
+    more = make_sheet(410, seed=1).iloc[400:]
+    write(path, pd.concat([raw, more], ignore_index=True))
+
+    frame = loader.refresh()
+    assert loader.changed_from == first_open
+    assert len(frame) == 410
+    pd.testing.assert_frame_equal(frame, full_frame(path))
+
+
+def test_changed_closed_row_in_the_tail_reloads_everything(sheet):
+    path, raw = sheet
+    raw.loc[len(raw) - 1, 'Status'] = 'Closed'  # the last row is closed, so the tail starts at it
+    write(path, raw)
+    loader = IncrementalLoader(CsvSheet(str(path)))
+    loader.refresh()
+
+    raw.loc[len(raw) - 1, 'Case Reason'] = 'Edited'
+    write(path, raw)
+    frame = loader.refresh()
+    assert loader.changed_from == 0
+    pd.testing.assert_frame_equal(frame, full_frame(path))
+
+
+def test_full_reload_every_n_refreshes(sheet):
+    path, _ = sheet
+    loader = IncrementalLoader(CsvSheet(str(path)), full_reload_every=3)
+    changed_from = []
+    for _ in range(7):
+        loader.refresh()
+        changed_from.append(loader.changed_from)
+    assert [start == 0 for start in changed_from] == [True, False, False, True, False, False, True]
+
+
+def test_failed_tail_refresh_falls_back_to_a_full_reload(sheet):
+    path, _ = sheet
+    loader = IncrementalLoader(FlakySheet(str(path)))
+    loader.refresh()
+    frame = loader.refresh()
+    assert loader.refreshes == 2
+    assert loader.changed_from == 0
+    pd.testing.assert_frame_equal(frame, full_frame(path))
+
+
+def test_failed_full_reload_is_retried_as_a_full_reload(sheet):
+    path, _ = sheet
+    source = FlakySheet(str(path))
+    loader = IncrementalLoader(source)
+    loader.refresh()
+
+    source.down = True
+    with pytest.raises(OSError):
+        loader.refresh()
+    assert loader.refreshes == 1
+
+    source.down = source.tail_fails = False
+    loader.refresh()
+    assert loader.refreshes == 2
+    assert loader.changed_from == 0
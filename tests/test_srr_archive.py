@@ -0,0 +1,85 @@
+import dataclasses
+import os
+
+import pandas as pd
+import pytest
+
+from srr_archive import CaseArchive, date_bounds, latest_month, month_options, months_between, months_named, service_options, snapshot_view
+from srr_data import CsvSheet, IncrementalLoader
+from srr_persist import SnapshotFiles
+from srr_store import SnapshotStore
+from synthetic import make_sheet
+
+
+@pytest.fixture
+def sheet(tmp_path):
+    path = tmp_path / "sheet.csv"
+    raw = make_sheet(2000)
+    raw.to_csv(path, index=False)
+    return path, raw
+
+
+def new_store(tmp_path, path):
+    """A store as get_store builds it after a (re)start, without its refresher thread."""
+    return SnapshotStore(IncrementalLoader(CsvSheet(str(path))), files=SnapshotFiles("csv", str(tmp_path / "snapshots")),
+                         archive=CaseArchive("csv", str(tmp_path / "archive")))
+
+
+def test_filter_options_span_the_archive(tmp_path, sheet):
+    path, raw = sheet
+    store = new_store(tmp_path, path)
+    store._fetch()
+    snapshot = store._snapshot
+    assert snapshot.partitions
+    assert service_options(snapshot) == list(raw['Service'].unique())
+    assert month_options(snapshot) == list(raw['Month'].unique())
+    assert service_options(snapshot) == service_options(snapshot_view(snapshot))
+
+
+def test_first_sync_after_a_restart_keeps_the_recovered_files(tmp_path, sheet):
+    path, raw = sheet
+    new_store(tmp_path, path)._fetch()
+
+    # Restart, then the sheet changes a closed case of an archived month
+    store = new_store(tmp_path, path)
+    store._recover()
+    recovered = store._snapshot
+    raw.loc[0, 'Inquiry'] = 'Edited'
+    raw.to_csv(path, index=False)
+    store._fetch()
+
+    assert store._snapshot.partitions[0].path != recovered.partitions[0].path
+    assert all(os.path.exists(p.path) for p in recovered.partitions)
+    assert len(snapshot_view(recovered).frame) == len(raw)
+
+    # One sync later only the files of the two latest snapshots are left
+    store._fetch()
+    assert not os.path.exists(recovered.partitions[0].path)
+
+
+def test_partitions_archived_without_service_options_are_described_again(tmp_path, sheet):
+    path, raw = sheet
+    new_store(tmp_path, path)._fetch()
+    store = new_store(tmp_path, path)
+    store._recover()
+    store.archive.partitions = {month: dataclasses.replace(p, services=())
+                                for month, p in store.archive.partitions.items()}
+    store._fetch()
+    assert service_options(store._snapshot) == list(raw['Service'].unique())
+
+
+def test_views_default_to_the_latest_month(tmp_path, sheet):
+    path, raw = sheet
+    store = new_store(tmp_path, path)
+    store._fetch()
+    snapshot = store._snapshot
+    newest = raw.loc[pd.to_datetime(raw['Date Created']).idxmax(), 'Month']
+    assert latest_month(snapshot) == newest
+    assert latest_month(snapshot_view(snapshot)) == newest
+    first, last = date_bounds(snapshot)
+    assert len(months_named(snapshot, [newest])) < len(snapshot.partitions)
+    assert len(months_between(snapshot, max(first, last.replace(day=1)), last)) <= 1
+
+    # Only archived months left: the latest of those
+    archived = dataclasses.replace(snapshot, frame=snapshot.frame[snapshot.frame['Date Created'].isna()])
+    assert latest_month(archived) == max(snapshot.partitions, key=lambda p: p.end).months[-1][0]
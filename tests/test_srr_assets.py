@@ -0,0 +1,136 @@
+import contextlib
+import json
+import os
+import socket
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import srr_assets
+
+ANIMATION = {"v": "5.5.2", "fr": 30, "ip": 0, "op": 1, "w": 10, "h": 10, "layers": []}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """/slow/<seconds>/<name>, /flaky/<failures>/<name> (503 that many times first) and /hang."""
+
+    def do_GET(self):
+        self.server.hits[self.path] += 1
+        kind, *args = self.path.strip("/").split("/")
+        if kind == "slow":
+            time.sleep(float(args[0]))
+        elif kind == "flaky" and self.server.hits[self.path] <= int(args[0]):
+            self.send_error(503)
+            return
+        elif kind == "hang":
+            time.sleep(srr_assets.FETCH_TIMEOUT * 3)
+        body = json.dumps(ANIMATION).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        with contextlib.suppress(BrokenPipeError, ConnectionResetError):  # the client timed out
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    httpd.daemon_threads = True
+    httpd.hits = Counter()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(srr_assets, "ASSET_CACHE_DIR", str(tmp_path / "assets"))
+    for state in (srr_assets._loaded, srr_assets._failed, srr_assets._pending):
+        state.clear()
+    return tmp_path / "assets"
+
+
+def url(server, path):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+def test_prefetch_waits_for_the_slowest_download(server):
+    urls = [url(server, f"/slow/0.5/{i}") for i in range(5)]
+    started = time.monotonic()
+    futures = srr_assets.prefetch_lotties(urls)
+    assert [future.result() for future in futures] == [ANIMATION] * 5
+    assert time.monotonic() - started < 1.5
+
+
+def test_concurrent_loads_of_one_url_share_a_download(server):
+    target = url(server, "/slow/0.3/shared")
+    futures = [srr_assets.lottie_future(target) for _ in range(5)]
+    assert [future.result() for future in futures] == [ANIMATION] * 5
+    assert srr_assets.load_lottieurl(target) == ANIMATION
+    assert server.hits["/slow/0.3/shared"] == 1
+
+
+def test_server_errors_are_retried(server):
+    assert srr_assets.load_lottieurl(url(server, "/flaky/2/a")) == ANIMATION
+    assert server.hits["/flaky/2/a"] == 3
+    assert srr_assets.load_lottieurl(url(server, "/flaky/9/b")) == srr_assets.BLANK_LOTTIE
+    assert server.hits["/flaky/9/b"] == srr_assets.FETCH_RETRIES + 1
+
+
+def test_hung_response_costs_one_timeout(server):
+    started = time.monotonic()
+    assert srr_assets.load_lottieurl(url(server, "/hang")) == srr_assets.BLANK_LOTTIE
+    assert time.monotonic() - started < srr_assets.FETCH_TIMEOUT * 1.5
+    assert server.hits["/hang"] == 1
+    # Served blank without waiting again until RETRY_SECONDS have passed
+    started = time.monotonic()
+    assert srr_assets.load_lottieurl(url(server, "/hang")) == srr_assets.BLANK_LOTTIE
+    assert time.monotonic() - started < 0.1
+
+
+def test_unreachable_host_costs_one_timeout():
+    # A listener whose accept queue is full drops new connection attempts, like a host that does not answer
+    with socket.socket() as listener:
+        listener.bind(("127.0.0.1", 0))
+        listener.listen(0)
+        queued = [socket.socket() for _ in range(3)]
+        for client in queued:
+            client.setblocking(False)
+            client.connect_ex(listener.getsockname())
+        try:
+            started = time.monotonic()
+            assert srr_assets.fetch_asset(f"http://127.0.0.1:{listener.getsockname()[1]}/x", timeout=0.5) is None
+            assert time.monotonic() - started < 1
+        finally:
+            for client in queued:
+                client.close()
+
+
+def test_cached_copy_is_served_offline(server):
+    target = url(server, "/slow/0/cached")
+    assert srr_assets.load_lottieurl(target) == ANIMATION
+    srr_assets._loaded.clear()  # as in a new process
+    server.shutdown()
+    assert srr_assets.load_lottieurl(target) == ANIMATION
+    assert server.hits["/slow/0/cached"] == 1
+
+
+def test_concurrent_cache_writes_keep_every_entry(cache_dir):
+    urls = [f"https://lottie.host/{i}.json" for i in range(40)]
+    threads = [threading.Thread(target=srr_assets._write_cached, args=(u, u.encode())) for u in urls]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(srr_assets._read_index()) == sorted(urls)
+    assert all(srr_assets._read_cached(u) == u.encode() for u in urls)
+    assert not [name for name in os.listdir(cache_dir) if name.endswith(".tmp")]
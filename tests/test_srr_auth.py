@@ -0,0 +1,95 @@
+import base64
+
+import srr_auth
+from srr_auth import Authenticator, Credentials, FailureThrottle, TokenSigner, hash_password
+
+KEY = b"k" * 32
+NOW = 1_700_000_000
+
+
+def test_tokens_name_their_user_until_they_expire():
+    signer = TokenSigner(KEY)
+    token = signer.issue("alice", now=NOW)
+    assert signer.username(token, now=NOW + 1) == "alice"
+    assert signer.username(token, now=NOW + 12 * 3600) == "alice"
+    assert signer.username(token, now=NOW + 12 * 3600 + 1) is None
+
+
+def test_forged_and_tampered_tokens_are_rejected():
+    signer = TokenSigner(KEY)
+    token = signer.issue("alice", now=NOW)
+    assert TokenSigner(b"x" * 32).username(token, now=NOW) is None
+    payload, _, signature = token.rpartition(".")
+    mallory = base64.urlsafe_b64encode(b"mallory").decode()
+    assert signer.username(f"{mallory}.{NOW}.{signature}", now=NOW) is None
+    assert signer.username(f"{payload[:-1]}9.{signature}", now=NOW) is None
+    assert signer.username("garbage", now=NOW) is None
+
+
+def test_throttle_backs_off_after_the_free_failures():
+    throttle = FailureThrottle(free=3, max_delay=8, window=60)
+    for i in range(3):
+        assert throttle.retry_after("k", now=100 + i) == 0
+        throttle.fail("k", now=100 + i)
+    assert throttle.retry_after("k", now=102) == 1
+    delays = []
+    for i in range(5):
+        throttle.fail("k", now=110 + i)
+        delays.append(throttle.retry_after("k", now=110 + i))
+    assert delays == [2, 4, 8, 8, 8]
+    assert throttle.retry_after("other", now=110) == 0
+
+
+def test_throttle_forgets_a_key_after_the_window():
+    throttle = FailureThrottle(free=1, max_delay=300, window=60)
+    for i in range(5):
+        throttle.fail("k", now=100 + i)
+    assert throttle.retry_after("k", now=105) > 0
+    assert throttle.retry_after("k", now=165) == 0
+    throttle.fail("k", now=170)  # counts from one again
+    assert throttle.retry_after("k", now=170) == 1
+
+
+def test_throttle_keeps_at_most_max_keys():
+    throttle = FailureThrottle(free=1, max_delay=300, window=60, max_keys=3)
+    for i in range(3):
+        throttle.fail(f"old{i}", now=100)
+    throttle.fail("recent", now=200)  # the old keys are past their window
+    assert list(throttle._failures) == ["recent"]
+    for i in range(4):
+        throttle.fail(f"new{i}", now=201 + i)
+    assert list(throttle._failures) == ["new1", "new2", "new3"]
+
+
+def test_credentials_accept_plain_and_hashed_entries():
+    credentials = Credentials({"alice": "secret", "bob": hash_password("hunter2", iterations=1000)})
+    assert credentials.verify("alice", "secret") and credentials.verify("bob", "hunter2")
+    assert not credentials.verify("alice", "hunter2") and not credentials.verify("bob", "secret")
+    assert "alice" in credentials and "carol" not in credentials
+    assert not credentials.verify("carol", "secret")
+
+
+def test_unknown_user_and_wrong_password_look_the_same():
+    auth = Authenticator(Credentials({"alice": "secret"}), KEY)
+    assert auth.login("carol", "secret", "10.0.0.1") == auth.login("alice", "wrong", "10.0.0.1") == (None, 0)
+    token, wait = auth.login("alice", "secret", "10.0.0.1")
+    assert wait is None and auth.username(token) == "alice"
+
+
+def test_failures_from_one_client_do_not_lock_out_the_user():
+    auth = Authenticator(Credentials({"alice": "secret"}), KEY)
+    for _ in range(srr_auth.FREE_PAIR_FAILURES):
+        auth.login("alice", "wrong", "10.0.0.66")
+    token, wait = auth.login("alice", "secret", "10.0.0.66")
+    assert token is None and wait > 0  # refused before checking the password
+    token, wait = auth.login("alice", "secret", "10.0.0.1")
+    assert wait is None and auth.username(token) == "alice"
+
+
+def test_success_resets_the_back_off():
+    auth = Authenticator(Credentials({"alice": "secret"}), KEY)
+    for _ in range(srr_auth.FREE_PAIR_FAILURES - 1):
+        auth.login("alice", "wrong", "10.0.0.1")
+    assert auth.login("alice", "secret", "10.0.0.1")[1] is None
+    auth.login("alice", "wrong", "10.0.0.1")
+    assert auth.login("alice", "secret", "10.0.0.1")[1] is None
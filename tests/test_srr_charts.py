@@ -0,0 +1,29 @@
+import altair as alt
+import pandas as pd
+
+from srr_archive import VIEW_CACHE_SIZE
+from srr_charts import SNAPSHOT_CACHE_SIZE, cached_chart
+from srr_filters import FilterEngine
+
+
+class Snapshot:
+    pass
+
+
+def test_apps_do_not_share_specs_under_the_same_name():
+    counts = pd.DataFrame({'Service': ['VCC', 'AMC'], 'Count': [3, 1]})
+    rows = FilterEngine(pd.DataFrame({'Service': ['VCC', 'VCC', 'VCC', 'AMC']})).everything()
+    snapshot = Snapshot()
+    bar = cached_chart("srr_m", snapshot, rows, 'interaction_count', lambda: alt.Chart(counts).mark_bar())
+    arc = cached_chart("srr_a", snapshot, rows, 'interaction_count', lambda: alt.Chart(counts).mark_arc())
+    assert bar[1]['mark']['type'] == 'bar' and arc[1]['mark']['type'] == 'arc'
+    assert cached_chart("srr_m", snapshot, rows, 'interaction_count', lambda: 1 / 0) is bar
+
+
+def test_specs_outlive_a_cycle_through_every_cached_view():
+    assert SNAPSHOT_CACHE_SIZE >= VIEW_CACHE_SIZE
+    rows = FilterEngine(pd.DataFrame({'Service': ['VCC']})).everything()
+    views = [Snapshot() for _ in range(VIEW_CACHE_SIZE)]
+    chart = alt.Chart(pd.DataFrame({'x': [1]})).mark_bar()
+    first = [cached_chart("srr_a", view, rows, 'chart', lambda: chart) for view in views]
+    assert [cached_chart("srr_a", view, rows, 'chart', lambda: 1 / 0) for view in views] == first
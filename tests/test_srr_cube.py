@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from srr_cube import AggregateCube, group
+from srr_data import TIMEZONE, normalize
+from srr_filters import FilterEngine
+from synthetic import make_sheet
+
+AGGS = {
+    'Interactions': ('Service', 'size'),
+    'On It': ('TimeTo: On It Sec', 'mean'),
+    'Surveys': ('Survey', 'count'),
+}
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return normalize(make_sheet(3000))
+
+
+def selections(engine, frame):
+    everything = engine.everything()
+    start = pd.Timestamp('2024-03-01').tz_localize(TIMEZONE)
+    end = pd.Timestamp('2024-05-15').tz_localize(TIMEZONE)
+    service = frame['Service'].iloc[0]
+    return [
+        everything,
+        everything.isin('Service', [service]),
+        everything.between('Date Created', start, end),
+        everything.isin('Weekend?', ['No']).between('Date Created', start, end),
+    ]
+
+
+def test_cube_leaves_out_text_columns_and_buckets_dates():
+    frame = normalize(make_sheet(50_000, smes=10))
+    cube = AggregateCube(frame)
+    assert 'Requestor' not in cube.dimensions and 'Case Reason' not in cube.dimensions
+    dates = cube.cells['Date Created'].dropna()
+    assert (dates == dates.dt.normalize()).all()
+    assert len(cube.cells) < len(frame) / 2
+
+
+@pytest.mark.parametrize("by", ['Month', 'Service', ['SME', 'Service'], 'Case Reason', ['Requestor', 'Service']])
+def test_rollups_match_groupby_over_the_rows(frame, by):
+    cube = AggregateCube(frame)
+    engine = FilterEngine(frame)
+    for rows in selections(engine, frame):
+        expected = group(rows.frame(), by, AGGS)
+        pd.testing.assert_frame_equal(cube.rollup(rows, by, AGGS), expected)
+        pd.testing.assert_series_equal(expected['Interactions'], rows.frame().groupby(by, observed=True).size().sort_index(),
+                                       check_names=False)
+
+
+def test_rollups_are_copies(frame):
+    cube = AggregateCube(frame)
+    rows = FilterEngine(frame).everything()
+    for by in ('Service', 'Requestor'):
+        cube.rollup(rows, by, AGGS)['Interactions'] = 0
+        assert (cube.rollup(rows, by, AGGS)['Interactions'] > 0).all()
+
+
+def test_times_in_date_created_do_not_split_the_end_day():
+    raw = make_sheet(3000)
+    raw['Date Created'] = raw['Creation Timestamp']  # a sheet whose dates carry the time of day
+    frame = normalize(raw)
+    cube = AggregateCube(frame)
+    start = pd.Timestamp('2024-03-01').tz_localize(TIMEZONE)
+    end = pd.Timestamp('2024-05-15').tz_localize(TIMEZONE)
+    rows = FilterEngine(frame).everything().between('Date Created', start, end)
+    created = pd.to_datetime(raw['Creation Timestamp'])
+    assert len(rows) == ((created >= '2024-03-01') & (created < '2024-05-16')).sum()
+    assert cube.rollup(rows, 'Service', AGGS)['Interactions'].sum() == len(rows)
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from srr_data import convert_to_seconds, normalize, parse_duration
+from synthetic import make_sheet
+
+INT32_MAX = np.iinfo(np.int32).max
+
+
+def reference_seconds(text):
+    """convert_to_seconds, with durations beyond int32 seconds counted as malformed."""
+    seconds = convert_to_seconds(text)
+    if seconds and sum(abs(int(field)) * unit for field, unit in zip(text.split(':'), (3600, 60, 1))) > INT32_MAX:
+        return 0
+    return seconds
+
+
+def fuzz_strings(rng, n):
+    """Plain, padded, signed, blank, oversized and random "HH:MM:SS"-like strings."""
+    values = []
+    for _ in range(n):
+        kind = rng.integers(6)
+        if kind == 0:
+            values.append(f"{rng.integers(0, 1000)}:{rng.integers(0, 60):02d}:{rng.integers(0, 60):02d}")
+        elif kind == 1:
+            signs = rng.choice(['', '', '-', '+'], 3)
+            pads = rng.choice(['', ' ', '\t'], 6)
+            fields = rng.integers(0, 100, 3)
+            values.append(':'.join(f"{pads[2 * i]}{signs[i]}{fields[i]}{pads[2 * i + 1]}" for i in range(3)))
+        elif kind == 2:
+            values.append(f"{rng.integers(0, 10 ** rng.integers(1, 15))}:{rng.integers(0, 100)}:{rng.integers(0, 100)}")
+        elif kind == 3:
+            values.append(rng.choice(['', ' ', '#VALUE!', 'N/A', '1:2', '1:2:3:4', '::', '1::2', '1:2:', 'a:b:c',
+                                      '1_0:00:00', '1__0:00:00', '_1:00:00', '1.5:00:00', '01:02:03 ', '٣:04:05']))
+        else:
+            alphabet = list('0123456789::: -+_x.')
+            values.append(''.join(rng.choice(alphabet, rng.integers(0, 14))))
+    return values
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_parse_duration_matches_convert_to_seconds(seed):
+    values = fuzz_strings(np.random.default_rng(seed), 2000)
+    seconds, _ = parse_duration(pd.Series(values, dtype=object))
+    expected = [reference_seconds(value) for value in values]
+    mismatches = [(value, got, want) for value, got, want in zip(values, seconds, expected) if got != want]
+    assert not mismatches, mismatches[:10]
+    assert seconds.dtype == np.int32
+
+
+def test_parse_duration_blank_and_missing_values():
+    seconds, td = parse_duration(pd.Series([None, np.nan, '', '  '], dtype=object))
+    assert seconds.tolist() == [0, 0, 0, 0]
+    assert td.isna().all()
+
+
+def test_parse_duration_timedelta_matches_pandas_for_plain_values():
+    values = pd.Series(['0:00:00', '1:02:03', '123:59:59', '-1:02:03', '#VALUE!', None], dtype=object)
+    _, td = parse_duration(values)
+    pd.testing.assert_series_equal(td, pd.to_timedelta(values, errors='coerce'))
+
+
+@pytest.mark.parametrize("value", ['12345678901:00:00', '99999999999999999999:00:00', '1:99999999999999999999:00',
+                                   '596523:14:08'])
+def test_parse_duration_out_of_range_is_malformed(value):
+    seconds, td = parse_duration(pd.Series([value, '596523:14:07'], dtype=object))
+    assert seconds.tolist() == [0, INT32_MAX]
+    assert pd.isna(td[0]) and td[1] == pd.Timedelta(seconds=INT32_MAX)
+
+
+def test_parse_duration_keeps_the_index():
+    values = pd.Series(['1:00:00', 'x'], index=[7, 3], dtype=object)
+    seconds, td = parse_duration(values)
+    assert seconds.index.equals(values.index) and td.index.equals(values.index)
+
+
+def test_normalize_drops_rows_without_a_service_only_when_asked():
+    raw = make_sheet(100)
+    raw.loc[[3, 50], 'Service'] = np.nan
+    kept = normalize(raw)
+    assert len(kept) == 100 and kept['Service'].isna().sum() == 2
+    dropped = normalize(raw, drop_unassigned=True)
+    assert list(dropped.index) == [i for i in range(100) if i not in (3, 50)]
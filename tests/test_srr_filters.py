@@ -0,0 +1,27 @@
+import pandas as pd
+
+import srr_filters
+from srr_data import normalize
+from srr_filters import FilterEngine, LRUCache
+from synthetic import make_sheet
+
+
+def test_lru_cache_evicts_beyond_its_byte_cap():
+    cache = LRUCache(10, max_bytes=100, sizeof=len)
+    for key in 'abc':
+        cache.get_or_create(key, lambda: 'x' * 40)
+    assert list(cache._items) == ['b', 'c'] and cache.nbytes == 80
+    big = cache.get_or_create('d', lambda: 'x' * 200)  # larger than the cap: returned, not kept
+    assert len(big) == 200 and list(cache._items) == ['b', 'c']
+
+
+def test_frame_cache_stays_under_its_byte_cap(monkeypatch):
+    monkeypatch.setattr(srr_filters, 'FRAME_CACHE_BYTES', 256 * 1024)
+    frame = normalize(make_sheet(5000))
+    engine = FilterEngine(frame)
+    everything = engine.everything()
+    for service in frame['Service'].unique():
+        rows = everything.isin('Service', [service])
+        pd.testing.assert_frame_equal(rows.frame(), frame[frame['Service'] == service])
+    assert 0 < engine._frames.nbytes <= 256 * 1024
+    assert everything.between('Date Created', frame['Date Created'].min(), frame['Date Created'].max()).frame() is frame
@@ -0,0 +1,104 @@
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import srr_persist
+from srr_data import TIMEZONE, normalize
+from srr_persist import SnapshotFiles, read_frame, write_frame
+from srr_store import SnapshotStore
+from synthetic import make_sheet
+
+
+@pytest.fixture(scope="module")
+def frame():
+    raw = make_sheet(1000)
+    raw['AFI Comment'] = np.nan  # a text column the download left empty
+    return normalize(raw)
+
+
+class GatedLoader:
+    """Returns frame from refresh() once `gate` is set."""
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.gate = threading.Event()
+
+    def refresh(self):
+        assert self.gate.wait(10)
+        return self.frame
+
+
+def test_frames_round_trip_with_their_dtypes(tmp_path, frame):
+    path = str(tmp_path / "frame.arrow")
+    write_frame(path, frame, {"note": "hi"})
+    loaded, info = read_frame(path)
+    pd.testing.assert_frame_equal(loaded, frame)
+    assert info == {"note": "hi"}
+    assert isinstance(loaded['Service'].dtype, pd.CategoricalDtype)
+    assert list(loaded['Service'].cat.categories) == list(frame['Service'].cat.categories)
+
+
+def test_files_of_another_format_are_not_read(tmp_path, frame, monkeypatch):
+    path = str(tmp_path / "frame.arrow")
+    write_frame(path, frame, {})
+    monkeypatch.setattr(srr_persist, "SNAPSHOT_FORMAT", srr_persist.SNAPSHOT_FORMAT + 1)
+    assert read_frame(path) is None
+
+
+def test_latest_version_and_load_latest(tmp_path, frame):
+    files = SnapshotFiles("csv", str(tmp_path), keep=3)
+    assert files.latest_version() == 0 and files.load_latest() is None
+    fetched_at = datetime(2024, 5, 1, 9, 30, tzinfo=TIMEZONE)
+    for version in (1, 2, 3, 5):
+        files.save(version, frame.head(version), fetched_at, {"version": version})
+    SnapshotFiles("json", str(tmp_path)).save(9, frame, fetched_at)  # another source's files are not counted
+    assert files._versions() == [2, 3, 5]
+    assert files.latest_version() == 5
+    version, loaded, loaded_at, extra = files.load_latest()
+    assert (version, len(loaded), loaded_at, extra) == (5, 5, fetched_at, {"version": 5})
+
+    # An unreadable newest file is skipped, but still counts for the next version number
+    with open(files._path(6), "wb") as f:
+        f.write(b"partial")
+    assert files.latest_version() == 6
+    assert files.load_latest()[0] == 5
+
+
+def test_recovered_snapshot_is_published_before_the_first_fetch(tmp_path, frame):
+    files = SnapshotFiles("csv", str(tmp_path))
+    files.save(7, frame, datetime(2024, 5, 1, tzinfo=TIMEZONE))
+    loader = GatedLoader(frame.head(10))
+    store = SnapshotStore(loader, interval=3600, files=files)
+    recovered = store.latest(timeout=5)  # the sheet fetch is still blocked
+    assert recovered.version == 7 and len(recovered.frame) == len(frame)
+    loader.gate.set()
+    fetched = store.request_refresh(timeout=5)
+    assert fetched.version == 8 and len(fetched.frame) == 10
+
+
+def test_versions_keep_increasing_across_restarts(tmp_path, frame):
+    loader = GatedLoader(frame)
+    loader.gate.set()
+    first = SnapshotStore(loader, files=SnapshotFiles("csv", str(tmp_path)))
+    first._fetch()
+    first._fetch()
+    assert first._snapshot.version == 2
+
+    restarted = SnapshotStore(loader, files=SnapshotFiles("csv", str(tmp_path)))
+    restarted._recover()
+    assert restarted._snapshot.version == 2
+    pd.testing.assert_frame_equal(restarted._snapshot.frame, frame)
+    restarted._fetch()
+    assert restarted._snapshot.version == 3
+
+    # The newest file cannot be read after a crash: its version number is still used up
+    with open(SnapshotFiles("csv", str(tmp_path))._path(4), "wb") as f:
+        f.write(b"partial")
+    again = SnapshotStore(loader, files=SnapshotFiles("csv", str(tmp_path)))
+    again._recover()
+    assert again._snapshot.version == 3
+    again._fetch()
+    assert again._snapshot.version == 5
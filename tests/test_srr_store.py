@@ -0,0 +1,125 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from srr_store import SnapshotStore, per_snapshot
+
+
+class Snapshot:
+    pass
+
+
+class StubLoader:
+    """Counts refresh() calls; each blocks until `gate` is set and fails while `failing` is."""
+
+    def __init__(self):
+        self.calls = 0
+        self.gate = threading.Event()
+        self.gate.set()
+        self.failing = False
+
+    def refresh(self):
+        self.calls += 1
+        self.gate.wait(10)
+        if self.failing:
+            raise OSError("sheet unavailable")
+        return pd.DataFrame({'refresh': [self.calls]})
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_per_snapshot_keeps_the_most_recently_used():
+    builds = []
+
+    @per_snapshot(2)
+    def build(snapshot):
+        builds.append(snapshot)
+        return object()
+
+    first, second, third = Snapshot(), Snapshot(), Snapshot()
+    value = build(first)
+    build(second)
+    assert build(first) is value  # used again: now the most recent
+    build(third)
+    assert build(first) is value
+    assert [seen for seen, _ in build.entries()] == [third, first]
+    assert builds == [first, second, third]
+
+
+def test_sessions_share_the_first_fetch():
+    loader = StubLoader()
+    loader.gate.clear()
+    store = SnapshotStore(loader, interval=3600)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.latest(timeout=5))) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: loader.calls == 1)
+    loader.gate.set()
+    for thread in threads:
+        thread.join()
+    assert loader.calls == 1
+    assert len({id(snapshot) for snapshot in results}) == 1 and results[0].version == 1
+
+
+def test_refresh_requests_join_the_fetch_in_flight():
+    loader = StubLoader()
+    store = SnapshotStore(loader, interval=3600)
+    store.latest(timeout=5)
+    loader.gate.clear()
+    store.request_refresh(wait=False)
+    wait_until(lambda: loader.calls == 2)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.request_refresh(timeout=5))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    loader.gate.set()
+    for thread in threads:
+        thread.join()
+    assert loader.calls == 2
+    assert [snapshot.version for snapshot in results] == [2] * 5
+
+
+def test_failed_refresh_keeps_the_last_snapshot_without_waiting_out_the_timeout():
+    loader = StubLoader()
+    store = SnapshotStore(loader, interval=3600)
+    snapshot = store.latest(timeout=5)
+    loader.failing = True
+    started = time.monotonic()
+    assert store.request_refresh(timeout=30) is snapshot
+    assert time.monotonic() - started < 5
+    assert store.latest(timeout=0) is snapshot
+    assert loader.calls == 2
+
+    loader.failing = False
+    assert store.request_refresh(timeout=5).version == 2
+
+
+def test_first_fetch_failure_is_raised():
+    loader = StubLoader()
+    loader.failing = True
+    with pytest.raises(OSError):
+        SnapshotStore(loader, interval=3600).latest(timeout=5)
+
+
+def test_next_publish_follows_the_refresh_interval():
+    loader = StubLoader()
+    store = SnapshotStore(loader, interval=600)
+    store.latest(timeout=5)
+    wait_until(lambda: store.next_publish_in() > 0)
+    assert 590 < store.next_publish_in() <= 601
+    loader.gate.clear()
+    store.request_refresh(wait=False)
+    wait_until(lambda: loader.calls == 2)
+    assert store.next_publish_in() == 0  # fetching
+    loader.gate.set()
+    assert store.request_refresh(wait=True, timeout=5).version >= 2